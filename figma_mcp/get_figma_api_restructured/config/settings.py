@@ -19,6 +19,7 @@ FIGMA_API_BASE_URL = 'https://api.figma.com/v1'
 DATA_DIR = BASE_DIR / 'data'
 INPUT_DIR = DATA_DIR / 'input'
 OUTPUT_DIR = DATA_DIR / 'output'
+CACHE_DIR = DATA_DIR / 'cache'
 
 # Ensure directories exist
 INPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -26,7 +27,28 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # API settings
 REQUEST_TIMEOUT = 30
-MAX_RETRIES = 3
+MAX_RETRIES = 3  # Maximum attempts per request, including the first
+
+# Rate limiting and retry settings (shared by all clients in a process)
+RATE_LIMIT_PER_SECOND = 10
+RATE_LIMIT_BURST = 10
+RETRY_BACKOFF_BASE = 1.0  # Seconds; doubled per attempt before jitter
+RETRY_BACKOFF_CAP = 30.0  # Maximum delay between attempts in seconds
+MAX_RETRY_TIME = 120.0  # Maximum total retry wait per request in seconds
+
+# HTTP connection pool settings
+POOL_CONNECTIONS = 10  # Number of host pools to cache
+POOL_MAXSIZE = 10  # Maximum keep-alive connections per host
+
+# Batched node fetching settings
+NODE_IDS_MAX_URL_LENGTH = 2000  # Conservative limit for one /nodes request URL
+NODE_BATCH_WORKERS = 4  # Maximum batches fetched in parallel
+
+# Async client settings
+ASYNC_MAX_CONCURRENCY = 8  # Maximum in-flight requests per AsyncFigmaAPIClient
+
+# Response cache settings
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
 
 # Fields to keep when cleaning Figma data
 KEEP_FIELDS = {
@@ -36,5 +58,26 @@ KEEP_FIELDS = {
     "effects", "interactions", "backgroundColor"
 }
 
+# JSON files: 'stdlib', 'orjson' or 'auto' (orjson when installed).
+# orjson is faster but writes NaN/Infinity as null and holds the whole
+# document in memory, so compressed files always use the stdlib encoder
+JSON_BACKEND = 'stdlib'
+JSON_PRETTY = True  # Indent saved JSON; False writes compact files
+OUTPUT_COMPRESSION = None  # 'gzip' or 'zstd' to compress saved JSON (.gz/.zst is appended)
+COMPRESSION_LEVEL = None  # None uses gzip level 6 / zstd level 3
+DEDUPE_INSTANCES = False  # Save cleaned components with a shared component table
+BACKGROUND_WRITES = False  # FigmaExtractor saves outputs on a writer thread (scripts opt in)
+WRITE_QUEUE_SIZE = 4  # Queued saves beyond which the caller waits for the writer
+
 # Distance calculation tolerance
 DISTANCE_TOLERANCE = 2
+
+# Distance calculation backend: 'python', 'numpy' or 'auto' (NumPy when installed)
+DISTANCE_BACKEND = 'auto'
+DISTANCE_WORKERS = 1  # Processes for distance calculation; None uses every CPU
+
+# Hashes and outputs kept between runs by FigmaExtractor.process_incremental
+INCREMENTAL_STATE_FILE = 'incremental_state.json'
+
+# Instance subtree layouts remembered by ComponentExtractor's filter; 0 disables
+FILTER_MEMO_SIZE = 1024
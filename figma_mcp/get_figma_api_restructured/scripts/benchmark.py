@@ -0,0 +1,946 @@
+#!/usr/bin/env python3
+"""Performance benchmarks for the Figma API Extractor.
+
+Run a single suite, e.g. ``python3 scripts/benchmark.py http``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from figma_extractor.core.api_client import FigmaAPIClient
+from figma_extractor.core.rate_limiter import RequestScheduler
+from figma_extractor.extractors.frame_extractor import FrameExtractor
+from figma_extractor.utils.stub_server import FigmaStubServer
+
+# Sample full-file response shipped with the original scripts
+DEFAULT_DOCUMENT = Path(__file__).parent.parent.parent / 'get_figma_api' / 'all_figma_design.json'
+
+
+def _load_document(path):
+    """Load a Figma file response from disk."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _report(label, timings):
+    """Print mean and median latency for a list of durations in seconds."""
+    mean_ms = statistics.mean(timings) * 1000
+    median_ms = statistics.median(timings) * 1000
+    print(f"  {label:<28} mean {mean_ms:8.3f} ms   p50 {median_ms:8.3f} ms   ({len(timings)} runs)")
+
+
+def bench_http(args):
+    """Compare per-request latency of one-shot requests.get against the pooled session."""
+    import requests
+
+    document = {'name': 'Benchmark', 'version': '1', 'document': {'id': '0:0', 'type': 'DOCUMENT', 'children': []}}
+
+    with FigmaStubServer({'bench': document}, connect_latency=args.handshake_ms / 1000) as server:
+        url = f"{server.base_url}/files/bench"
+
+        # Baseline: module-level requests.get opens a new connection per call
+        timings = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            response = requests.get(url, headers={'X-Figma-Token': 'bench'}, timeout=30)
+            response.raise_for_status()
+            response.json()
+            timings.append(time.perf_counter() - start)
+        baseline_connections = server.connection_count
+        print(f"🌐 HTTP request latency against local stub server "
+              f"(simulated handshake {args.handshake_ms} ms)")
+        _report("requests.get (no pooling)", timings)
+
+        server.reset_counters()
+        timings = []
+        with FigmaAPIClient(token='bench', file_key='bench', base_url=server.base_url) as client:
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                client.get_file()
+                timings.append(time.perf_counter() - start)
+        _report("FigmaAPIClient (pooled)", timings)
+
+        print(f"  connections opened: {baseline_connections} without pooling, "
+              f"{server.connection_count} with pooling")
+
+
+def bench_lazy(args):
+    """Compare bytes transferred for frame listing on full vs depth-limited documents."""
+    document = _load_document(args.input)
+    scheduler = RequestScheduler(rate=10000, burst=1000)
+
+    with FigmaStubServer({'bench': document}) as server:
+        with FigmaAPIClient(token='bench', file_key='bench', base_url=server.base_url,
+                            scheduler=scheduler) as client:
+            extractor = FrameExtractor(client)
+            print(f"🌲 Frame listing transfer size on {Path(args.input).name}")
+
+            start = time.perf_counter()
+            frames = []
+            extractor._find_frames(client.get_file()['document'], frames)
+            elapsed = time.perf_counter() - start
+            full_bytes = client.bytes_received
+            print(f"  {'full document':<28} {full_bytes / 1024:10.1f} KB  {len(frames):5d} frames  "
+                  f"{elapsed * 1000:8.1f} ms")
+
+            for max_depth in args.depths:
+                before = client.bytes_received
+                start = time.perf_counter()
+                frames = extractor.extract_lazy(max_depth=max_depth)
+                elapsed = time.perf_counter() - start
+                transferred = client.bytes_received - before
+                print(f"  {f'lazy, max_depth={max_depth}':<28} {transferred / 1024:10.1f} KB  "
+                      f"{len(frames):5d} frames  {elapsed * 1000:8.1f} ms  "
+                      f"({transferred / full_bytes:.1%} of full)")
+
+
+def bench_stream(args):
+    """Compare peak memory of in-memory and streaming frame extraction as documents grow."""
+    import tempfile
+    import tracemalloc
+    from unittest.mock import Mock
+
+    document = _load_document(args.input)
+    extractor = FrameExtractor(Mock())
+    print(f"🌊 Frame extraction peak memory on {Path(args.input).name} replicated N times")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            scaled = dict(document)
+            scaled['document'] = dict(document['document'], children=document['document']['children'] * scale)
+            path = Path(tmp_dir) / f"scaled_{scale}.json"
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(scaled, f)
+            del scaled
+            size_mb = path.stat().st_size / 1024 / 1024
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            frames = []
+            extractor._find_frames(_load_document(path)['document'], frames)
+            load_elapsed = time.perf_counter() - start
+            load_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            streamed = extractor.extract_stream(path)
+            stream_elapsed = time.perf_counter() - start
+            stream_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            assert streamed == frames
+            print(f"  x{scale:<3} {size_mb:7.1f} MB  json.load peak {load_peak / 1024 / 1024:8.1f} MB "
+                  f"({load_elapsed:6.2f} s)   stream peak {stream_peak / 1024 / 1024:6.1f} MB "
+                  f"({stream_elapsed:6.2f} s)   {len(frames)} frames")
+
+
+
+def _build_deep_document(depth):
+    """Build a document nested depth levels deep, one FRAME with a text sibling per level."""
+    root = node = {'id': '0:0', 'name': 'Document', 'type': 'DOCUMENT', 'children': []}
+    for level in range(1, depth + 1):
+        box = {'x': level, 'y': level, 'width': 1000 - level / 10, 'height': 1000 - level / 10}
+        child = {
+            'id': f'1:{level}', 'name': f'Level {level}', 'type': 'FRAME', 'absoluteBoundingBox': box,
+            'fills': [{'type': 'SOLID', 'color': {'r': 0.5, 'g': 0.5, 'b': 0.5, 'a': 1}}],
+            'effects': [], 'children': []
+        }
+        label = {'id': f'2:{level}', 'name': 'Label', 'type': 'TEXT', 'characters': '',
+                 'absoluteBoundingBox': dict(box, height=10)}
+        node['children'].extend([child, label])
+        node = child
+    return root
+
+
+def bench_deep(args):
+    """Time every tree walker on a synthetic document far deeper than the recursion limit."""
+    from unittest.mock import Mock
+    from figma_extractor.processors.data_cleaner import DataCleaner
+    from figma_extractor.processors.distance_calculator import DistanceCalculator
+    from figma_extractor.processors.traversal import TreeTraversal
+
+    document = _build_deep_document(args.depth)
+    cleaner = DataCleaner()
+    frame_extractor = FrameExtractor(Mock())
+    calculator = DistanceCalculator()
+    walkers = [
+        ('_find_frames', lambda: frame_extractor._find_frames(document, [])),
+        ('clean', lambda: cleaner.clean(document)),
+        ('filter_node', lambda: cleaner.filter_node(document)),
+        ('remove_empty_fields', lambda: cleaner.remove_empty_fields(document)),
+        ('normalize_colors', lambda: cleaner.normalize_colors(document)),
+        ('_get_nodes_with_bounds', lambda: calculator._get_nodes_with_bounds(document)),
+        ('fused traversal', lambda: TreeTraversal([
+            frame_extractor.traversal_stage(), *cleaner.traversal_stages(), calculator.traversal_stage()
+        ]).run(document)),
+    ]
+
+    print(f"🕳️ Tree walkers on a {args.depth}-level document "
+          f"(recursion limit {sys.getrecursionlimit()})")
+    for label, walk in walkers:
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            walk()
+            timings.append(time.perf_counter() - start)
+        _report(label, timings)
+
+
+def bench_names(args):
+    """Compare indexed frame name search against a linear scan of every frame."""
+    import random
+    from figma_extractor.core.document_index import DocumentIndex
+
+    document = _load_document(args.input)
+    start = time.perf_counter()
+    index = DocumentIndex(document)
+    name_index = index.name_index
+    build_seconds = time.perf_counter() - start
+
+    # Queries are slices of real names, so most of them match something
+    rng = random.Random(0)
+    names = [name for name in name_index.names if name]
+    queries = []
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        offset = rng.randrange(len(name))
+        queries.append(name[offset:offset + rng.randint(2, 8)])
+
+    frames = index.get_nodes_by_type('FRAME')
+    print(f"🔎 {len(queries)} frame name queries on {Path(args.input).name} "
+          f"({len(name_index)} nodes, {len(frames)} frames; index built in {build_seconds * 1000:.1f} ms)")
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        [frame for frame in frames if query.lower() in frame.get('name', '').lower()]
+        timings.append(time.perf_counter() - start)
+    _report("linear scan", timings)
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        name_index.search(query, node_type='FRAME')
+        timings.append(time.perf_counter() - start)
+    _report("name index", timings)
+
+
+def bench_spatial(args):
+    """Compare spatial index queries against linear scans of every bounding box."""
+    import math
+    import random
+    from figma_extractor.core.document_index import DocumentIndex
+    from figma_extractor.core.spatial_index import SpatialIndex
+
+    nodes = list(DocumentIndex(_load_document(args.input)).nodes.items())
+    boxes = [node['absoluteBoundingBox'] for _, node in nodes if node.get('absoluteBoundingBox')]
+    left = min(box['x'] for box in boxes)
+    top = min(box['y'] for box in boxes)
+    width = max(box['x'] + box['width'] for box in boxes) - left
+    height = max(box['y'] + box['height'] for box in boxes) - top
+
+    print(f"🗺️  Spatial queries on {Path(args.input).name} tiled side by side ({len(boxes)} boxes per copy)")
+    for scale in args.scales:
+        # Copies are laid out in a row, like a board with many more screens
+        tiled = []
+        for copy in range(scale):
+            for box in boxes:
+                tiled.append((f'{copy}:{len(tiled)}', {'absoluteBoundingBox': dict(box, x=box['x'] + copy * width)}))
+        flat = [(node_id, node['absoluteBoundingBox']) for node_id, node in tiled]
+
+        start = time.perf_counter()
+        spatial_index = SpatialIndex(tiled)
+        build_seconds = time.perf_counter() - start
+
+        rng = random.Random(scale)
+        points = [(left + rng.uniform(0, width * scale), top + rng.uniform(0, height)) for _ in range(args.queries)]
+        # Viewport-sized query rectangles
+        rects = [(x, y, 400, 300) for x, y in points]
+
+        def scan_point(x, y):
+            return [node_id for node_id, box in flat
+                    if box['x'] <= x <= box['x'] + box['width'] and box['y'] <= y <= box['y'] + box['height']]
+
+        def scan_rect(x, y, w, h):
+            return [node_id for node_id, box in flat
+                    if box['x'] <= x + w and x <= box['x'] + box['width']
+                    and box['y'] <= y + h and y <= box['y'] + box['height']]
+
+        def scan_nearest(x, y):
+            return sorted(range(len(flat)), key=lambda i: (math.hypot(
+                max(flat[i][1]['x'] - x, 0, x - flat[i][1]['x'] - flat[i][1]['width']),
+                max(flat[i][1]['y'] - y, 0, y - flat[i][1]['y'] - flat[i][1]['height'])), i))[:5]
+
+        print(f"  {len(flat)} boxes   index built in {build_seconds * 1000:.1f} ms   "
+              f"({len(spatial_index.levels)} grid levels)")
+        for label, scan, query, queries in (
+            ("point", scan_point, spatial_index.at_point, points),
+            ("rectangle", scan_rect, spatial_index.intersecting, rects),
+            ("5 nearest", scan_nearest, lambda x, y: spatial_index.nearest(x, y, k=5), points)
+        ):
+            for name, function in (("linear scan", scan), ("spatial index", query)):
+                timings = []
+                for arguments in queries:
+                    start = time.perf_counter()
+                    function(*arguments)
+                    timings.append(time.perf_counter() - start)
+                _report(f"{label}: {name}", timings)
+
+
+def _pairwise_siblings(children, tolerance=2):
+    """The original O(n²) sibling layout, kept here as the benchmark baseline."""
+    for i, node_i in enumerate(children):
+        box_i = node_i.get("absoluteBoundingBox")
+        if not box_i:
+            continue
+        siblings_info = []
+        for j, node_j in enumerate(children):
+            box_j = node_j.get("absoluteBoundingBox")
+            if i == j or not box_j:
+                continue
+            if abs(box_i["y"] - box_j["y"]) < tolerance:
+                siblings_info.append({"targetId": node_j.get("id"), "relation": "sameRow",
+                                      "distance": round(abs(box_i["x"] - box_j["x"]), 2)})
+            elif abs(box_i["x"] - box_j["x"]) < tolerance:
+                siblings_info.append({"targetId": node_j.get("id"), "relation": "sameColumn",
+                                      "distance": round(abs(box_i["y"] - box_j["y"]), 2)})
+        if siblings_info:
+            node_i["siblingsLayout"] = siblings_info
+
+
+def bench_siblings(args):
+    """Compare pairwise and sort-based sibling layout detection as child counts grow."""
+    import random
+    from figma_extractor.processors.layout import process_siblings
+
+    print("🧱 Sibling layout detection on scattered children (tolerance 2)")
+    for count in args.counts:
+        rng = random.Random(count)
+        # Canvas grows with the square root of the count, like a dense board
+        side = max(100.0, count ** 0.5 * 100)
+        children = [
+            {'id': f'1:{index}', 'absoluteBoundingBox': {
+                'x': round(rng.uniform(0, side), 1), 'y': round(rng.uniform(0, side), 1),
+                'width': 40, 'height': 20}}
+            for index in range(count)
+        ]
+
+        fast = [dict(child) for child in children]
+        start = time.perf_counter()
+        process_siblings(fast)
+        fast_seconds = time.perf_counter() - start
+        entries = sum(len(child.get('siblingsLayout', [])) for child in fast)
+
+        if count <= args.max_pairwise:
+            slow = [dict(child) for child in children]
+            start = time.perf_counter()
+            _pairwise_siblings(slow)
+            slow_seconds = time.perf_counter() - start
+            assert slow == fast
+            pairwise = f"{slow_seconds * 1000:10.1f} ms"
+        else:
+            pairwise = f"{'skipped':>13}"
+
+        print(f"  {count:>6} children   pairwise {pairwise}   sorted {fast_seconds * 1000:8.1f} ms   "
+              f"{entries} entries")
+
+
+def bench_distances(args):
+    """Compare the pure-Python and NumPy pairwise distance backends."""
+    import random
+    from figma_extractor.processors import distance_calculator
+    from figma_extractor.processors.distance_calculator import DistanceCalculator
+
+    if distance_calculator.np is None:
+        print("NumPy is not installed; only the Python backend is available")
+        return
+
+    python_backend = DistanceCalculator(backend='python')
+    numpy_backend = DistanceCalculator(backend='numpy')
+    print("📏 Pairwise child distances (pure Python vs NumPy)")
+    for count in args.counts:
+        rng = random.Random(count)
+        children = [
+            {'id': f'1:{index}', 'absoluteBoundingBox': {
+                'x': round(rng.uniform(0, 2000), 1), 'y': round(rng.uniform(0, 2000), 1),
+                'width': rng.randint(10, 200), 'height': rng.randint(10, 80)}}
+            for index in range(count)
+        ]
+
+        start = time.perf_counter()
+        expected = python_backend._child_distances(children)
+        python_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = numpy_backend._child_distances(children)
+        numpy_seconds = time.perf_counter() - start
+        assert actual == expected
+
+        print(f"  {count:>5} children   {len(expected):>8} pairs   python {python_seconds * 1000:9.1f} ms   "
+              f"numpy {numpy_seconds * 1000:8.1f} ms   ({python_seconds / numpy_seconds:5.1f}x)")
+
+
+def _build_board(parent_count, max_children, seed=0):
+    """Build a /nodes response with many parents of randomly placed children."""
+    import random
+
+    rng = random.Random(seed)
+    parents = []
+    for parent_index in range(parent_count):
+        children = [
+            {'id': f'{parent_index}:{index}', 'name': f'Layer {index}', 'absoluteBoundingBox': {
+                'x': round(rng.uniform(0, 1440), 1), 'y': round(rng.uniform(0, 900), 1),
+                'width': rng.randint(8, 300), 'height': rng.randint(8, 120)}}
+            for index in range(rng.randint(2, max_children))
+        ]
+        parents.append({'id': f'1:{parent_index}', 'name': f'Frame {parent_index}', 'children': children,
+                        'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': 1440, 'height': 900}})
+    pairs = sum(len(parent['children']) * (len(parent['children']) - 1) // 2 for parent in parents)
+    return {'nodes': {'1:0': {'document': {'id': '1:0', 'name': 'Board', 'children': parents}}}}, pairs
+
+
+def _build_list_screens(screen_count, row_count, cells):
+    """Build screens of INSTANCE rows sharing one component, with per-row ids and texts."""
+    def box(x, y, width, height):
+        return {'x': float(x), 'y': float(y), 'width': float(width), 'height': float(height)}
+
+    screens = []
+    for screen in range(screen_count):
+        left = screen * 400
+        rows = []
+        for row in range(row_count):
+            y = 100 + row * 72
+            prefix = f'I{screen}:{row}'
+            # Cells line up in one row; each holds an icon, a label and a caption
+            children = []
+            for cell in range(cells):
+                x = left + 16 + cell * 88
+                children.append({
+                    'id': f'{prefix};2:{cell}', 'name': f'Cell {cell}', 'type': 'FRAME',
+                    'absoluteBoundingBox': box(x, y + 8, 80, 56),
+                    'children': [
+                        {'id': f'{prefix};3:{cell}', 'name': 'Icon', 'type': 'VECTOR',
+                         'absoluteBoundingBox': box(x + 28, y + 12, 24, 24)},
+                        {'id': f'{prefix};4:{cell}', 'name': 'Label', 'type': 'TEXT',
+                         'characters': f'Item {row}', 'absoluteBoundingBox': box(x + 4, y + 40, 72, 12)},
+                        {'id': f'{prefix};5:{cell}', 'name': 'Caption', 'type': 'TEXT',
+                         'characters': f'{cell}', 'absoluteBoundingBox': box(x + 4, y + 52, 72, 10)}
+                    ]
+                })
+            rows.append({'id': f'{screen}:{row}', 'name': 'List Row', 'type': 'INSTANCE', 'componentId': '9:1',
+                         'absoluteBoundingBox': box(left, y, 375, 72), 'children': children})
+        screens.append({'id': f'{screen}:0', 'name': f'Screen {screen}', 'type': 'FRAME',
+                        'absoluteBoundingBox': box(left, 0, 375, 100 + row_count * 72), 'children': rows})
+    return {'id': '0:1', 'name': 'Board', 'type': 'CANVAS', 'children': screens}
+
+
+def bench_memo(args):
+    """Compare filter_node with and without the instance layout memo."""
+    from figma_extractor.processors.data_cleaner import DataCleaner
+    from figma_extractor.processors.filter_memo import FilterMemo
+
+    cleaner = DataCleaner()
+    documents = [
+        ('sample document', _load_document(args.document)['document']),
+        (f'{args.screens} screens x {args.rows} rows x {args.cells} cells',
+         _build_list_screens(args.screens, args.rows, args.cells))
+    ]
+    for label, document in documents:
+        print(f"🧩 {label}")
+        expected = json.dumps(cleaner.filter_node(document))
+        memo = FilterMemo(cleaner)
+        variants = [
+            ('filter_node', cleaner.filter_node),
+            ('memo, new per run', lambda node: FilterMemo(cleaner).filter_node(node)),
+            ('memo, kept across runs', memo.filter_node)
+        ]
+        for name, filter_node in variants:
+            assert json.dumps(filter_node(document)) == expected
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                filter_node(document)
+                timings.append(time.perf_counter() - start)
+            _report(name, timings)
+        print(f"  kept memo: {memo.stats}")
+
+
+def bench_dedupe(args):
+    """Compare size, save and load time of inlined and deduplicated cleaned output."""
+    import tempfile
+    from figma_extractor.processors.data_cleaner import DataCleaner
+    from figma_extractor.utils.file_handler import FileHandler
+
+    cleaner = DataCleaner()
+    documents = [
+        ('sample document', _load_document(args.document)['document']),
+        (f'{args.screens} screens x {args.rows} rows x {args.cells} cells',
+         _build_list_screens(args.screens, args.rows, args.cells))
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        handler = FileHandler(tmp_dir, tmp_dir, json_backend=args.backend)
+        for label, document in documents:
+            print(f"📦 {label} ({handler.json_backend.name}, {'pretty' if handler.pretty else 'compact'})")
+            clean = cleaner.filter_node(document)
+            variants = [
+                ('inline', lambda: clean, lambda data: data),
+                ('instance table', lambda: cleaner.dedupe_instances(clean), cleaner.expand_instances)
+            ]
+            for name, build, restore in variants:
+                filename = f"clean_{name.replace(' ', '_')}.json"
+                save_timings, load_timings = [], []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    path = handler.save_json(build(), filename)
+                    save_timings.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    loaded = restore(handler.load_json(filename))
+                    load_timings.append(time.perf_counter() - start)
+                assert json.dumps(loaded) == json.dumps(clean)
+                print(f"  {name:<16} {path.stat().st_size / 1024:9.1f} KB")
+                _report(f'{name} save', save_timings)
+                _report(f'{name} load', load_timings)
+
+
+def bench_parallel(args):
+    """Compare distance calculation throughput across process pool sizes."""
+    from figma_extractor.processors.distance_calculator import DistanceCalculator
+
+    data, pairs = _build_board(args.parents, args.max_children)
+    print(f"🧮 Sibling distances for {args.parents} parents ({pairs} pairs), "
+          f"{os.cpu_count()} CPUs available")
+    expected = None
+    baseline = None
+    for workers in args.workers:
+        calculator = DistanceCalculator(backend=args.backend, workers=workers)
+        start = time.perf_counter()
+        result = calculator.calculate(data, '1:0')
+        seconds = time.perf_counter() - start
+        if expected is None:
+            expected, baseline = result, seconds
+        assert result == expected
+        print(f"  {workers:>3} workers   {seconds * 1000:9.1f} ms   "
+              f"{pairs / seconds / 1e6:6.2f} M pairs/s   ({baseline / seconds:4.1f}x)")
+
+
+def bench_incremental(args):
+    """Compare full and incremental cleaning + distances after moving one node per run."""
+    import copy
+    import random
+    from figma_extractor.processors.data_cleaner import DataCleaner
+    from figma_extractor.processors.distance_calculator import DistanceCalculator
+    from figma_extractor.processors.incremental import IncrementalProcessor
+
+    data, pairs = _build_board(args.parents, args.max_children)
+    root = data['nodes']['1:0']['document']
+    movable = [child for parent in root['children'] for child in parent['children']]
+    # Board ids repeat across levels, and repeated ids are never reused
+    root['id'] = '0:1'
+    for parent in root['children']:
+        for child in parent['children']:
+            child['id'] = f"{parent['id']};{child['id']}"
+    cleaner = DataCleaner()
+    calculator = DistanceCalculator()
+    processor = IncrementalProcessor(cleaner, calculator)
+    print(f"♻️ {args.parents} parents, {len(movable)} children ({pairs} pairs); one child moves per run")
+
+    rng = random.Random(0)
+    processor.process(root)
+    full_timings = []
+    incremental_timings = []
+    for _ in range(args.runs):
+        node = rng.choice(movable)
+        node['absoluteBoundingBox'] = dict(node['absoluteBoundingBox'], x=node['absoluteBoundingBox']['x'] + 1)
+
+        start = time.perf_counter()
+        expected = {'clean': cleaner.filter_node(root), 'distances': calculator.calculate(data, '1:0')}
+        full_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        outputs = processor.process(root)
+        incremental_timings.append(time.perf_counter() - start)
+        assert outputs == expected
+    _report('full run', full_timings)
+    _report('incremental run', incremental_timings)
+    print(f"  last run: {processor.stats}")
+
+
+def bench_reporting(args):
+    """Compare distance calculation time with console, JSON lines and silent reporting."""
+    from figma_extractor.processors.distance_calculator import DistanceCalculator
+    from figma_extractor.utils.reporting import ConsoleReporter, JsonLinesReporter, NullReporter
+
+    data, pairs = _build_board(args.parents, args.max_children)
+    print(f"📣 Sibling distances for {args.parents} parents ({pairs} pairs); "
+          f"output goes to {args.output}")
+    with open(args.output, 'w', encoding='utf-8') as output:
+        variants = [
+            ("console (old prints)", ConsoleReporter(output)),
+            ("JSON lines", JsonLinesReporter(output)),
+            ("silent (library default)", NullReporter())
+        ]
+        for label, reporter in variants:
+            calculator = DistanceCalculator(backend='python', reporter=reporter)
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                calculator.calculate(data, '1:0')
+                timings.append(time.perf_counter() - start)
+            _report(label, timings)
+
+
+def bench_geometry(args):
+    """Compare box dicts with the columnar geometry store: memory and geometry loops."""
+    import copy
+    import tracemalloc
+    from figma_extractor.core.document_index import DocumentIndex
+    from figma_extractor.core.geometry_store import GeometryStore
+    from figma_extractor.core.spatial_index import SpatialIndex
+    from figma_extractor.processors.distance_calculator import DistanceCalculator
+    from figma_extractor.processors.layout import process_siblings
+
+    data, pairs = _build_board(args.parents, args.max_children)
+    index = DocumentIndex(data)
+    boxed = [(node_id, node) for node_id, node in index.nodes.items() if node.get('absoluteBoundingBox')]
+    print(f"📐 Geometry of {len(boxed)} nodes ({args.parents} parents, {pairs} sibling pairs)")
+
+    # Memory: the boxes as decoded JSON dicts vs the same boxes in the store
+    boxes_json = json.dumps([node['absoluteBoundingBox'] for _, node in boxed])
+    tracemalloc.start()
+    box_dicts = json.loads(boxes_json)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del box_dicts
+    tracemalloc.start()
+    store = GeometryStore(boxed)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  {'box dicts':<28} {dict_bytes / 1024 / 1024:8.1f} MB")
+    print(f"  {'geometry store':<28} {store_bytes / 1024 / 1024:8.1f} MB   "
+          f"(columns {store.nbytes / 1024 / 1024:.1f} MB, the rest is the id map)")
+
+    parents = [node for _, node in boxed if node.get('children')]
+    calculator = DistanceCalculator(backend='python')
+    loops = [
+        ("distances", lambda geometry: calculator.calculate(data, '1:0', geometry=geometry)),
+        ("sibling layout", lambda geometry: [process_siblings(copy.copy(parent['children']), geometry=geometry)
+                                             for parent in parents]),
+        ("spatial index build", lambda geometry: SpatialIndex.from_geometry(geometry) if geometry
+            else SpatialIndex(boxed))
+    ]
+    for label, loop in loops:
+        for name, geometry in (("dicts", None), ("store", store)):
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                loop(geometry)
+                timings.append(time.perf_counter() - start)
+            _report(f"{label}: {name}", timings)
+
+
+def bench_json(args):
+    """Compare FileHandler save/load time and file size per JSON backend and layout."""
+    import tempfile
+    from figma_extractor.utils import json_backends
+    from figma_extractor.utils.file_handler import FileHandler
+
+    document = _load_document(args.input)
+    backends = ['stdlib'] + (['orjson'] if json_backends.orjson is not None else [])
+    print(f"💾 Saving and loading {Path(args.input).name} with FileHandler"
+          + ("" if 'orjson' in backends else " (orjson not installed)"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in backends:
+            handler = FileHandler(output_dir=tmp_dir, input_dir=tmp_dir, json_backend=backend)
+            for pretty in (True, False):
+                label = f"{backend}, {'pretty' if pretty else 'compact'}"
+                filename = f"{backend}_{pretty}.json"
+                save_timings = []
+                load_timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    path = handler.save_json(document, filename, pretty=pretty)
+                    save_timings.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    loaded = handler.load_json(filename)
+                    load_timings.append(time.perf_counter() - start)
+                assert loaded == document
+                size_kb = path.stat().st_size / 1024
+                print(f"  {label:<18} save {statistics.median(save_timings) * 1000:8.1f} ms   "
+                      f"load {statistics.median(load_timings) * 1000:8.1f} ms   {size_kb:9.1f} KB")
+
+
+def bench_writer(args):
+    """Compare an extraction loop saving its outputs inline vs on the writer thread."""
+    import tempfile
+    from figma_extractor.processors.data_cleaner import DataCleaner
+    from figma_extractor.utils.file_handler import FileHandler
+
+    document = _load_document(args.input)
+    cleaner = DataCleaner()
+    print(f"🧵 {args.files} file(s): {args.fetch_ms} ms simulated fetch, clean, save raw + cleaned "
+          f"({args.backend} backend)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for background in (False, True):
+            timings = []
+            for _ in range(args.runs):
+                handler = FileHandler(output_dir=tmp_dir, input_dir=tmp_dir, json_backend=args.backend,
+                                      background=background)
+                start = time.perf_counter()
+                for i in range(args.files):
+                    time.sleep(args.fetch_ms / 1000)  # Network wait for the next file
+                    handler.save_json(document, f'raw_{i}.json')
+                    handler.save_json(cleaner.clean(document), f'clean_{i}.json')
+                handler.close()
+                timings.append(time.perf_counter() - start)
+            _report('background writer' if background else 'inline saves', timings)
+
+
+def _rss_mb():
+    """Current resident set size in MB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def bench_snapshot(args):
+    """Compare reloading saved output from JSON and from a binary snapshot."""
+    import gc
+    import tempfile
+    import tracemalloc
+    from figma_extractor.utils import json_backends
+    from figma_extractor.utils.file_handler import FileHandler
+
+    document = _load_document(args.input)
+    backends = ['stdlib'] + (['orjson'] if json_backends.orjson is not None else [])
+    print(f"📦 Reloading {Path(args.input).name} replicated N times: JSON vs snapshot "
+          f"(peak = traced Python heap, rss = resident growth while the result is held)")
+
+    def measure(label, load):
+        gc.collect()
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        result = load()
+        elapsed = time.perf_counter() - start
+        rss_after = _rss_mb()
+        if hasattr(result, 'close'):
+            result.close()
+        del result
+        tracemalloc.start()
+        result = load()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rss = f"rss +{rss_after - rss_before:7.1f} MB" if rss_before is not None else ""
+        print(f"    {label:<30} {elapsed * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.1f} MB   {rss}")
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            scaled = dict(document)
+            scaled['document'] = dict(document['document'], children=document['document']['children'] * scale)
+            handler = FileHandler(output_dir=tmp_dir, input_dir=tmp_dir, json_backend='stdlib', pretty=False)
+            json_path = handler.save_json(scaled, 'scaled.json')
+            snapshot_path = handler.save_snapshot(scaled, 'scaled.snapshot')
+            target = scaled['document']['children'][-1]['children'][-1]['id']
+            del scaled
+            json_mb = json_path.stat().st_size / 1024 / 1024
+            print(f"  x{scale}: compact JSON {json_mb:.1f} MB, snapshot "
+                  f"{snapshot_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+            for backend in backends:
+                backend_handler = FileHandler(output_dir=tmp_dir, input_dir=tmp_dir, json_backend=backend)
+                measure(f"load_json ({backend})", lambda: backend_handler.load_json('scaled.json'))
+
+            def open_and_find():
+                snapshot = handler.open_snapshot('scaled.snapshot')
+                node = snapshot.find(target)
+                node.fields
+                return snapshot
+
+            snapshot = measure("open_snapshot", lambda: handler.open_snapshot('scaled.snapshot'))
+            snapshot.close()
+            snapshot = measure("open_snapshot + find + fields", open_and_find)
+            snapshot.close()
+            snapshot = handler.open_snapshot('scaled.snapshot')
+            rebuilt = measure("open_snapshot + to_dict", snapshot.to_dict)
+            assert rebuilt == handler.load_json('scaled.json')
+            del rebuilt
+            snapshot.close()
+
+
+def bench_compression(args):
+    """Compare size, save/load time and save peak memory of plain and compressed output."""
+    import tempfile
+    import tracemalloc
+    from figma_extractor.utils import compression
+    from figma_extractor.utils.file_handler import FileHandler
+
+    document = _load_document(args.input)
+    formats = ['none', 'gzip'] + (['zstd'] if compression.zstandard is not None else [])
+    print(f"🗜️ Saving {Path(args.input).name} with the {args.backend} JSON backend"
+          + ("" if 'zstd' in formats else " (zstandard not installed)"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        handler = FileHandler(output_dir=tmp_dir, input_dir=tmp_dir, json_backend=args.backend)
+        for pretty in (True, False):
+            for output_format in formats:
+                label = f"{'pretty' if pretty else 'compact'}, {output_format}"
+                save_timings = []
+                load_timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    path = handler.save_json(document, 'bench.json', pretty=pretty, compression=output_format)
+                    save_timings.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    loaded = handler.load_json(path.name)
+                    load_timings.append(time.perf_counter() - start)
+                assert loaded == document
+
+                tracemalloc.start()
+                handler.save_json(document, 'bench.json', pretty=pretty, compression=output_format)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"  {label:<16} {path.stat().st_size / 1024:9.1f} KB   "
+                      f"save {statistics.median(save_timings) * 1000:7.1f} ms   "
+                      f"load {statistics.median(load_timings) * 1000:7.1f} ms   "
+                      f"save peak {peak / 1024 / 1024:6.2f} MB")
+                path.unlink()
+
+
+def main():
+    """Parse arguments and run the selected benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='suite', required=True)
+
+    http_parser = subparsers.add_parser('http', help='pooled vs unpooled HTTP requests')
+    http_parser.add_argument('--requests', type=int, default=200, help='requests per variant')
+    http_parser.add_argument('--handshake-ms', type=float, default=20.0,
+                             help='simulated TCP+TLS handshake cost per new connection')
+    http_parser.set_defaults(func=bench_http)
+
+    lazy_parser = subparsers.add_parser('lazy', help='full vs depth-limited frame listing')
+    lazy_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    lazy_parser.add_argument('--depths', type=int, nargs='+', default=[2, 3, 4], help='max_depth values')
+    lazy_parser.set_defaults(func=bench_lazy)
+
+    stream_parser = subparsers.add_parser('stream', help='in-memory vs streaming frame extraction')
+    stream_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    stream_parser.add_argument('--scales', type=int, nargs='+', default=[1, 4, 16],
+                               help='number of copies of the document pages')
+    stream_parser.set_defaults(func=bench_stream)
+
+    deep_parser = subparsers.add_parser('deep', help='tree walkers on a very deep document')
+    deep_parser.add_argument('--depth', type=int, default=10000, help='nesting depth of the document')
+    deep_parser.add_argument('--runs', type=int, default=5, help='runs per walker')
+    deep_parser.set_defaults(func=bench_deep)
+
+    names_parser = subparsers.add_parser('names', help='indexed vs linear frame name search')
+    names_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    names_parser.add_argument('--queries', type=int, default=500, help='number of queries')
+    names_parser.set_defaults(func=bench_names)
+
+    spatial_parser = subparsers.add_parser('spatial', help='indexed vs linear region and point queries')
+    spatial_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    spatial_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 50],
+                                help='number of copies of the document boxes')
+    spatial_parser.add_argument('--queries', type=int, default=200, help='queries per kind')
+    spatial_parser.set_defaults(func=bench_spatial)
+
+    siblings_parser = subparsers.add_parser('siblings', help='pairwise vs sort-based sibling layout')
+    siblings_parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000, 5000, 10000, 50000],
+                                 help='child counts to sweep')
+    siblings_parser.add_argument('--max-pairwise', type=int, default=5000,
+                                 help='largest count the O(n²) baseline is run for')
+    siblings_parser.set_defaults(func=bench_siblings)
+
+    distances_parser = subparsers.add_parser('distances', help='Python vs NumPy pairwise distances')
+    distances_parser.add_argument('--counts', type=int, nargs='+', default=[8, 32, 128, 512, 2000],
+                                  help='child counts to sweep')
+    distances_parser.set_defaults(func=bench_distances)
+
+    parallel_parser = subparsers.add_parser('parallel', help='distance calculation across worker counts')
+    parallel_parser.add_argument('--parents', type=int, default=2000, help='number of parent nodes')
+    parallel_parser.add_argument('--max-children', type=int, default=60, help='largest child count per parent')
+    parallel_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='pool sizes')
+    parallel_parser.add_argument('--backend', default='python', help="'python', 'numpy' or 'auto'")
+    parallel_parser.set_defaults(func=bench_parallel)
+
+    reporting_parser = subparsers.add_parser('reporting', help='distance calculation with and without output')
+    reporting_parser.add_argument('--parents', type=int, default=500, help='number of parent nodes')
+    reporting_parser.add_argument('--max-children', type=int, default=60, help='largest child count per parent')
+    reporting_parser.add_argument('--runs', type=int, default=3, help='runs per reporter')
+    reporting_parser.add_argument('--output', default=os.devnull,
+                                  help='where console and JSON output is written (a file or terminal device)')
+    reporting_parser.set_defaults(func=bench_reporting)
+
+    geometry_parser = subparsers.add_parser('geometry', help='box dicts vs columnar geometry store')
+    geometry_parser.add_argument('--parents', type=int, default=2500, help='number of parent nodes')
+    geometry_parser.add_argument('--max-children', type=int, default=80, help='largest child count per parent')
+    geometry_parser.add_argument('--runs', type=int, default=3, help='runs per loop')
+    geometry_parser.set_defaults(func=bench_geometry)
+
+    json_parser = subparsers.add_parser('json', help='FileHandler JSON backends, pretty vs compact')
+    json_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    json_parser.add_argument('--runs', type=int, default=5, help='runs per variant (median is shown)')
+    json_parser.set_defaults(func=bench_json)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='JSON vs binary snapshot reload')
+    snapshot_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    snapshot_parser.add_argument('--scales', type=int, nargs='+', default=[1, 8],
+                                 help='number of copies of the document pages')
+    snapshot_parser.set_defaults(func=bench_snapshot)
+
+    incremental_parser = subparsers.add_parser('incremental', help='full vs incremental re-processing')
+    incremental_parser.add_argument('--parents', type=int, default=400, help='parent nodes on the board')
+    incremental_parser.add_argument('--max-children', type=int, default=60, help='maximum children per parent')
+    incremental_parser.add_argument('--runs', type=int, default=10, help='edits (runs per variant)')
+    incremental_parser.set_defaults(func=bench_incremental)
+
+    memo_parser = subparsers.add_parser('memo', help='filter_node with and without the instance layout memo')
+    memo_parser.add_argument('--screens', type=int, default=30, help='generated screens')
+    memo_parser.add_argument('--rows', type=int, default=10, help='INSTANCE rows per screen')
+    memo_parser.add_argument('--cells', type=int, default=4, help='cells per row')
+    memo_parser.add_argument('--document', default=str(DEFAULT_DOCUMENT), help='file response to run as well')
+    memo_parser.add_argument('--runs', type=int, default=20, help='runs per variant')
+    memo_parser.set_defaults(func=bench_memo)
+
+    dedupe_parser = subparsers.add_parser('dedupe', help='inlined vs deduplicated instance output')
+    dedupe_parser.add_argument('--screens', type=int, default=30, help='generated screens')
+    dedupe_parser.add_argument('--rows', type=int, default=10, help='INSTANCE rows per screen')
+    dedupe_parser.add_argument('--cells', type=int, default=4, help='cells per row')
+    dedupe_parser.add_argument('--document', default=str(DEFAULT_DOCUMENT), help='file response to run as well')
+    dedupe_parser.add_argument('--backend', default='auto', choices=['auto', 'stdlib', 'orjson'], help='JSON backend')
+    dedupe_parser.add_argument('--runs', type=int, default=10, help='saves and loads per variant')
+    dedupe_parser.set_defaults(func=bench_dedupe)
+
+    writer_parser = subparsers.add_parser('writer', help='inline vs background file saves')
+    writer_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    writer_parser.add_argument('--files', type=int, default=5, help='files extracted per run')
+    writer_parser.add_argument('--fetch-ms', type=float, default=100, help='simulated fetch time per file')
+    writer_parser.add_argument('--backend', default='stdlib', help="'stdlib', 'orjson' or 'auto'")
+    writer_parser.add_argument('--runs', type=int, default=3, help='runs per variant (median is shown)')
+    writer_parser.set_defaults(func=bench_writer)
+
+    compression_parser = subparsers.add_parser('compression', help='plain vs gzip vs zstd output files')
+    compression_parser.add_argument('--input', default=str(DEFAULT_DOCUMENT), help='file response JSON')
+    compression_parser.add_argument('--backend', default='stdlib', help="'stdlib', 'orjson' or 'auto'")
+    compression_parser.add_argument('--runs', type=int, default=5, help='runs per variant (median is shown)')
+    compression_parser.set_defaults(func=bench_compression)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ from pathlib import Path
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from figma_extractor import FigmaExtractor
+from figma_extractor import FigmaExtractor, ResponseCache, ConsoleReporter
 
 
 def main():
@@ -16,25 +16,40 @@ def main():
     print("🚀 Starting Figma data extraction...")
     
     try:
-        # Initialize extractor
-        extractor = FigmaExtractor()
+        # Initialize extractor (closes pooled HTTP connections on exit)
+        # Unchanged files are served from the on-disk response cache, and
+        # outputs are saved on a writer thread while extraction continues
+        with FigmaExtractor(cache=ResponseCache(), reporter=ConsoleReporter(),
+                            background_writes=True) as extractor:
+            # Extract tokens
+            print("\n📋 Extracting design tokens...")
+            tokens = extractor.extract_tokens()
         
-        # Extract tokens
-        print("\n📋 Extracting design tokens...")
-        tokens = extractor.extract_tokens()
+            # Extract frames
+            print("\n🖼️ Extracting frames...")
+            frames = extractor.extract_frames()
         
-        # Extract frames
-        print("\n🖼️ Extracting frames...")
-        frames = extractor.extract_frames()
+            # Extract components (example with specific node)
+            print("\n🧩 Extracting components...")
+            components = extractor.extract_components("2-96")
         
-        # Extract components (example with specific node)
-        print("\n🧩 Extracting components...")
-        components = extractor.extract_components("2-96")
-        
-        # Calculate distances
-        print("\n📏 Calculating distances...")
-        if tokens:
-            distances = extractor.calculate_distances(tokens)
+            # Calculate distances
+            print("\n📏 Calculating distances...")
+            if tokens:
+                distances = extractor.calculate_distances(tokens)
+            
+            # Report document fetches and memory for this run
+            report = extractor.report()
+            print(f"\n📊 Documents fetched: {report['fetch_count']} "
+                  f"(reused {report['reuse_count']}x), "
+                  f"{report['bytes_fetched'] / 1024:.1f} KB downloaded, "
+                  f"peak memory: {report['peak_memory_mb']} MB")
+            if 'cache' in report:
+                print(f"🗄️ Cache: {report['cache']['hits']} hit(s), "
+                      f"{report['cache']['misses']} miss(es)")
+            print(f"🚦 Requests: {report['scheduler']['requests']} sent, "
+                  f"{report['scheduler']['throttled']} throttled, "
+                  f"{report['scheduler']['retried']} retried")
         
         print("\n✅ Extraction completed successfully!")
         
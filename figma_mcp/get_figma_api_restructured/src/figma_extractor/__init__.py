@@ -1,11 +1,35 @@
 """Figma API Extractor package."""
 
+import asyncio
+import sys
+from pathlib import Path
+
 from .core.api_client import FigmaAPIClient
+from .core.async_api_client import AsyncFigmaAPIClient
+from .core.document_index import DocumentIndex
+from .core.document_session import DocumentSession
+from .core.geometry_store import GeometryStore
+from .core.lazy_document import LazyDocument
+from .core.rate_limiter import RequestScheduler
+from .core.response_cache import ResponseCache
+from .core.spatial_index import SpatialIndex
 from .extractors.token_extractor import TokenExtractor
 from .extractors.frame_extractor import FrameExtractor
 from .extractors.component_extractor import ComponentExtractor
 from .processors.distance_calculator import DistanceCalculator
 from .processors.data_cleaner import DataCleaner
+from .processors.filter_memo import FilterMemo
+from .processors.incremental import IncrementalProcessor
+from .processors.traversal import TreeTraversal
+from .utils.background_writer import BackgroundWriter
+from .utils.file_handler import FileHandler
+from .utils.reporting import Reporter, NullReporter, ConsoleReporter, JsonLinesReporter
+from .utils.snapshot import Snapshot
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
+
+from settings import BACKGROUND_WRITES, INCREMENTAL_STATE_FILE
 
 __version__ = "1.0.0"
 __author__ = "Your Name"
@@ -13,46 +37,216 @@ __author__ = "Your Name"
 class FigmaExtractor:
     """Main class for Figma data extraction."""
     
-    def __init__(self, token=None, file_key=None):
+    def __init__(self, token=None, file_key=None, cache=None, reporter=None, background_writes=BACKGROUND_WRITES):
         """Initialize the Figma extractor.
         
         Args:
             token (str): Figma API token
             file_key (str): Figma file key
+            cache (ResponseCache, optional): On-disk response cache
+            reporter (Reporter, optional): Receives progress events from every
+                extractor and processor. Silent by default; scripts pass a
+                ConsoleReporter.
+            background_writes (bool): Save raw and cleaned outputs on a writer
+                thread while extraction continues. close() waits for the saves
+                and raises the first error among them. Saved data is written
+                as it is when dequeued, so it must not be modified meanwhile.
         """
-        self.api_client = FigmaAPIClient(token, file_key)
-        self.token_extractor = TokenExtractor(self.api_client)
-        self.frame_extractor = FrameExtractor(self.api_client)
-        self.component_extractor = ComponentExtractor(self.api_client)
-        self.distance_calculator = DistanceCalculator()
+        self.reporter = reporter or NullReporter()
+        self.api_client = FigmaAPIClient(token, file_key, cache=cache)
+        # One session per run: the file is downloaded and decoded once and
+        # the same tree is handed to every extractor and processor
+        self.file_handler = FileHandler(reporter=self.reporter, background=background_writes)
+        self.session = DocumentSession(self.api_client, self.file_handler)
+        self.token_extractor = TokenExtractor(self.api_client, self.session, reporter=self.reporter,
+                                              file_handler=self.file_handler)
+        self.frame_extractor = FrameExtractor(self.api_client, self.session, reporter=self.reporter,
+                                              file_handler=self.file_handler)
+        self.component_extractor = ComponentExtractor(self.api_client, reporter=self.reporter,
+                                                      file_handler=self.file_handler)
+        self.distance_calculator = DistanceCalculator(reporter=self.reporter)
         self.data_cleaner = DataCleaner()
+        self.traversal = None
+        self.incremental = IncrementalProcessor(self.data_cleaner, self.distance_calculator,
+                                                file_handler=self.file_handler,
+                                                state_filename=INCREMENTAL_STATE_FILE, reporter=self.reporter)
     
     def extract_tokens(self):
         """Extract design tokens from Figma file."""
         return self.token_extractor.extract()
     
-    def extract_frames(self):
-        """Extract frames from Figma file."""
+    def extract_frames(self, lazy=False, max_depth=None, stream=False):
+        """Extract frames from Figma file.
+        
+        Args:
+            lazy (bool): Fetch a depth-limited skeleton and expand it on demand
+                instead of downloading the full document
+            max_depth (int, optional): Deepest tree level to search in lazy mode
+            stream (bool): Parse the downloaded document as a stream instead of
+                loading it, keeping memory flat for very large files
+        """
+        if stream:
+            return self.frame_extractor.extract_stream()
+        if lazy:
+            return self.frame_extractor.extract_lazy(max_depth=max_depth)
         return self.frame_extractor.extract()
     
     def extract_components(self, node_id=None):
-        """Extract components from Figma file."""
+        """Extract components from Figma file.
+        
+        Args:
+            node_id (str|list, optional): Node ID, or a list of node IDs fetched in batches
+        """
         return self.component_extractor.extract(node_id)
     
-    def calculate_distances(self, data):
-        """Calculate distances between elements."""
+    def fetch_files(self, file_keys, max_concurrency=None):
+        """Fetch several files concurrently.
+        
+        Args:
+            file_keys (iterable): File keys to fetch
+            max_concurrency (int, optional): Maximum in-flight requests
+            
+        Returns:
+            dict: File data keyed by file key
+        """
+        return asyncio.run(self._fan_out(lambda client: client.get_files(file_keys), max_concurrency))
+    
+    def fetch_nodes(self, node_id_groups, file_key=None, max_concurrency=None):
+        """Fetch several node subsets of one file concurrently.
+        
+        Args:
+            node_id_groups (iterable): Comma-separated node ID strings, one per request
+            file_key (str, optional): Figma file key
+            max_concurrency (int, optional): Maximum in-flight requests
+            
+        Returns:
+            list: Node data responses in input order
+        """
+        return asyncio.run(self._fan_out(
+            lambda client: client.get_many_file_nodes(node_id_groups, file_key), max_concurrency
+        ))
+    
+    async def _fan_out(self, request, max_concurrency=None):
+        """Run a batch of requests on an async client sharing this extractor's connections."""
+        options = {'max_concurrency': max_concurrency} if max_concurrency else {}
+        async with AsyncFigmaAPIClient(client=self.api_client, **options) as client:
+            return await request(client)
+    
+    def get_document(self, file_key=None):
+        """Get the shared file document, fetching it on first use."""
+        return self.session.get_file(file_key)
+    
+    def get_index(self, file_key=None):
+        """Get the node index of the shared document, building it on first use."""
+        return self.session.get_index(file_key)
+    
+    def calculate_distances(self, data=None):
+        """Calculate distances between elements.
+        
+        Without data, the shared document is used and boxes are read from
+        its index's geometry store.
+        """
+        if data is None:
+            return self.distance_calculator.calculate(self.get_document(), geometry=self.get_index().geometry)
         return self.distance_calculator.calculate(data)
     
-    def clean_data(self, data):
+    def clean_data(self, data=None):
         """Clean and filter Figma data."""
+        if data is None:
+            data = self.get_document()
         return self.data_cleaner.clean(data)
+    
+    def process_document(self, file_key=None):
+        """Produce frames, tokens, cleaned data and bounds from one document walk.
+        
+        Every processor registers as a stage of a single traversal, so the
+        tree is visited once instead of once per processor. Each output is
+        identical to running the processor on its own over the document root.
+        
+        Args:
+            file_key (str, optional): Figma file key
+            
+        Returns:
+            dict: 'frames', 'tokens', 'clean', 'remove_empty', 'normalize_colors'
+                and 'bounds' outputs
+        """
+        document = self.get_document(file_key)['document']
+        self.traversal = TreeTraversal([
+            self.frame_extractor.traversal_stage(),
+            self.token_extractor.traversal_stage(),
+            *self.data_cleaner.traversal_stages(),
+            self.distance_calculator.traversal_stage()
+        ])
+        return self.traversal.run(document)
+    
+    def process_incremental(self, file_key=None):
+        """Clean the document and calculate sibling distances, reusing the last run's outputs.
+        
+        Only subtrees whose content changed since the previous run (kept in
+        INCREMENTAL_STATE_FILE across runs) are filtered again, and only
+        parents whose children changed get new distances.
+        extractor.report()['incremental'] shows how much was reused.
+        
+        Args:
+            file_key (str, optional): Figma file key
+            
+        Returns:
+            dict: 'clean' (DataCleaner.filter_node output) and 'distances'
+                (DistanceCalculator.calculate output) for the document
+        """
+        return self.incremental.process(self.get_document(file_key)['document'])
+    
+    def report(self):
+        """Report document fetch counts, memory usage, stage timings and cache hit rates for this run."""
+        report = self.session.report()
+        if self.incremental.stats:
+            report['incremental'] = self.incremental.stats
+        if self.component_extractor.filter_memo.stats['lookups']:
+            report['filter_memo'] = self.component_extractor.filter_memo.stats
+        if self.traversal is not None:
+            report['traversal'] = self.traversal.report()
+        return report
+    
+    def close(self):
+        """Finish queued file saves and release pooled HTTP connections.
+        
+        Raises:
+            Exception: The first error of a failed background save
+        """
+        try:
+            self.file_handler.close()
+        finally:
+            self.api_client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 __all__ = [
     'FigmaExtractor',
     'FigmaAPIClient',
+    'AsyncFigmaAPIClient',
+    'BackgroundWriter',
+    'DocumentIndex',
+    'DocumentSession',
+    'GeometryStore',
+    'LazyDocument',
+    'ResponseCache',
+    'Snapshot',
+    'SpatialIndex',
+    'RequestScheduler',
     'TokenExtractor',
     'FrameExtractor', 
     'ComponentExtractor',
     'DistanceCalculator',
-    'DataCleaner'
+    'DataCleaner',
+    'FilterMemo',
+    'IncrementalProcessor',
+    'TreeTraversal',
+    'Reporter',
+    'NullReporter',
+    'ConsoleReporter',
+    'JsonLinesReporter'
 ]
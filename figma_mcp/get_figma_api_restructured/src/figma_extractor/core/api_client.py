@@ -1,43 +1,119 @@
 """Figma API client for making requests to Figma API."""
 
+import threading
 import requests
-import time
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterable, Iterator, List, Union
+from urllib.parse import quote
 import sys
 from pathlib import Path
+from .rate_limiter import RequestScheduler, get_default_scheduler
+from .response_cache import ResponseCache
 
 # Add config to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
 
 from settings import (
     FIGMA_TOKEN, FIGMA_FILE_KEY, FIGMA_API_BASE_URL,
-    REQUEST_TIMEOUT, MAX_RETRIES
+    REQUEST_TIMEOUT, POOL_CONNECTIONS, POOL_MAXSIZE,
+    NODE_IDS_MAX_URL_LENGTH, NODE_BATCH_WORKERS
 )
 
 
 class FigmaAPIClient:
     """Client for interacting with Figma API."""
     
-    def __init__(self, token: Optional[str] = None, file_key: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, file_key: Optional[str] = None,
+                 base_url: Optional[str] = None, session: Optional[requests.Session] = None,
+                 pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                 cache: Optional[ResponseCache] = None, timeout: float = REQUEST_TIMEOUT,
+                 scheduler: Optional[RequestScheduler] = None):
         """Initialize the Figma API client.
         
         Args:
             token (str, optional): Figma API token. Defaults to config value.
             file_key (str, optional): Figma file key. Defaults to config value.
+            base_url (str, optional): API base URL. Defaults to config value.
+            session (requests.Session, optional): Session to reuse. When omitted the
+                client creates and owns a pooled keep-alive session.
+            pool_connections (int): Number of host connection pools to cache
+            pool_maxsize (int): Maximum number of keep-alive connections per host
+            cache (ResponseCache, optional): Version-aware response cache for
+                get_file and get_file_nodes
+            timeout (float): Per-request timeout in seconds
+            scheduler (RequestScheduler, optional): Rate limiter and retry policy.
+                Defaults to the scheduler shared by all clients in the process.
         """
         self.token = token or FIGMA_TOKEN
         self.file_key = file_key or FIGMA_FILE_KEY
-        self.base_url = FIGMA_API_BASE_URL
+        self.base_url = base_url or FIGMA_API_BASE_URL
+        self.cache = cache
+        self.timeout = timeout
+        self.scheduler = scheduler or get_default_scheduler()
         
         if not self.token:
             raise ValueError("Figma API token is required")
         
         self.headers = {
-            'X-Figma-Token': self.token
+            'X-Figma-Token': self.token,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
         }
+        
+        # Transfer counters, read by DocumentSession reports; updated from worker threads
+        self.request_count = 0
+        self.bytes_received = 0
+        self._counter_lock = threading.Lock()
+        
+        self._owns_session = session is None
+        self.session = session or self._create_session(pool_connections, pool_maxsize)
+        self.session.headers.update(self.headers)
+    
+    def _create_session(self, pool_connections: int, pool_maxsize: int) -> requests.Session:
+        """Create a pooled HTTP session that keeps connections alive between requests.
+        
+        Args:
+            pool_connections (int): Number of host connection pools to cache
+            pool_maxsize (int): Maximum number of keep-alive connections per host
+            
+        Returns:
+            requests.Session: Configured session
+        """
+        session = requests.Session()
+        # Retries are handled in _make_request, so the adapter must not retry on its own
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def close(self) -> None:
+        """Close the underlying HTTP session and release pooled connections.
+        
+        Sessions passed in by the caller are left open.
+        """
+        if self._owns_session:
+            self.session.close()
+    
+    def __enter__(self) -> 'FigmaAPIClient':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _count_transfer(self, request_count: int = 0, byte_count: int = 0) -> None:
+        """Add to the transfer counters; safe to call from several threads."""
+        with self._counter_lock:
+            self.request_count += request_count
+            self.bytes_received += byte_count
     
     def _make_request(self, url: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make a request to Figma API with retry logic.
+        """Make a request to Figma API through the rate-limiting scheduler.
         
         Args:
             url (str): API endpoint URL
@@ -47,29 +123,25 @@ class FigmaAPIClient:
             dict: API response data
             
         Raises:
+            requests.HTTPError: On a non-retryable status code
             requests.RequestException: If request fails after retries
         """
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = requests.get(
-                    url, 
-                    headers=self.headers, 
-                    params=params,
-                    timeout=REQUEST_TIMEOUT
-                )
-                response.raise_for_status()
-                return response.json()
-            
-            except requests.RequestException as e:
-                if attempt == MAX_RETRIES - 1:
-                    raise e
-                time.sleep(2 ** attempt)  # Exponential backoff
+        response = self.scheduler.execute(
+            lambda: self.session.get(url, params=params, timeout=self.timeout)
+        )
+        self._count_transfer(request_count=1, byte_count=len(response.content))
+        return response.json()
     
-    def get_file(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+    def get_file(self, file_key: Optional[str] = None, depth: Optional[int] = None,
+                 ids: Optional[Union[str, List[str]]] = None, geometry: Optional[str] = None) -> Dict[str, Any]:
         """Get Figma file data.
         
         Args:
             file_key (str, optional): File key. Defaults to instance file_key.
+            depth (int, optional): How many levels of the node tree to return.
+                Defaults to the whole tree.
+            ids (str|list, optional): Only return these nodes and their ancestors
+            geometry (str, optional): Pass 'paths' to include vector geometry
             
         Returns:
             dict: File data
@@ -78,15 +150,64 @@ class FigmaAPIClient:
         if not key:
             raise ValueError("File key is required")
         
+        if ids is not None and not isinstance(ids, str):
+            ids = ','.join(ids)
+        
         url = f"{self.base_url}/files/{key}"
-        return self._make_request(url)
+        params = {'depth': depth, 'ids': ids, 'geometry': geometry}
+        params = {k: v for k, v in params.items() if v is not None} or None
+        return self._cached_request(key, 'file', url, params, ids.split(',') if ids else None)
     
-    def get_file_nodes(self, node_ids: str, file_key: Optional[str] = None) -> Dict[str, Any]:
+    @contextmanager
+    def stream_file(self, file_key: Optional[str] = None, node_ids: Optional[Union[str, List[str]]] = None,
+                    depth: Optional[int] = None) -> Iterator[Any]:
+        """Open a file or /nodes response as a decoded byte stream.
+        
+        The body is not read into memory; pass the stream to the parsers in
+        utils.json_stream. The response cache is bypassed.
+        
+        Args:
+            file_key (str, optional): File key. Defaults to instance file_key.
+            node_ids (str|list, optional): Stream a /nodes response for these nodes
+                instead of the whole file
+            depth (int, optional): How many levels of the node tree to return
+            
+        Yields:
+            file-like: Response body stream with gzip/deflate already decoded
+        """
+        key = file_key or self.file_key
+        if not key:
+            raise ValueError("File key is required")
+        
+        url = f"{self.base_url}/files/{key}"
+        params = {'depth': depth}
+        if node_ids is not None:
+            url += '/nodes'
+            params['ids'] = node_ids if isinstance(node_ids, str) else ','.join(node_ids)
+        params = {k: v for k, v in params.items() if v is not None} or None
+        
+        response = self.scheduler.execute(
+            lambda: self.session.get(url, params=params, timeout=self.timeout, stream=True)
+        )
+        self._count_transfer(request_count=1)
+        response.raw.decode_content = True
+        try:
+            yield response.raw
+        finally:
+            # Bytes read off the wire, before decompression
+            self._count_transfer(byte_count=response.raw.tell())
+            response.close()
+    
+    def get_file_nodes(self, node_ids: Union[str, List[str]], file_key: Optional[str] = None,
+                       depth: Optional[int] = None, geometry: Optional[str] = None) -> Dict[str, Any]:
         """Get specific nodes from Figma file.
         
         Args:
-            node_ids (str): Comma-separated node IDs
+            node_ids (str|list): Comma-separated node IDs or a list of node IDs
             file_key (str, optional): File key. Defaults to instance file_key.
+            depth (int, optional): How many levels below each node to return.
+                Defaults to the whole subtree.
+            geometry (str, optional): Pass 'paths' to include vector geometry
             
         Returns:
             dict: Node data
@@ -95,9 +216,132 @@ class FigmaAPIClient:
         if not key:
             raise ValueError("File key is required")
         
+        if not isinstance(node_ids, str):
+            node_ids = ','.join(node_ids)
+        
         url = f"{self.base_url}/files/{key}/nodes"
-        params = {'ids': node_ids}
-        return self._make_request(url, params)
+        params = {'ids': node_ids, 'depth': depth, 'geometry': geometry}
+        params = {k: v for k, v in params.items() if v is not None}
+        return self._cached_request(key, 'nodes', url, params, node_ids.split(','))
+    
+    def get_file_nodes_batched(self, node_ids: Iterable[str], file_key: Optional[str] = None,
+                               max_url_length: int = NODE_IDS_MAX_URL_LENGTH,
+                               max_workers: int = NODE_BATCH_WORKERS,
+                               depth: Optional[int] = None) -> Dict[str, Any]:
+        """Get many nodes using as few URL-length-safe requests as possible.
+        
+        Node IDs are split into batches whose request URL stays under
+        max_url_length, the batches are fetched in parallel and their
+        'nodes' maps are merged into one response.
+        
+        Args:
+            node_ids (iterable): Node IDs to fetch
+            file_key (str, optional): File key. Defaults to instance file_key.
+            max_url_length (int): Maximum length of a single request URL
+            max_workers (int): Maximum number of batches fetched in parallel
+            depth (int, optional): How many levels below each node to return
+            
+        Returns:
+            dict: Node data with the merged 'nodes' map of every batch
+        """
+        key = file_key or self.file_key
+        if not key:
+            raise ValueError("File key is required")
+        
+        url = f"{self.base_url}/files/{key}/nodes?ids="
+        batches = self._batch_node_ids(node_ids, max_url_length - len(url))
+        if not batches:
+            return {'nodes': {}}
+        
+        if len(batches) == 1:
+            responses = [self.get_file_nodes(batches[0], key, depth)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                responses = list(executor.map(lambda batch: self.get_file_nodes(batch, key, depth), batches))
+        
+        # File metadata is identical across batches; only the nodes maps differ
+        merged = {k: v for k, v in responses[0].items() if k != 'nodes'}
+        merged['nodes'] = {}
+        for response in responses:
+            merged['nodes'].update(response.get('nodes', {}))
+        return merged
+    
+    @staticmethod
+    def _batch_node_ids(node_ids: Iterable[str], max_ids_length: int) -> List[List[str]]:
+        """Split node IDs into batches whose encoded 'ids' value fits a length budget.
+        
+        Args:
+            node_ids (iterable): Node IDs; duplicates are dropped, order is kept
+            max_ids_length (int): Maximum length of the URL-encoded 'ids' value
+            
+        Returns:
+            list: Batches of node IDs
+        """
+        batches = []
+        current = []
+        current_length = 0
+        comma_length = len(quote(',', safe=''))
+        
+        for node_id in dict.fromkeys(node_ids):
+            id_length = len(quote(node_id, safe=''))
+            if current and current_length + comma_length + id_length > max_ids_length:
+                batches.append(current)
+                current = []
+                current_length = 0
+            current_length += id_length + (comma_length if current else 0)
+            current.append(node_id)
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def get_file_version(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get the current version of a Figma file with a cheap shallow request.
+        
+        Args:
+            file_key (str, optional): File key. Defaults to instance file_key.
+            
+        Returns:
+            dict: 'version' and 'lastModified' of the file
+        """
+        key = file_key or self.file_key
+        if not key:
+            raise ValueError("File key is required")
+        
+        # depth=1 returns only the document and page stubs, not the node tree
+        url = f"{self.base_url}/files/{key}"
+        data = self._make_request(url, {'depth': 1})
+        return {
+            'version': data.get('version'),
+            'lastModified': data.get('lastModified')
+        }
+    
+    def _cached_request(self, file_key: str, endpoint: str, url: str, params: Optional[Dict] = None,
+                        node_ids: Optional[list] = None) -> Dict[str, Any]:
+        """Serve a request from the response cache when the file is unchanged.
+        
+        Args:
+            file_key (str): File key the request belongs to
+            endpoint (str): Endpoint name used in the cache key
+            url (str): API endpoint URL
+            params (dict, optional): Query parameters
+            node_ids (list, optional): Requested node IDs
+            
+        Returns:
+            dict: API response data
+        """
+        if self.cache is None:
+            return self._make_request(url, params)
+        
+        version = self.get_file_version(file_key)
+        extra = {k: v for k, v in (params or {}).items() if k != 'ids'}
+        cache_key = self.cache.make_key(file_key, endpoint, node_ids, extra)
+        
+        data = self.cache.get(cache_key, version['version'], version['lastModified'])
+        if data is None:
+            data = self._make_request(url, params)
+            self.cache.put(cache_key, data, version['version'], version['lastModified'])
+        return data
     
     def get_file_components(self, file_key: Optional[str] = None) -> Dict[str, Any]:
         """Get components from Figma file.
@@ -0,0 +1,200 @@
+"""Asyncio client for making concurrent requests to Figma API."""
+
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterable
+import sys
+from pathlib import Path
+
+from .api_client import FigmaAPIClient
+from .rate_limiter import RequestScheduler
+from .response_cache import ResponseCache
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import ASYNC_MAX_CONCURRENCY, REQUEST_TIMEOUT
+
+
+class AsyncFigmaAPIClient:
+    """Asyncio sibling of FigmaAPIClient with bounded concurrency.
+
+    Requests run on a worker pool backed by one pooled ``FigmaAPIClient``, so
+    retries, caching and keep-alive connections are shared with the sync
+    client. A semaphore caps the number of in-flight requests and every
+    request is bounded by ``request_timeout``.
+
+    A blocking call cannot be cancelled: after a timeout it keeps its worker
+    and its concurrency slot until the sync client's socket timeout ends it,
+    and later requests wait for the slot before their own timeout starts.
+    """
+
+    def __init__(self, token: Optional[str] = None, file_key: Optional[str] = None,
+                 base_url: Optional[str] = None, cache: Optional[ResponseCache] = None,
+                 max_concurrency: int = ASYNC_MAX_CONCURRENCY, request_timeout: float = REQUEST_TIMEOUT,
+                 scheduler: Optional[RequestScheduler] = None, client: Optional[FigmaAPIClient] = None):
+        """Initialize the async Figma API client.
+
+        Args:
+            token (str, optional): Figma API token. Defaults to config value.
+            file_key (str, optional): Figma file key. Defaults to config value.
+            base_url (str, optional): API base URL. Defaults to config value.
+            cache (ResponseCache, optional): Version-aware response cache
+            max_concurrency (int): Maximum number of in-flight requests
+            request_timeout (float): Per-request timeout in seconds
+            scheduler (RequestScheduler, optional): Rate limiter and retry policy.
+                Defaults to the scheduler shared by all clients in the process.
+            client (FigmaAPIClient, optional): Sync client to share. When omitted the
+                async client creates and owns one sized for max_concurrency.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self._owns_client = client is None
+        self.client = client or FigmaAPIClient(
+            token, file_key,
+            base_url=base_url,
+            cache=cache,
+            pool_maxsize=max_concurrency,
+            timeout=request_timeout,
+            scheduler=scheduler
+        )
+        self.file_key = self.client.file_key
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='figma-async')
+        # asyncio primitives are bound to one event loop, so keep a semaphore per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    async def _run(self, func, *args) -> Dict[str, Any]:
+        """Run a blocking client call under the concurrency limit and timeout.
+
+        Args:
+            func (callable): Bound FigmaAPIClient method
+            *args: Arguments for the call
+
+        Returns:
+            dict: API response data
+
+        Raises:
+            asyncio.TimeoutError: If the request does not finish within request_timeout
+                of starting. The call itself is not cancelled and keeps its slot.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+
+        await semaphore.acquire()
+        started = loop.create_future()
+
+        def call():
+            self._call_soon(loop, self._set_started, started)
+            return func(*args)
+
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot is held until the call returns, not until the caller gives up,
+        # so timed-out calls cannot pile up in the executor queue
+        future.add_done_callback(lambda _: self._call_soon(loop, semaphore.release))
+
+        result = asyncio.wrap_future(future, loop=loop)
+        # Time spent waiting for a worker does not count against the timeout
+        await asyncio.wait((started, result), return_when=asyncio.FIRST_COMPLETED)
+        return await asyncio.wait_for(result, self.request_timeout)
+
+    @staticmethod
+    def _set_started(started: asyncio.Future) -> None:
+        if not started.done():
+            started.set_result(None)
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback, *args) -> None:
+        """Schedule a callback on the event loop from a worker thread."""
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop has closed; nothing is left waiting on it
+            pass
+
+    async def get_file(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get Figma file data.
+
+        Args:
+            file_key (str, optional): File key. Defaults to instance file_key.
+
+        Returns:
+            dict: File data
+        """
+        return await self._run(self.client.get_file, file_key)
+
+    async def get_file_nodes(self, node_ids: str, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get specific nodes from Figma file.
+
+        Args:
+            node_ids (str): Comma-separated node IDs
+            file_key (str, optional): File key. Defaults to instance file_key.
+
+        Returns:
+            dict: Node data
+        """
+        return await self._run(self.client.get_file_nodes, node_ids, file_key)
+
+    async def get_file_components(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get components from Figma file.
+
+        Args:
+            file_key (str, optional): File key. Defaults to instance file_key.
+
+        Returns:
+            dict: Components data
+        """
+        return await self._run(self.client.get_file_components, file_key)
+
+    async def get_files(self, file_keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch several files concurrently.
+
+        Args:
+            file_keys (iterable): File keys to fetch
+
+        Returns:
+            dict: File data keyed by file key, in input order
+        """
+        keys = list(file_keys)
+        results = await asyncio.gather(*(self.get_file(key) for key in keys))
+        return dict(zip(keys, results))
+
+    async def get_many_file_nodes(self, node_id_groups: Iterable[str],
+                                  file_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fetch several node subsets of one file concurrently.
+
+        Args:
+            node_id_groups (iterable): Comma-separated node ID strings, one per request
+            file_key (str, optional): File key. Defaults to instance file_key.
+
+        Returns:
+            list: Node data responses in input order
+        """
+        return list(await asyncio.gather(
+            *(self.get_file_nodes(node_ids, file_key) for node_ids in node_id_groups)
+        ))
+
+    def close(self) -> None:
+        """Shut down the worker pool and close the owned sync client.
+
+        Requests abandoned after a timeout are not waited for.
+        """
+        self._executor.shutdown(wait=False)
+        if self._owns_client:
+            self.client.close()
+
+    async def __aenter__(self) -> 'AsyncFigmaAPIClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
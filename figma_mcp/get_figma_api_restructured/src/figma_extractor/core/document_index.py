@@ -0,0 +1,188 @@
+"""In-memory index over the nodes of a loaded Figma document."""
+
+from typing import Dict, Any, List, Optional, Iterator
+from .geometry_store import GeometryStore
+from .name_index import NameIndex
+from .spatial_index import SpatialIndex
+
+
+class DocumentIndex:
+    """Maps node IDs to nodes, parents and types for constant-time lookups.
+
+    The index is built in one walk over every node tree in a file or
+    ``/nodes`` response. Each node also gets a pre-order interval, so
+    ancestor checks are a pair of integer comparisons instead of a walk up
+    the tree. Nodes are referenced, not copied.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        """Build the index.
+
+        Args:
+            data (dict): File or /nodes response data
+        """
+        self.nodes = {}
+        self.parents = {}
+        self.types = {}
+        self._depths = {}
+        # Pre-order number of each node and of its last descendant
+        self._enter = {}
+        self._exit = {}
+        self._name_index = None
+        self._spatial_index = None
+        self._geometry = None
+
+        roots = [content['document'] for content in data.get('nodes', {}).values()
+                 if content and content.get('document')]
+        if data.get('document'):
+            roots.append(data['document'])
+
+        counter = 0
+        for root in roots:
+            # Entries are (node, parent_id, depth); None marks the end of a subtree
+            stack = [(root, None, 0)]
+            open_ids = []
+            while stack:
+                entry = stack.pop()
+                if entry is None:
+                    self._exit[open_ids.pop()] = counter - 1
+                    continue
+
+                node, parent_id, depth = entry
+                node_id = node.get('id')
+                if node_id is None or node_id in self.nodes:
+                    # Subtrees repeated across /nodes entries are indexed once
+                    continue
+
+                self.nodes[node_id] = node
+                self.parents[node_id] = parent_id
+                self.types.setdefault(node.get('type'), []).append(node_id)
+                self._depths[node_id] = depth
+                self._enter[node_id] = counter
+                counter += 1
+
+                open_ids.append(node_id)
+                stack.append(None)
+                stack.extend((child, node_id, depth + 1) for child in reversed(node.get('children', [])))
+
+    @property
+    def name_index(self) -> NameIndex:
+        """Name search index over every node, built on first use."""
+        if self._name_index is None:
+            self._name_index = NameIndex(self.nodes.items())
+        return self._name_index
+
+    @property
+    def geometry(self) -> GeometryStore:
+        """Columnar bounding boxes of every node, built on first use."""
+        if self._geometry is None:
+            self._geometry = GeometryStore(self.nodes.items())
+        return self._geometry
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """Bounding-box index over every node, built on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex.from_geometry(self.geometry)
+        return self._spatial_index
+
+    @staticmethod
+    def _normalize(node_id: str) -> str:
+        """Accept URL-style IDs ('2-96') as well as API IDs ('2:96')."""
+        return node_id.replace('-', ':')
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node_id: object) -> bool:
+        return isinstance(node_id, str) and self._normalize(node_id) in self.nodes
+
+    def get(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get a node by ID.
+
+        Args:
+            node_id (str): Node ID
+
+        Returns:
+            dict: Node, or None if it is not in the document
+        """
+        return self.nodes.get(self._normalize(node_id))
+
+    def get_parent(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get the parent of a node.
+
+        Args:
+            node_id (str): Node ID
+
+        Returns:
+            dict: Parent node, or None for roots and unknown IDs
+        """
+        parent_id = self.parents.get(self._normalize(node_id))
+        return self.nodes.get(parent_id) if parent_id is not None else None
+
+    def get_depth(self, node_id: str) -> Optional[int]:
+        """Get the level of a node, counting its tree root as 0.
+
+        Args:
+            node_id (str): Node ID
+
+        Returns:
+            int: Depth, or None if the node is not in the document
+        """
+        return self._depths.get(self._normalize(node_id))
+
+    def iter_ancestors(self, node_id: str) -> Iterator[Dict[str, Any]]:
+        """Iterate the ancestors of a node from its parent up to the root.
+
+        Args:
+            node_id (str): Node ID
+
+        Yields:
+            dict: Ancestor nodes, nearest first
+        """
+        parent_id = self.parents.get(self._normalize(node_id))
+        while parent_id is not None:
+            yield self.nodes[parent_id]
+            parent_id = self.parents[parent_id]
+
+    def get_ancestors(self, node_id: str) -> List[Dict[str, Any]]:
+        """Get the ancestors of a node, nearest first."""
+        return list(self.iter_ancestors(node_id))
+
+    def is_ancestor(self, ancestor_id: str, node_id: str) -> bool:
+        """Check whether one node contains another, in constant time.
+
+        Args:
+            ancestor_id (str): Candidate ancestor ID
+            node_id (str): Descendant ID
+
+        Returns:
+            bool: True if ancestor_id is a proper ancestor of node_id
+        """
+        ancestor_id = self._normalize(ancestor_id)
+        node_id = self._normalize(node_id)
+        if ancestor_id not in self._enter or node_id not in self._enter:
+            return False
+        return self._enter[ancestor_id] < self._enter[node_id] <= self._exit[ancestor_id]
+
+    def get_ids_by_type(self, node_type: str) -> List[str]:
+        """Get the IDs of all nodes of a type, in document order.
+
+        Args:
+            node_type (str): Node type, e.g. 'FRAME'
+
+        Returns:
+            list: Node IDs
+        """
+        return list(self.types.get(node_type, []))
+
+    def get_nodes_by_type(self, node_type: str) -> List[Dict[str, Any]]:
+        """Get all nodes of a type, in document order.
+
+        Args:
+            node_type (str): Node type, e.g. 'FRAME'
+
+        Returns:
+            list: Nodes
+        """
+        return [self.nodes[node_id] for node_id in self.types.get(node_type, [])]
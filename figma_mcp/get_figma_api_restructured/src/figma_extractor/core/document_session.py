@@ -0,0 +1,136 @@
+"""Document session for sharing one fetched Figma file across extractors."""
+
+import sys
+import time
+from typing import Dict, Any, Optional
+from .api_client import FigmaAPIClient
+from .document_index import DocumentIndex
+from ..utils.file_handler import FileHandler
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class DocumentSession:
+    """Fetch and decode each Figma file once per run and share the in-memory tree.
+
+    Extractors and processors that receive the same session read the same
+    document object instead of downloading and parsing the file again.
+    """
+
+    def __init__(self, api_client: FigmaAPIClient, file_handler: Optional[FileHandler] = None,
+                 raw_filename: Optional[str] = 'figma_file.json'):
+        """Initialize the document session.
+
+        Args:
+            api_client (FigmaAPIClient): Figma API client instance
+            file_handler (FileHandler, optional): File handler used to save raw documents
+            raw_filename (str, optional): File name for the raw document. None disables saving.
+        """
+        self.api_client = api_client
+        self.file_handler = file_handler or FileHandler()
+        self.raw_filename = raw_filename
+
+        self._documents = {}
+        self._indexes = {}
+        self.fetch_count = 0
+        self.reuse_count = 0
+        self.fetch_seconds = 0.0
+        self.bytes_fetched = 0
+
+    def get_file(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get the decoded file document, fetching it only on first use.
+
+        Args:
+            file_key (str, optional): Figma file key. Defaults to the client's file key.
+
+        Returns:
+            dict: File data shared by every caller of this session
+        """
+        key = file_key or self.api_client.file_key
+
+        if key in self._documents:
+            self.reuse_count += 1
+            return self._documents[key]
+
+        bytes_before = self.api_client.bytes_received
+        start = time.perf_counter()
+        data = self.api_client.get_file(key)
+        self.fetch_seconds += time.perf_counter() - start
+        self.bytes_fetched += self.api_client.bytes_received - bytes_before
+        self.fetch_count += 1
+
+        # Save raw data once per file instead of once per extractor
+        if self.raw_filename:
+            self.file_handler.save_json(data, self.raw_filename)
+
+        self._documents[key] = data
+        return data
+
+    def get_index(self, file_key: Optional[str] = None) -> DocumentIndex:
+        """Get the node index of a file, building it once per loaded document.
+
+        Args:
+            file_key (str, optional): Figma file key. Defaults to the client's file key.
+
+        Returns:
+            DocumentIndex: Index shared by every caller of this session
+        """
+        key = file_key or self.api_client.file_key
+        data = self.get_file(key)
+
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = DocumentIndex(data)
+        return index
+
+    def invalidate(self, file_key: Optional[str] = None) -> None:
+        """Drop a cached document so the next access fetches it again.
+
+        Args:
+            file_key (str, optional): File key to drop. Drops all documents when omitted.
+        """
+        if file_key is None:
+            self._documents.clear()
+            self._indexes.clear()
+        else:
+            self._documents.pop(file_key, None)
+            self._indexes.pop(file_key, None)
+
+    def report(self) -> Dict[str, Any]:
+        """Report fetch counts and memory usage for this run.
+
+        Returns:
+            dict: Session statistics
+        """
+        report = {
+            'documents_loaded': len(self._documents),
+            'indexes_built': len(self._indexes),
+            'fetch_count': self.fetch_count,
+            'reuse_count': self.reuse_count,
+            'fetch_seconds': round(self.fetch_seconds, 3),
+            'bytes_fetched': self.bytes_fetched,
+            'peak_memory_mb': self._peak_memory_mb()
+        }
+        if self.api_client.cache is not None:
+            report['cache'] = self.api_client.cache.stats()
+        if self.api_client.scheduler is not None:
+            report['scheduler'] = self.api_client.scheduler.stats()
+        return report
+
+    def _peak_memory_mb(self) -> Optional[float]:
+        """Get the peak resident set size of the process in megabytes.
+
+        Returns:
+            float: Peak memory in MB, or None if the platform does not expose it
+        """
+        if resource is None:
+            return None
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+        if sys.platform == 'darwin':
+            return round(peak / (1024 * 1024), 1)
+        return round(peak / 1024, 1)
@@ -0,0 +1,205 @@
+"""Lazily expanded Figma documents backed by depth-limited API requests."""
+
+from typing import Dict, Any, List, Optional, Iterable
+from .api_client import FigmaAPIClient
+
+
+# Node types that can have children; other types are leaves and never expanded
+CONTAINER_TYPES = frozenset({
+    'DOCUMENT', 'CANVAS', 'FRAME', 'GROUP', 'SECTION', 'COMPONENT',
+    'COMPONENT_SET', 'INSTANCE', 'BOOLEAN_OPERATION'
+})
+
+
+class LazyNode(dict):
+    """Node dict whose ``children`` are fetched on first access.
+
+    Behaves like the plain node dicts returned by the API, so existing tree
+    walkers work unchanged. Reading ``children`` (via indexing, ``get``,
+    ``in`` or iteration) on a node whose subtree was cut off by the depth
+    limit fetches it through the owning LazyDocument.
+    """
+
+    __slots__ = ('_document', '_loaded')
+
+    def __init__(self, data: Dict[str, Any], document: 'LazyDocument', loaded: bool):
+        super().__init__(data)
+        self._document = document
+        self._loaded = loaded or self.get_raw('type') not in CONTAINER_TYPES
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether this node's children are known without another request."""
+        return self._loaded
+
+    def get_raw(self, key: str, default: Any = None) -> Any:
+        """Get a field without triggering expansion."""
+        return dict.get(self, key, default)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._document.expand([self])
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'children':
+            self._ensure_loaded()
+        return dict.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'children':
+            self._ensure_loaded()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key: object) -> bool:
+        if key == 'children':
+            self._ensure_loaded()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._ensure_loaded()
+        return dict.keys(self)
+
+    def values(self):
+        self._ensure_loaded()
+        return dict.values(self)
+
+    def items(self):
+        self._ensure_loaded()
+        return dict.items(self)
+
+    def __reduce__(self):
+        # Pickle and copy as a plain, fully loaded dict
+        return (dict, (dict(self.items()),))
+
+
+class LazyDocument:
+    """Figma file fetched as a shallow skeleton and expanded on demand.
+
+    The initial request uses the API's ``depth`` parameter, so only the top of
+    the tree is transferred. Subtrees are fetched with ``/nodes`` requests
+    when a caller descends into them, or ahead of time in batches with
+    ``load()``.
+    """
+
+    def __init__(self, api_client: FigmaAPIClient, file_key: Optional[str] = None,
+                 depth: int = 2, expand_depth: int = 1):
+        """Initialize the lazy document and fetch its skeleton.
+
+        Args:
+            api_client (FigmaAPIClient): Figma API client instance
+            file_key (str, optional): Figma file key. Defaults to the client's file key.
+            depth (int): Number of tree levels in the initial skeleton
+            expand_depth (int): Number of levels fetched per expansion request
+        """
+        if depth < 1 or expand_depth < 1:
+            raise ValueError("depth and expand_depth must be at least 1")
+
+        self.api_client = api_client
+        self.file_key = file_key or api_client.file_key
+        self.expand_depth = expand_depth
+        self.expand_requests = 0
+
+        data = api_client.get_file(self.file_key, depth=depth)
+        self.data = dict(data)
+        self.data['document'] = self._wrap(data['document'], depth)
+
+    @property
+    def document(self) -> LazyNode:
+        """Root DOCUMENT node."""
+        return self.data['document']
+
+    def _wrap(self, node: Dict[str, Any], depth: int) -> LazyNode:
+        """Wrap a fetched subtree in LazyNodes.
+
+        Args:
+            node (dict): Subtree root as returned by the API
+            depth (int): Number of child levels the request returned below the root
+
+        Returns:
+            LazyNode: Wrapped root
+        """
+        root = LazyNode(node, self, loaded=depth > 0)
+        stack = [(root, depth)]
+        while stack:
+            current, remaining = stack.pop()
+            children = dict.get(current, 'children')
+            if children is None:
+                continue
+            wrapped = [LazyNode(child, self, loaded=remaining > 1) for child in children]
+            dict.__setitem__(current, 'children', wrapped)
+            stack.extend((child, remaining - 1) for child in wrapped)
+        return root
+
+    def expand(self, nodes: Iterable[LazyNode]) -> None:
+        """Fetch the children of unloaded nodes with batched ``/nodes`` requests.
+
+        Args:
+            nodes (iterable): Nodes to expand; loaded nodes are skipped
+        """
+        pending = {node.get_raw('id'): node for node in nodes if not node.is_loaded}
+        if not pending:
+            return
+
+        data = self.api_client.get_file_nodes_batched(list(pending), self.file_key, depth=self.expand_depth)
+        self.expand_requests += 1
+
+        fetched_nodes = data.get('nodes', {})
+        for node_id, node in pending.items():
+            content = fetched_nodes.get(node_id)
+            fetched = self._wrap(content['document'], self.expand_depth) if content else None
+            children = dict.get(fetched, 'children') if fetched is not None else None
+            if children is not None:
+                dict.__setitem__(node, 'children', children)
+            node._loaded = True
+
+    def load(self, max_depth: Optional[int] = None) -> None:
+        """Expand the tree level by level, one batched request per level.
+
+        Args:
+            max_depth (int, optional): Deepest level whose children should be known,
+                counting the document as level 0. Defaults to the whole tree.
+        """
+        level = [self.document]
+        depth = 0
+        while level and (max_depth is None or depth <= max_depth):
+            self.expand(level)
+            level = [child for node in level for child in dict.get(node, 'children', [])]
+            depth += 1
+
+    def iter_nodes(self, max_depth: Optional[int] = None) -> Iterable[LazyNode]:
+        """Iterate nodes breadth-first, expanding each level in one batch.
+
+        Args:
+            max_depth (int, optional): Deepest level to yield, counting the document as 0
+
+        Yields:
+            LazyNode: Nodes in breadth-first order
+        """
+        level = [self.document]
+        depth = 0
+        while level and (max_depth is None or depth <= max_depth):
+            yield from level
+            if max_depth is not None and depth == max_depth:
+                break
+            self.expand(level)
+            level = [child for node in level for child in dict.get(node, 'children', [])]
+            depth += 1
+
+    def unloaded_nodes(self) -> List[LazyNode]:
+        """List the nodes whose children have not been fetched yet."""
+        unloaded = []
+        stack = [self.document]
+        while stack:
+            node = stack.pop()
+            if not node.is_loaded:
+                unloaded.append(node)
+            stack.extend(dict.get(node, 'children', []))
+        return unloaded
@@ -0,0 +1,126 @@
+"""Trigram and prefix index over node names."""
+
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+
+class NameIndex:
+    """Answers substring, prefix and exact name queries without scanning every node.
+
+    Every lowercased name is split into its 1-, 2- and 3-character grams.
+    A substring query intersects the posting lists of its grams, starting
+    with the rarest, and only the few surviving candidates are compared
+    with the query. Prefix queries use binary search over the sorted names.
+    Results are node IDs in document order.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self, nodes: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Build the index.
+
+        Args:
+            nodes (iterable): (node_id, node) pairs in document order
+        """
+        self.ids = []
+        self.names = []
+        self.types = []
+        self._lowered = []
+        self._grams = {}
+        self._exact = {}
+
+        for position, (node_id, node) in enumerate(nodes):
+            name = node.get('name') or ''
+            lowered = name.lower()
+            self.ids.append(node_id)
+            self.names.append(name)
+            self.types.append(node.get('type'))
+            self._lowered.append(lowered)
+            self._exact.setdefault(lowered, []).append(position)
+
+            grams = set()
+            for size in range(1, self.GRAM_SIZE + 1):
+                grams.update(lowered[i:i + size] for i in range(len(lowered) - size + 1))
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(position)
+
+        self._sorted = sorted((lowered, position) for position, lowered in enumerate(self._lowered))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _substring_candidates(self, query: str) -> List[int]:
+        """Positions whose name contains every gram of a lowercased query."""
+        if not query:
+            return list(range(len(self.ids)))
+        if len(query) <= self.GRAM_SIZE:
+            # Short queries are grams themselves, so the posting list is exact
+            return self._grams.get(query, [])
+
+        grams = {query[i:i + self.GRAM_SIZE] for i in range(len(query) - self.GRAM_SIZE + 1)}
+        postings = []
+        for gram in grams:
+            posting = self._grams.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        lowered = self._lowered
+        return sorted(position for position in candidates if query in lowered[position])
+
+    def _prefix_candidates(self, query: str) -> List[int]:
+        """Positions whose lowercased name starts with a lowercased query."""
+        positions = []
+        start = bisect_left(self._sorted, (query, -1))
+        for lowered, position in self._sorted[start:]:
+            if not lowered.startswith(query):
+                break
+            positions.append(position)
+        positions.sort()
+        return positions
+
+    def search(self, query: str, mode: str = 'substring', case_sensitive: bool = False,
+               node_type: Optional[str] = None) -> List[str]:
+        """Find nodes by name.
+
+        Args:
+            query (str): Text to look for
+            mode (str): 'substring', 'prefix' or 'exact'
+            case_sensitive (bool): Match case exactly instead of ignoring it
+            node_type (str, optional): Only return nodes of this type, e.g. 'FRAME'
+
+        Returns:
+            list: Matching node IDs in document order
+        """
+        lowered = query.lower()
+        if mode == 'substring':
+            positions = self._substring_candidates(lowered)
+        elif mode == 'prefix':
+            positions = self._prefix_candidates(lowered)
+        elif mode == 'exact':
+            positions = self._exact.get(lowered, [])
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        if case_sensitive:
+            # Case-insensitive matches are a superset; narrow them down
+            names = self.names
+            if mode == 'substring':
+                positions = [p for p in positions if query in names[p]]
+            elif mode == 'prefix':
+                positions = [p for p in positions if names[p].startswith(query)]
+            else:
+                positions = [p for p in positions if names[p] == query]
+
+        if node_type is not None:
+            types = self.types
+            positions = [p for p in positions if types[p] == node_type]
+
+        ids = self.ids
+        return [ids[p] for p in positions]
@@ -0,0 +1,233 @@
+"""Process-wide request scheduler with rate limiting and retry policy."""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Any, Optional
+import sys
+from pathlib import Path
+
+import requests
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import (
+    MAX_RETRIES, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST,
+    RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP, MAX_RETRY_TIME
+)
+
+
+class RequestScheduler:
+    """Token-bucket rate limiter and retry policy shared by API clients.
+
+    Every request first takes a token from the bucket, so all clients sharing
+    a scheduler stay under one request rate. Failed requests are classified
+    as retryable (network errors, 429 and 5xx) or fatal (other 4xx). Retries
+    honour ``Retry-After`` on throttled responses and otherwise use
+    exponential backoff with full jitter, so parallel jobs do not retry in
+    lockstep. A 429 also pauses the bucket for every client of the scheduler.
+    """
+
+    RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    # Transient network failures, including a connection dropped mid-body
+    RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout,
+                            requests.exceptions.ChunkedEncodingError)
+
+    def __init__(self, rate: float = RATE_LIMIT_PER_SECOND, burst: int = RATE_LIMIT_BURST,
+                 max_attempts: int = MAX_RETRIES, backoff_base: float = RETRY_BACKOFF_BASE,
+                 backoff_cap: float = RETRY_BACKOFF_CAP, max_retry_time: float = MAX_RETRY_TIME,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 jitter: Callable[[], float] = random.random):
+        """Initialize the request scheduler.
+
+        Args:
+            rate (float): Sustained requests per second
+            burst (int): Maximum number of requests sent back to back
+            max_attempts (int): Maximum attempts per request, including the first
+            backoff_base (float): Base delay in seconds for exponential backoff
+            backoff_cap (float): Maximum backoff delay in seconds
+            max_retry_time (float): Maximum total seconds spent waiting on retries per request
+            clock (callable): Monotonic clock, replaceable in tests
+            sleep (callable): Sleep function, replaceable in tests
+            jitter (callable): Random source returning floats in [0, 1)
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_time = max_retry_time
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+        self.request_count = 0
+        self.throttled_count = 0
+        self.retried_count = 0
+        self.failed_count = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self) -> float:
+        """Block until the bucket allows another request.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.request_count += 1
+                    self.wait_seconds += waited
+                    return waited
+
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+
+            self._sleep(delay)
+            waited += delay
+
+    def execute(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request under the rate limit, retrying retryable failures.
+
+        Args:
+            send (callable): Function that performs one HTTP request
+
+        Returns:
+            requests.Response: Successful response
+
+        Raises:
+            requests.HTTPError: On a fatal status, or a retryable one after retries are exhausted
+            requests.RequestException: On network errors after retries are exhausted
+        """
+        retry_time = 0.0
+        attempt = 1
+        while True:
+            self.acquire()
+            retry_after = None
+            try:
+                response = send()
+            except self.RETRYABLE_EXCEPTIONS as e:
+                error = e
+                response = None
+            else:
+                if response.status_code < 400:
+                    return response
+                error = requests.HTTPError(f"{response.status_code} Error for url: {response.url}",
+                                           response=response)
+                if response.status_code not in self.RETRYABLE_STATUS_CODES:
+                    self._count_failure()
+                    raise error
+                if response.status_code == 429:
+                    retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                    with self._lock:
+                        self.throttled_count += 1
+
+            delay = self._backoff(attempt, retry_after)
+            if attempt >= self.max_attempts or retry_time + delay > self.max_retry_time:
+                self._count_failure()
+                raise error
+
+            if retry_after is not None:
+                # Hold back every client of this scheduler, not just this request
+                with self._lock:
+                    self._paused_until = max(self._paused_until, self._clock() + delay)
+
+            if response is not None:
+                # Hand the connection back to the pool before waiting
+                response.close()
+            with self._lock:
+                self.retried_count += 1
+            self._sleep(delay)
+            retry_time += delay
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler counters.
+
+        Returns:
+            dict: Request, throttle, retry and failure counts with total wait time
+        """
+        with self._lock:
+            return {
+                'requests': self.request_count,
+                'throttled': self.throttled_count,
+                'retried': self.retried_count,
+                'failed': self.failed_count,
+                'wait_seconds': round(self.wait_seconds, 3)
+            }
+
+    def _count_failure(self) -> None:
+        with self._lock:
+            self.failed_count += 1
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Compute the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of the attempt that just failed, starting at 1
+            retry_after (float, optional): Server-requested delay in seconds
+
+        Returns:
+            float: Delay in seconds
+        """
+        if retry_after is not None:
+            # Small jitter on top so throttled clients do not resume together
+            return retry_after + self._jitter() * self.backoff_base
+        return self._jitter() * min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date.
+
+        Args:
+            value (str, optional): Header value
+
+        Returns:
+            float: Delay in seconds, or None if missing or malformed
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    """Get the scheduler shared by every client in this process.
+
+    Returns:
+        RequestScheduler: Process-wide scheduler
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
@@ -0,0 +1,201 @@
+"""Persistent, version-aware cache for Figma API responses."""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterable, Union
+import sys
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import CACHE_DIR, CACHE_MAX_BYTES
+
+
+class ResponseCache:
+    """On-disk LRU cache for file and node responses.
+
+    Entries are keyed by file key, endpoint, node IDs and query parameters, and
+    are tagged with the file's ``version`` and ``lastModified``. A lookup only
+    hits when the stored tags match the current ones, so edits to the Figma
+    file invalidate cached responses automatically. The total size of stored
+    responses is bounded by ``max_bytes``; least recently used entries are
+    evicted first.
+    """
+
+    INDEX_FILENAME = 'index.json'
+
+    def __init__(self, cache_dir: Union[str, Path] = None, max_bytes: int = CACHE_MAX_BYTES):
+        """Initialize the response cache.
+
+        Args:
+            cache_dir (str|Path, optional): Cache directory. Defaults to config value.
+            max_bytes (int): Maximum total size of cached responses in bytes
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = self._load_index()
+
+    @staticmethod
+    def make_key(file_key: str, endpoint: str, node_ids: Optional[Iterable[str]] = None,
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key for a request.
+
+        Args:
+            file_key (str): Figma file key
+            endpoint (str): Endpoint name, e.g. 'file' or 'nodes'
+            node_ids (iterable, optional): Requested node IDs; order does not matter
+            params (dict, optional): Extra query parameters that change the response
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        ids = sorted(node_id.replace('-', ':') for node_id in node_ids) if node_ids else []
+        extra = sorted((key, str(value)) for key, value in (params or {}).items() if value is not None)
+        raw = json.dumps([file_key, endpoint, ids, extra])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, version: Optional[str], last_modified: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Get a cached response if it matches the file's current version.
+
+        Args:
+            key (str): Cache key from make_key()
+            version (str): Current file version
+            last_modified (str): Current file lastModified timestamp
+
+        Returns:
+            dict: Cached response data, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry['version'] != version or entry['lastModified'] != last_modified:
+                self.misses += 1
+                self.stale += 1
+                self._remove(key)
+                self._save_index()
+                return None
+
+            try:
+                with open(self.cache_dir / entry['file'], 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # Entry file is missing or corrupt; treat as a miss
+                self.misses += 1
+                self._remove(key)
+                self._save_index()
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            self._save_index()
+            return data
+
+    def put(self, key: str, data: Dict[str, Any], version: Optional[str], last_modified: Optional[str]) -> None:
+        """Store a response and evict least recently used entries if over budget.
+
+        Args:
+            key (str): Cache key from make_key()
+            data (dict): Response data
+            version (str): File version the response belongs to
+            last_modified (str): File lastModified timestamp the response belongs to
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if len(payload) > self.max_bytes:
+            return
+
+        filename = f"{key}.json"
+        with self._lock:
+            self._write_atomic(self.cache_dir / filename, payload)
+
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                'file': filename,
+                'size': len(payload),
+                'version': version,
+                'lastModified': last_modified
+            }
+
+            while self.total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+            self._save_index()
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self._save_index()
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of cached responses in bytes."""
+        return sum(entry['size'] for entry in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters.
+
+        Returns:
+            dict: Hit, miss, stale and eviction counts with current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self.total_bytes
+        }
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry and its response file. Caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry:
+            try:
+                (self.cache_dir / entry['file']).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self) -> 'OrderedDict[str, Dict[str, Any]]':
+        """Load the LRU index from disk, oldest entry first."""
+        index_path = self.cache_dir / self.INDEX_FILENAME
+        if not index_path.exists():
+            return OrderedDict()
+
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return OrderedDict(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            return OrderedDict()
+
+    def _save_index(self) -> None:
+        """Persist the LRU index. Caller must hold the lock."""
+        payload = json.dumps(self._entries).encode('utf-8')
+        self._write_atomic(self.cache_dir / self.INDEX_FILENAME, payload)
+
+    @staticmethod
+    def _write_atomic(path: Path, payload: bytes) -> None:
+        """Write bytes to a temporary file and rename it into place."""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
@@ -0,0 +1,279 @@
+"""Uniform-grid spatial index over node bounding boxes."""
+
+import heapq
+import math
+from statistics import median
+from typing import Dict, Any, List, Iterable, Iterator, Tuple
+from .geometry_store import GeometryStore
+
+
+class _GridLevel:
+    """One grid of the index: node positions bucketed by cell."""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = None
+        # Nodes in this level; each is added once
+        self.count = 0
+
+    def cell_range(self, left: float, top: float, right: float, bottom: float) -> Tuple[int, int, int, int]:
+        """First and last grid column and row covered by a rectangle."""
+        size = self.cell_size
+        return (math.floor(left / size), math.floor(top / size),
+                math.floor(right / size), math.floor(bottom / size))
+
+    def add(self, position: int, cell_range: Tuple[int, int, int, int]) -> None:
+        col_start, row_start, col_end, row_end = cell_range
+        cells = self.cells
+        self.count += 1
+        for col in range(col_start, col_end + 1):
+            for row in range(row_start, row_end + 1):
+                cells.setdefault((col, row), []).append(position)
+
+    def finish(self) -> None:
+        """Record the occupied extent once every node is added."""
+        cols = [col for col, _ in self.cells]
+        rows = [row for _, row in self.cells]
+        self.bounds = (min(cols), min(rows), max(cols), max(rows))
+
+    def candidates(self, left: float, top: float, right: float, bottom: float, positions: set) -> None:
+        """Add the positions in the cells overlapping a rectangle."""
+        col_start, row_start, col_end, row_end = self.cell_range(left, top, right, bottom)
+        min_col, min_row, max_col, max_row = self.bounds
+        col_start, row_start = max(col_start, min_col), max(row_start, min_row)
+        col_end, row_end = min(col_end, max_col), min(row_end, max_row)
+        if col_start > col_end or row_start > row_end:
+            return
+
+        cells = self.cells
+        if (col_end - col_start + 1) * (row_end - row_start + 1) > len(cells):
+            # Large query: visiting the occupied cells is cheaper than the range
+            for (col, row), cell in cells.items():
+                if col_start <= col <= col_end and row_start <= row <= row_end:
+                    positions.update(cell)
+            return
+
+        for col in range(col_start, col_end + 1):
+            for row in range(row_start, row_end + 1):
+                cell = cells.get((col, row))
+                if cell:
+                    positions.update(cell)
+
+    def rings(self, x: float, y: float) -> Iterator[Tuple[float, List[List[int]]]]:
+        """Occupied cells by growing Chebyshev ring around the cell of a point.
+
+        Yields:
+            tuple: (distance, cells) where distance is a lower bound for the
+                distance from the point to any cell of a later ring
+        """
+        size = self.cell_size
+        col, row = math.floor(x / size), math.floor(y / size)
+        min_col, min_row, max_col, max_row = self.bounds
+        cells = self.cells
+        first_ring = max(min_col - col, col - max_col, min_row - row, row - max_row, 0)
+        last_ring = max(col - min_col, max_col - col, row - min_row, max_row - row)
+
+        for ring in range(first_ring, last_ring + 1):
+            if 8 * ring > len(cells):
+                # Sparse level: bucket the occupied cells by ring instead of walking empty rings
+                remaining = {}
+                for (cell_col, cell_row), cell in cells.items():
+                    cell_ring = max(abs(cell_col - col), abs(cell_row - row))
+                    if cell_ring >= ring:
+                        remaining.setdefault(cell_ring, []).append(cell)
+                later = sorted(remaining)
+                for cell_ring, next_ring in zip(later, later[1:] + [None]):
+                    yield (math.inf if next_ring is None else (next_ring - 1) * size), remaining[cell_ring]
+                return
+
+            ring_cells = []
+            for cell_row in range(max(row - ring, min_row), min(row + ring, max_row) + 1):
+                if abs(cell_row - row) == ring:
+                    cols = range(max(col - ring, min_col), min(col + ring, max_col) + 1)
+                else:
+                    cols = [c for c in (col - ring, col + ring) if min_col <= c <= max_col]
+                for cell_col in cols:
+                    cell = cells.get((cell_col, cell_row))
+                    if cell:
+                        ring_cells.append(cell)
+            # Cells of the next ring are at least `ring` whole cells away
+            yield ring * size, ring_cells
+
+
+class SpatialIndex:
+    """Answers region, hit-test and nearest-node queries without scanning every node.
+
+    Boxes are bucketed into a uniform grid whose cell size follows the
+    median node size, so a typical node lands in one to four cells and a
+    query only reads the cells it overlaps. A node spanning more than
+    ``MAX_CELLS`` cells (pages, backgrounds, full-screen frames) goes to a
+    coarser grid instead, with cells ``LEVEL_RATIO`` times larger, and so on
+    until it fits, so large nodes are never copied into hundreds of cells.
+    Results are node IDs in document order.
+
+    Edges are inclusive: boxes that touch a query rectangle intersect it.
+    """
+
+    MAX_CELLS = 16
+    LEVEL_RATIO = 4
+
+    def __init__(self, nodes: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Build the index.
+
+        Args:
+            nodes (iterable): (node_id, node) pairs in document order; nodes
+                without an absoluteBoundingBox are skipped
+        """
+        self.ids = []
+        # (left, top, right, bottom) per indexed node
+        self.boxes = []
+        for node_id, node in nodes:
+            box = node.get('absoluteBoundingBox')
+            if box:
+                self.ids.append(node_id)
+                self.boxes.append((box['x'], box['y'], box['x'] + box['width'], box['y'] + box['height']))
+        self._build()
+
+    @classmethod
+    def from_geometry(cls, geometry: GeometryStore) -> 'SpatialIndex':
+        """Build the index from a geometry store, without touching node dicts.
+
+        Args:
+            geometry (GeometryStore): Boxes to index; results follow its numbering
+
+        Returns:
+            SpatialIndex: Index over every box in the store
+        """
+        index = cls.__new__(cls)
+        index.ids = list(geometry.ids)
+        index.boxes = [(x, y, x + width, y + height) for x, y, width, height
+                       in zip(geometry.x, geometry.y, geometry.width, geometry.height)]
+        index._build()
+        return index
+
+    def _build(self) -> None:
+        """Bucket the boxes into grid levels."""
+        sizes = [max(right - left, bottom - top) for left, top, right, bottom in self.boxes]
+        self.cell_size = max(median(sizes), 1.0) if sizes else 1.0
+
+        # Finest grid first
+        self.levels = []
+        for position, box in enumerate(self.boxes):
+            level = 0
+            while True:
+                if level == len(self.levels):
+                    self.levels.append(_GridLevel(self.cell_size * self.LEVEL_RATIO ** level))
+                cell_range = self.levels[level].cell_range(*box)
+                col_start, row_start, col_end, row_end = cell_range
+                if (col_end - col_start + 1) * (row_end - row_start + 1) <= self.MAX_CELLS:
+                    break
+                level += 1
+            self.levels[level].add(position, cell_range)
+
+        # Levels skipped by every node stay empty and are dropped
+        self.levels = [level for level in self.levels if level.cells]
+        for level in self.levels:
+            level.finish()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _search(self, left: float, top: float, right: float, bottom: float, contained: bool) -> List[str]:
+        """IDs of nodes intersecting, or contained in, a rectangle."""
+        positions = set()
+        for level in self.levels:
+            level.candidates(left, top, right, bottom, positions)
+
+        boxes = self.boxes
+        if contained:
+            matches = [p for p in positions
+                       if left <= boxes[p][0] and top <= boxes[p][1]
+                       and boxes[p][2] <= right and boxes[p][3] <= bottom]
+        else:
+            matches = [p for p in positions
+                       if boxes[p][0] <= right and left <= boxes[p][2]
+                       and boxes[p][1] <= bottom and top <= boxes[p][3]]
+        matches.sort()
+        ids = self.ids
+        return [ids[p] for p in matches]
+
+    def intersecting(self, x: float, y: float, width: float, height: float) -> List[str]:
+        """Find nodes whose bounding box intersects a rectangle.
+
+        Args:
+            x (float): Left edge of the rectangle
+            y (float): Top edge of the rectangle
+            width (float): Rectangle width
+            height (float): Rectangle height
+
+        Returns:
+            list: Matching node IDs in document order
+        """
+        return self._search(x, y, x + width, y + height, contained=False)
+
+    def within(self, x: float, y: float, width: float, height: float) -> List[str]:
+        """Find nodes whose bounding box lies entirely inside a rectangle.
+
+        Args:
+            x (float): Left edge of the rectangle
+            y (float): Top edge of the rectangle
+            width (float): Rectangle width
+            height (float): Rectangle height
+
+        Returns:
+            list: Matching node IDs in document order
+        """
+        return self._search(x, y, x + width, y + height, contained=True)
+
+    def at_point(self, x: float, y: float) -> List[str]:
+        """Find nodes under a point.
+
+        Args:
+            x (float): Point x coordinate
+            y (float): Point y coordinate
+
+        Returns:
+            list: Node IDs whose bounding box contains the point, in document
+                order (so ancestors come before the nodes they contain)
+        """
+        return self._search(x, y, x, y, contained=False)
+
+    def _distance(self, position: int, x: float, y: float) -> float:
+        """Distance from a point to a node's bounding box, 0 inside it."""
+        left, top, right, bottom = self.boxes[position]
+        return math.hypot(max(left - x, 0, x - right), max(top - y, 0, y - bottom))
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[str]:
+        """Find the k nodes closest to a point.
+
+        Each grid is searched in rings of growing radius around the point,
+        stopping once none of its unvisited cells can hold a closer node
+        than the k best found so far, or once all of its nodes are found.
+
+        Args:
+            x (float): Point x coordinate
+            y (float): Point y coordinate
+            k (int): Number of nodes to return
+
+        Returns:
+            list: Node IDs by increasing distance to their bounding box, ties in
+                document order
+        """
+        if k <= 0:
+            return []
+
+        found = {}
+        for level in self.levels:
+            remaining = level.count
+            for bound, cells in level.rings(x, y):
+                for cell in cells:
+                    for position in cell:
+                        if position not in found:
+                            found[position] = self._distance(position, x, y)
+                            remaining -= 1
+                if not remaining or len(found) >= k and heapq.nsmallest(k, found.values())[-1] < bound:
+                    break
+
+        ranked = sorted(found, key=lambda position: (found[position], position))[:k]
+        return [self.ids[position] for position in ranked]
@@ -1,39 +1,59 @@
 """Component extractor for extracting components from Figma files."""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable, List, Union
 from ..core.api_client import FigmaAPIClient
+from ..processors.data_cleaner import DataCleaner
+from ..processors.filter_memo import FilterMemo
+from ..processors.instances import TABLE_KEY as INSTANCE_TABLE_KEY
 from ..utils.file_handler import FileHandler
+from ..utils.reporting import Reporter, NullReporter
 import sys
 from pathlib import Path
 
 # Add config to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
 
-from settings import KEEP_FIELDS
+from settings import KEEP_FIELDS, DEDUPE_INSTANCES
 
 
 class ComponentExtractor:
     """Extractor for Figma components."""
     
-    def __init__(self, api_client: FigmaAPIClient):
+    def __init__(self, api_client: FigmaAPIClient, reporter: Optional[Reporter] = None,
+                 file_handler: Optional[FileHandler] = None, dedupe_instances: bool = DEDUPE_INSTANCES):
         """Initialize the component extractor.
         
         Args:
             api_client (FigmaAPIClient): Figma API client instance
+            reporter (Reporter, optional): Receives progress events. Silent by default.
+            file_handler (FileHandler, optional): Handler saving raw and cleaned
+                output. Share a background handler to overlap saves with extraction.
+            dedupe_instances (bool): Save cleaned output as a shared component
+                table plus per-instance overrides (see DataCleaner.dedupe_instances).
+                Return values stay inlined; load_clean_output() reads either form.
         """
         self.api_client = api_client
-        self.file_handler = FileHandler()
+        self.reporter = reporter or NullReporter()
+        self.file_handler = file_handler or FileHandler(reporter=self.reporter)
+        self.dedupe_instances = dedupe_instances
+        self.data_cleaner = DataCleaner()
+        # Kept across extractions: instances repeat across requested nodes too
+        self.filter_memo = FilterMemo(self.data_cleaner, KEEP_FIELDS)
     
-    def extract(self, node_id: Optional[str] = None, file_key: str = None) -> Dict[str, Any]:
+    def extract(self, node_id: Optional[Union[str, List[str]]] = None, file_key: str = None) -> Dict[str, Any]:
         """Extract components from Figma file.
         
         Args:
-            node_id (str, optional): Specific node ID to extract
+            node_id (str|list, optional): Specific node ID to extract, or a list of
+                node IDs to extract with batched requests (see extract_many)
             file_key (str, optional): Figma file key
             
         Returns:
             dict: Extracted component data
         """
+        if isinstance(node_id, (list, tuple)):
+            return self.extract_many(node_id, file_key)
+        
         if node_id:
             # Extract specific node
             data = self.api_client.get_file_nodes(node_id, file_key)
@@ -46,9 +66,10 @@ class ComponentExtractor:
             if 'nodes' in data and node_id_json in data['nodes']:
                 raw_node = data['nodes'][node_id_json]['document']
                 clean_node = self._filter_node(raw_node)
+                self.reporter.emit('filter_memo.done', **self.filter_memo.stats)
                 
                 # Save cleaned data
-                self.file_handler.save_json(clean_node, 'clean_figma_output.json')
+                self._save_clean(clean_node)
                 
                 return clean_node
         else:
@@ -58,130 +79,82 @@ class ComponentExtractor:
         
         return {}
     
-    def _filter_node(self, node: Dict[str, Any], parent_box: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
-        """Filter and clean node data, keeping only relevant fields.
+    def extract_many(self, node_ids: Iterable[str], file_key: str = None) -> Dict[str, Any]:
+        """Extract several nodes with batched, parallel requests.
+        
+        The number of round trips grows with the number of URL-length-safe
+        batches rather than with the number of nodes.
         
         Args:
-            node (dict): Raw node data from Figma
-            parent_box (dict, optional): Parent bounding box for padding calculation
+            node_ids (iterable): Node IDs to extract
+            file_key (str, optional): Figma file key
             
         Returns:
-            dict: Filtered node data
+            dict: Cleaned node data keyed by the requested node ID. Nodes missing
+                from the file are omitted.
         """
-        new_node = {}
-        current_box = node.get('absoluteBoundingBox')
-        
-        # Copy relevant fields
-        for key, value in node.items():
-            if key in KEEP_FIELDS:
-                if key == 'children':
-                    new_children = [self._filter_node(child, current_box) for child in value]
-                    self._process_siblings(new_children)
-                    new_node[key] = new_children
-                else:
-                    new_node[key] = value
+        node_ids = list(dict.fromkeys(node_ids))
+        data = self.api_client.get_file_nodes_batched(node_ids, file_key)
         
-        # Calculate padding if parent box is available
-        if parent_box and current_box:
-            new_node['padding'] = self._extract_padding(parent_box, current_box)
+        # Save raw data
+        self.file_handler.save_json(data, 'extract_figma_component_tokens.json')
         
-        return new_node
-    
-    def _extract_padding(self, parent_box: Dict[str, float], child_box: Dict[str, float]) -> Dict[str, float]:
-        """Calculate padding between parent and child elements.
+        results = {}
+        nodes = data.get('nodes', {})
+        for node_id in node_ids:
+            node_content = nodes.get(node_id.replace('-', ':'))
+            if node_content and node_content.get('document'):
+                results[node_id] = self._filter_node(node_content['document'])
+        self.reporter.emit('filter_memo.done', **self.filter_memo.stats)
         
-        Args:
-            parent_box (dict): Parent element bounding box
-            child_box (dict): Child element bounding box
-            
-        Returns:
-            dict: Padding values (left, top, right, bottom)
-        """
-        px, py, pw, ph = parent_box["x"], parent_box["y"], parent_box["width"], parent_box["height"]
-        cx, cy, cw, ch = child_box["x"], child_box["y"], child_box["width"], child_box["height"]
+        # Save cleaned data
+        self._save_clean(results)
         
-        return {
-            "left": round(cx - px, 2),
-            "top": round(cy - py, 2),
-            "right": round((px + pw) - (cx + cw), 2),
-            "bottom": round((py + ph) - (cy + ch), 2)
-        }
+        return results
     
-    def _is_same_row(self, box1: Dict[str, float], box2: Dict[str, float], tolerance: float = 2) -> bool:
-        """Check if two elements are in the same row.
+    def load_clean_output(self, filename: str = 'clean_figma_output.json') -> Dict[str, Any]:
+        """Load saved cleaned output, inlining instances of a deduplicated file.
         
         Args:
-            box1 (dict): First element bounding box
-            box2 (dict): Second element bounding box
-            tolerance (float): Tolerance for row alignment
+            filename (str): Saved cleaned output
             
         Returns:
-            bool: True if elements are in same row
+            dict: Cleaned data as extract() or extract_many() returned it
         """
-        return abs(box1["y"] - box2["y"]) < tolerance
+        data = self.file_handler.load_json(filename)
+        if isinstance(data, dict) and INSTANCE_TABLE_KEY in data:
+            return self.data_cleaner.expand_instances(data)
+        return data
     
-    def _is_same_column(self, box1: Dict[str, float], box2: Dict[str, float], tolerance: float = 2) -> bool:
-        """Check if two elements are in the same column.
-        
+    def _save_clean(self, data: Dict[str, Any]) -> None:
+        """Save cleaned output, as an instance table in dedupe mode."""
+        if self.dedupe_instances:
+            data = self.data_cleaner.dedupe_instances(data)
+        self.file_handler.save_json(data, 'clean_figma_output.json')
+    
+    def _filter_node(self, node: Dict[str, Any], parent_box: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Filter and clean node data, keeping only relevant fields.
+
+        Repeated instance subtrees reuse the layout computed for their first
+        copy; see FilterMemo.
+
         Args:
-            box1 (dict): First element bounding box
-            box2 (dict): Second element bounding box
-            tolerance (float): Tolerance for column alignment
-            
+            node (dict): Raw node data from Figma
+            parent_box (dict, optional): Parent bounding box for padding calculation
+
         Returns:
-            bool: True if elements are in same column
+            dict: Filtered node data
         """
-        return abs(box1["x"] - box2["x"]) < tolerance
+        return self.filter_memo.filter_node(node, parent_box)
     
-    def _calc_distance(self, box1: Dict[str, float], box2: Dict[str, float], relation: str) -> Optional[float]:
-        """Calculate distance between two elements based on their relationship.
+    def _extract_padding(self, parent_box: Dict[str, float], child_box: Dict[str, float]) -> Dict[str, float]:
+        """Calculate padding between parent and child elements.
         
         Args:
-            box1 (dict): First element bounding box
-            box2 (dict): Second element bounding box
-            relation (str): Relationship type ('sameRow' or 'sameColumn')
+            parent_box (dict): Parent element bounding box
+            child_box (dict): Child element bounding box
             
         Returns:
-            float: Distance between elements
-        """
-        if relation == "sameRow":
-            return abs(box1["x"] - box2["x"])
-        elif relation == "sameColumn":
-            return abs(box1["y"] - box2["y"])
-        return None
-    
-    def _process_siblings(self, children: list) -> None:
-        """Process sibling relationships and add layout information.
-        
-        Args:
-            children (list): List of child nodes
+            dict: Padding values (left, top, right, bottom)
         """
-        for i, node_i in enumerate(children):
-            box_i = node_i.get("absoluteBoundingBox")
-            if not box_i:
-                continue
-            
-            siblings_info = []
-            for j, node_j in enumerate(children):
-                if i == j:
-                    continue
-                
-                box_j = node_j.get("absoluteBoundingBox")
-                if not box_j:
-                    continue
-                
-                if self._is_same_row(box_i, box_j):
-                    siblings_info.append({
-                        "targetId": node_j.get("id"),
-                        "relation": "sameRow",
-                        "distance": round(self._calc_distance(box_i, box_j, "sameRow"), 2)
-                    })
-                elif self._is_same_column(box_i, box_j):
-                    siblings_info.append({
-                        "targetId": node_j.get("id"),
-                        "relation": "sameColumn",
-                        "distance": round(self._calc_distance(box_i, box_j, "sameColumn"), 2)
-                    })
-            
-            if siblings_info:
-                node_i["siblingsLayout"] = siblings_info
+        return self.data_cleaner._extract_padding(parent_box, child_box)
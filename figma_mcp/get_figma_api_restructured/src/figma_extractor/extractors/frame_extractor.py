@@ -1,36 +1,51 @@
 """Frame extractor for extracting frames from Figma files."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from ..core.api_client import FigmaAPIClient
+from ..core.document_index import DocumentIndex
+from ..core.document_session import DocumentSession
+from ..core.geometry_store import GeometryStore
+from ..core.lazy_document import LazyDocument
+from ..processors.traversal import CollectStage
 from ..utils.file_handler import FileHandler
+from ..utils.json_stream import iter_frames
+from ..utils.reporting import Reporter, NullReporter
 
 
 class FrameExtractor:
     """Extractor for Figma frames."""
     
-    def __init__(self, api_client: FigmaAPIClient):
+    def __init__(self, api_client: FigmaAPIClient, session: Optional[DocumentSession] = None,
+                 reporter: Optional[Reporter] = None,
+                 file_handler: Optional[FileHandler] = None):
         """Initialize the frame extractor.
         
         Args:
             api_client (FigmaAPIClient): Figma API client instance
+            session (DocumentSession, optional): Shared document session. When given,
+                the file is fetched through the session and reused across extractors.
+            reporter (Reporter, optional): Receives progress events. Silent by default.
+            file_handler (FileHandler, optional): Handler saving raw and cleaned
+                output. Share a background handler to overlap saves with extraction.
         """
         self.api_client = api_client
-        self.file_handler = FileHandler()
+        self.session = session
+        self.reporter = reporter or NullReporter()
+        self.file_handler = file_handler or FileHandler(reporter=self.reporter)
     
-    def extract(self, file_key: str = None) -> List[Dict[str, Any]]:
+    def extract(self, file_key: str = None, geometry: Optional[GeometryStore] = None) -> List[Dict[str, Any]]:
         """Extract frames from Figma file.
         
         Args:
             file_key (str, optional): Figma file key
+            geometry (GeometryStore, optional): Boxes of the same file, read
+                instead of each frame's absoluteBoundingBox dict
             
         Returns:
             list: List of extracted frames
         """
         # Get file data from Figma API
-        data = self.api_client.get_file(file_key)
-        
-        # Save raw data
-        self.file_handler.save_json(data, 'figma_file.json')
+        data = self._get_file(file_key)
         
         all_frames = []
         
@@ -38,53 +53,181 @@ class FrameExtractor:
         nodes_data = data.get('nodes', {})
         for node_id, node_content in nodes_data.items():
             if 'document' in node_content:
-                self._find_frames(node_content['document'], all_frames)
+                self._find_frames(node_content['document'], all_frames, geometry=geometry)
         
         # Also check document root if available
         if 'document' in data:
-            self._find_frames(data['document'], all_frames)
+            self._find_frames(data['document'], all_frames, geometry=geometry)
+        
+        self._report_frames(all_frames)
+        
+        return all_frames
+    
+    def extract_lazy(self, file_key: str = None, max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Extract frames from a lazily fetched, depth-limited document.
+        
+        Only the levels needed to list frames (and count their children) are
+        transferred, instead of the full document with every node's properties.
         
-        print(f"✅ Tìm thấy {len(all_frames)} FRAME(s)\n")
+        Args:
+            file_key (str, optional): Figma file key
+            max_depth (int, optional): Deepest tree level to search for frames,
+                counting the document as level 0. Defaults to the whole tree.
+            
+        Returns:
+            list: List of extracted frames
+        """
+        if max_depth is not None:
+            # One request covers every level we search plus the children of the deepest frames
+            document = LazyDocument(self.api_client, file_key, depth=max_depth + 1)
+        else:
+            document = LazyDocument(self.api_client, file_key)
+            document.load()
+        
+        all_frames = []
+        self._find_frames(document.document, all_frames, max_depth)
         
-        # Print frame information
-        for frame in all_frames:
-            print(f"🖼️ Frame: {frame['name']}")
-            print(f"  ID: {frame['id']}")
-            print(f"  Position: ({frame['x']}, {frame['y']})")
-            print(f"  Size: {frame['width']} x {frame['height']}")
-            print(f"  Children: {frame['child_count']}")
-            print("-" * 40)
+        self._report_frames(all_frames)
         
         return all_frames
     
-    def _find_frames(self, node: Dict[str, Any], frames: List[Dict[str, Any]]) -> None:
-        """Recursively find frames in the node tree.
+    def extract_stream(self, source: Any = None, file_key: str = None) -> List[Dict[str, Any]]:
+        """Extract frames while parsing the document as a stream.
+        
+        The document is never loaded as a whole; only frame records are kept,
+        so memory use does not grow with the size of the file. The result is
+        the same as extract() on the same document.
+        
+        Args:
+            source (str|Path|file, optional): Saved file or /nodes response, or an
+                open stream. Defaults to streaming the file from the API.
+            file_key (str, optional): Figma file key, used when source is omitted
+            
+        Returns:
+            list: List of extracted frames
+        """
+        if source is None:
+            with self.api_client.stream_file(file_key) as stream:
+                frames = list(iter_frames(stream))
+        else:
+            frames = list(iter_frames(source))
+        
+        # Frames arrive children-first; restore document (pre-)order
+        frames.sort(key=lambda frame: frame.pop('order'))
+        
+        self._report_frames(frames)
+        
+        return frames
+    
+    def _report_frames(self, frames: List[Dict[str, Any]]) -> None:
+        """Report the extracted frames, one event per frame.
+        
+        Args:
+            frames (list): Extracted frames
+        """
+        reporter = self.reporter
+        if not reporter.enabled:
+            return
+        
+        reporter.emit('frames.found', count=len(frames))
+        for frame in frames:
+            reporter.emit('frames.frame', id=frame['id'], name=frame['name'], x=frame['x'], y=frame['y'],
+                          width=frame['width'], height=frame['height'], child_count=frame['child_count'])
+    
+    def _get_file(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get file data, reusing the shared session document when available.
         
         Args:
-            node (dict): Current node to search
+            file_key (str, optional): Figma file key
+            
+        Returns:
+            dict: File data
+        """
+        if self.session:
+            return self.session.get_file(file_key)
+        
+        data = self.api_client.get_file(file_key)
+        
+        # Save raw data
+        self.file_handler.save_json(data, 'figma_file.json')
+        return data
+    
+    def _find_frames(self, node: Dict[str, Any], frames: List[Dict[str, Any]],
+                     max_depth: Optional[int] = None, depth: int = 0,
+                     geometry: Optional[GeometryStore] = None) -> None:
+        """Find frames in the node tree in document order.
+        
+        Args:
+            node (dict): Root node to search
             frames (list): List to append found frames to
+            max_depth (int, optional): Deepest level to search. Defaults to the whole tree.
+            depth (int): Level of the root node
+            geometry (GeometryStore, optional): Boxes of the same document
+        """
+        stack = [(node, depth)]
+        while stack:
+            node, depth = stack.pop()
+            
+            # Check if current node is a FRAME
+            frame_info = self._frame_info(node, geometry)
+            if frame_info is not None:
+                frames.append(frame_info)
+            
+            # Search children next, first child on top of the stack
+            if max_depth is not None and depth >= max_depth:
+                continue
+            if 'children' in node:
+                stack.extend((child, depth + 1) for child in reversed(node['children']))
+    
+    @staticmethod
+    def _frame_info(node: Dict[str, Any], geometry: Optional[GeometryStore] = None) -> Optional[Dict[str, Any]]:
+        """Build the frame record for a FRAME node.
+        
+        Args:
+            node (dict): Node to inspect
+            geometry (GeometryStore, optional): Boxes to read instead of the node's
+                absoluteBoundingBox
+            
+        Returns:
+            dict: Frame info, or None if the node is not a FRAME
         """
-        # Check if current node is a FRAME
-        if node.get('type') == 'FRAME':
-            frame_info = {
+        if node.get('type') != 'FRAME':
+            return None
+        if geometry is not None:
+            x, y, width, height = geometry.get(node.get('id')) or (None, None, None, None)
+            return {
                 'id': node.get('id'),
                 'name': node.get('name'),
-                'x': node.get('absoluteBoundingBox', {}).get('x'),
-                'y': node.get('absoluteBoundingBox', {}).get('y'),
-                'width': node.get('absoluteBoundingBox', {}).get('width'),
-                'height': node.get('absoluteBoundingBox', {}).get('height'),
+                'x': x,
+                'y': y,
+                'width': width,
+                'height': height,
                 'child_count': len(node.get('children', []))
             }
-            frames.append(frame_info)
+        return {
+            'id': node.get('id'),
+            'name': node.get('name'),
+            'x': node.get('absoluteBoundingBox', {}).get('x'),
+            'y': node.get('absoluteBoundingBox', {}).get('y'),
+            'width': node.get('absoluteBoundingBox', {}).get('width'),
+            'height': node.get('absoluteBoundingBox', {}).get('height'),
+            'child_count': len(node.get('children', []))
+        }
+    
+    def traversal_stage(self) -> CollectStage:
+        """Create a stage collecting the same frames as _find_frames() in a shared traversal.
         
-        # Recursively search children
-        if 'children' in node:
-            for child in node['children']:
-                self._find_frames(child, frames)
+        Returns:
+            CollectStage: 'frames' stage
+        """
+        return CollectStage('frames', self._frame_info)
     
     def get_frame_by_id(self, frame_id: str, file_key: str = None) -> Dict[str, Any]:
         """Get a specific frame by its ID.
         
+        With a shared session the lookup uses the session's document index,
+        so no request or scan is needed once the file is loaded.
+        
         Args:
             frame_id (str): Frame ID to search for
             file_key (str, optional): Figma file key
@@ -92,27 +235,38 @@ class FrameExtractor:
         Returns:
             dict: Frame data or None if not found
         """
-        frames = self.extract(file_key)
-        for frame in frames:
-            if frame['id'] == frame_id:
-                return frame
-        return None
+        node = self._get_index(file_key).get(frame_id)
+        return self._frame_info(node) if node is not None else None
     
-    def get_frames_by_name(self, name_pattern: str, file_key: str = None) -> List[Dict[str, Any]]:
+    def get_frames_by_name(self, name_pattern: str, file_key: str = None,
+                           mode: str = 'substring', case_sensitive: bool = False) -> List[Dict[str, Any]]:
         """Get frames that match a name pattern.
         
+        Uses the name index of the document, so repeated queries against a
+        shared session cost an index lookup rather than a refetch and a scan.
+        
         Args:
             name_pattern (str): Pattern to match frame names
             file_key (str, optional): Figma file key
+            mode (str): 'substring', 'prefix' or 'exact'
+            case_sensitive (bool): Match case exactly instead of ignoring it
             
         Returns:
             list: List of matching frames
         """
-        frames = self.extract(file_key)
-        matching_frames = []
-        
-        for frame in frames:
-            if name_pattern.lower() in frame.get('name', '').lower():
-                matching_frames.append(frame)
+        index = self._get_index(file_key)
+        frame_ids = index.name_index.search(name_pattern, mode, case_sensitive, node_type='FRAME')
+        return [self._frame_info(index.nodes[frame_id]) for frame_id in frame_ids]
+    
+    def _get_index(self, file_key: Optional[str] = None) -> DocumentIndex:
+        """Get the document index, shared through the session when available.
         
-        return matching_frames
+        Args:
+            file_key (str, optional): Figma file key
+            
+        Returns:
+            DocumentIndex: Index of the file
+        """
+        if self.session:
+            return self.session.get_index(file_key)
+        return DocumentIndex(self._get_file(file_key))
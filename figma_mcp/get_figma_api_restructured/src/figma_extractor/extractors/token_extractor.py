@@ -1,21 +1,33 @@
 """Token extractor for extracting design tokens from Figma files."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..core.api_client import FigmaAPIClient
+from ..core.document_session import DocumentSession
+from ..processors.traversal import TraversalStage
 from ..utils.file_handler import FileHandler
+from ..utils.reporting import Reporter, NullReporter
 
 
 class TokenExtractor:
     """Extractor for Figma design tokens."""
     
-    def __init__(self, api_client: FigmaAPIClient):
+    def __init__(self, api_client: FigmaAPIClient, session: Optional[DocumentSession] = None,
+                 reporter: Optional[Reporter] = None,
+                 file_handler: Optional[FileHandler] = None):
         """Initialize the token extractor.
         
         Args:
             api_client (FigmaAPIClient): Figma API client instance
+            session (DocumentSession, optional): Shared document session. When given,
+                the file is fetched through the session and reused across extractors.
+            reporter (Reporter, optional): Receives progress events. Silent by default.
+            file_handler (FileHandler, optional): Handler saving raw and cleaned
+                output. Share a background handler to overlap saves with extraction.
         """
         self.api_client = api_client
-        self.file_handler = FileHandler()
+        self.session = session
+        self.reporter = reporter or NullReporter()
+        self.file_handler = file_handler or FileHandler(reporter=self.reporter)
     
     def extract(self, file_key: str = None) -> Dict[str, Any]:
         """Extract design tokens from Figma file.
@@ -27,16 +39,31 @@ class TokenExtractor:
             dict: Extracted design tokens data
         """
         # Get file data from Figma API
-        data = self.api_client.get_file(file_key)
-        
-        # Save raw data
-        self.file_handler.save_json(data, 'figma_design.json')
+        data = self._get_file(file_key)
         
         # TODO: Parse node tree to extract specific token info
         # You can start from data['document']['children']...
         
         return data
     
+    def _get_file(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Get file data, reusing the shared session document when available.
+        
+        Args:
+            file_key (str, optional): Figma file key
+            
+        Returns:
+            dict: File data
+        """
+        if self.session:
+            return self.session.get_file(file_key)
+        
+        data = self.api_client.get_file(file_key)
+        
+        # Save raw data
+        self.file_handler.save_json(data, 'figma_design.json')
+        return data
+    
     def _parse_tokens(self, node: Dict[str, Any]) -> Dict[str, Any]:
         """Parse design tokens from a node.
         
@@ -62,6 +89,15 @@ class TokenExtractor:
         
         return tokens
     
+    def traversal_stage(self) -> TraversalStage:
+        """Create a stage parsing tokens of every node in a shared traversal.
+        
+        Returns:
+            TraversalStage: 'tokens' stage whose output maps node IDs to their
+                non-empty parsed tokens, in document order
+        """
+        return _TokenStage(self)
+    
     def _extract_color_tokens(self, fills: list) -> Dict[str, str]:
         """Extract color tokens from fills.
         
@@ -123,3 +159,21 @@ class TokenExtractor:
             spacing['height'] = bounds['height']
         
         return spacing
+
+
+class _TokenStage(TraversalStage):
+    """Traversal stage collecting parsed tokens per node."""
+    
+    name = 'tokens'
+    
+    def __init__(self, extractor: TokenExtractor):
+        self.extractor = extractor
+        self.tokens = {}
+    
+    def enter(self, node: Dict[str, Any]) -> None:
+        tokens = self.extractor._parse_tokens(node)
+        if tokens:
+            self.tokens[node.get('id')] = tokens
+    
+    def finish(self, root_result: Any) -> Dict[str, Dict[str, Any]]:
+        return self.tokens
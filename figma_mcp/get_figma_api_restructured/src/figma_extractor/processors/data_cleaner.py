@@ -1,8 +1,12 @@
 """Data cleaner for filtering and cleaning Figma API responses."""
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 import sys
 from pathlib import Path
+from ..core.geometry_store import GeometryStore
+from .instances import dedupe_instances, expand_instances
+from .layout import process_siblings
+from .traversal import TransformStage
 
 # Add config to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
@@ -30,66 +34,139 @@ class DataCleaner:
         if keep_fields is None:
             keep_fields = KEEP_FIELDS
         
-        if isinstance(data, dict):
-            cleaned_data = {}
-            for key, value in data.items():
-                if key in keep_fields:
-                    if isinstance(value, (dict, list)):
-                        cleaned_data[key] = self.clean(value, keep_fields)
-                    else:
-                        cleaned_data[key] = value
-            return cleaned_data
-        elif isinstance(data, list):
-            return [self.clean(item, keep_fields) for item in data]
-        else:
+        if not isinstance(data, (dict, list)):
             return data
+        
+        # Containers are created in place when first seen and filled later,
+        # so key and item order match the input without recursion
+        cleaned_data = {} if isinstance(data, dict) else []
+        stack = [(data, cleaned_data)]
+        while stack:
+            source, target = stack.pop()
+            if isinstance(source, dict):
+                for key, value in source.items():
+                    if key in keep_fields:
+                        if isinstance(value, (dict, list)):
+                            target[key] = {} if isinstance(value, dict) else []
+                            stack.append((value, target[key]))
+                        else:
+                            target[key] = value
+            else:
+                for item in source:
+                    if isinstance(item, (dict, list)):
+                        target.append({} if isinstance(item, dict) else [])
+                        stack.append((item, target[-1]))
+                    else:
+                        target.append(item)
+        return cleaned_data
     
-    def filter_node(self, node: Dict[str, Any], parent_box: Optional[Dict[str, float]] = None, 
+    def clean_node(self, node: Dict[str, Any], children: List[Dict[str, Any]],
                    keep_fields: Optional[set] = None) -> Dict[str, Any]:
-        """Filter and clean a single node, keeping only relevant fields.
+        """Clean one node whose children are already cleaned.
+        
+        Same result as clean() on the node, for use in a single-pass traversal.
         
         Args:
-            node (dict): Raw node data from Figma
-            parent_box (dict, optional): Parent bounding box for padding calculation
+            node (dict): Raw node
+            children (list): Cleaned children of the node
             keep_fields (set, optional): Fields to keep. Defaults to KEEP_FIELDS.
             
         Returns:
-            dict: Filtered node data
+            dict: Cleaned node
         """
         if keep_fields is None:
             keep_fields = KEEP_FIELDS
         
-        new_node = {}
-        current_box = node.get('absoluteBoundingBox')
-        
-        # Copy relevant fields
+        cleaned_node = {}
         for key, value in node.items():
             if key in keep_fields:
-                if key == 'children':
-                    new_children = [self.filter_node(child, current_box, keep_fields) for child in value]
-                    self._process_siblings(new_children)
-                    new_node[key] = new_children
+                if key == 'children' and isinstance(value, list):
+                    cleaned_node[key] = children
+                elif isinstance(value, (dict, list)):
+                    cleaned_node[key] = self.clean(value, keep_fields)
                 else:
-                    new_node[key] = value
+                    cleaned_node[key] = value
+        return cleaned_node
+    
+    def filter_node(self, node: Dict[str, Any], parent_box: Optional[Dict[str, float]] = None, 
+                   keep_fields: Optional[set] = None, geometry: Optional[GeometryStore] = None) -> Dict[str, Any]:
+        """Filter and clean a single node, keeping only relevant fields.
+        
+        Args:
+            node (dict): Raw node data from Figma
+            parent_box (dict, optional): Parent bounding box for padding calculation
+            keep_fields (set, optional): Fields to keep. Defaults to KEEP_FIELDS.
+            geometry (GeometryStore, optional): Boxes of the same document, read
+                for padding and sibling layout instead of absoluteBoundingBox dicts
+            
+        Returns:
+            dict: Filtered node data
+        """
+        if keep_fields is None:
+            keep_fields = KEEP_FIELDS
         
-        # Calculate padding if parent box is available
-        if parent_box and current_box:
-            new_node['padding'] = self._extract_padding(parent_box, current_box)
+        root = {}
+        # Entries are ('node', raw, new, parent_box) to filter a node,
+        # ('siblings', new_children) once a node's children are all filtered and
+        # ('padding', new, parent_box, current_box) once a whole subtree is done
+        stack = [('node', node, root, parent_box)]
+        while stack:
+            entry = stack.pop()
+            
+            if entry[0] == 'siblings':
+                self._process_siblings(entry[1], geometry)
+                continue
+            if entry[0] == 'padding':
+                _, new_node, box, current_box = entry
+                new_node['padding'] = self._extract_padding(box, current_box)
+                continue
+            
+            _, raw_node, new_node, box = entry
+            if geometry is not None:
+                current_box = geometry.get(raw_node.get('id'))
+            else:
+                current_box = raw_node.get('absoluteBoundingBox')
+            
+            # Calculate padding if parent box is available (after all fields)
+            if box and current_box:
+                stack.append(('padding', new_node, box, current_box))
+            
+            # Copy relevant fields
+            for key, value in raw_node.items():
+                if key in keep_fields:
+                    if key == 'children':
+                        new_children = [{} for _ in value]
+                        new_node[key] = new_children
+                        stack.append(('siblings', new_children))
+                        stack.extend(
+                            ('node', child, new_child, current_box)
+                            for child, new_child in zip(reversed(value), reversed(new_children))
+                        )
+                    else:
+                        new_node[key] = value
         
-        return new_node
+        return root
     
-    def _extract_padding(self, parent_box: Dict[str, float], child_box: Dict[str, float]) -> Dict[str, float]:
+    def _extract_padding(self, parent_box: Union[Dict[str, float], Tuple[float, float, float, float]],
+                         child_box: Union[Dict[str, float], Tuple[float, float, float, float]]) -> Dict[str, float]:
         """Calculate padding between parent and child elements.
         
         Args:
-            parent_box (dict): Parent element bounding box
-            child_box (dict): Child element bounding box
+            parent_box (dict|tuple): Parent element bounding box, or its
+                (x, y, width, height) from a GeometryStore
+            child_box (dict|tuple): Child element bounding box, in either form
             
         Returns:
             dict: Padding values (left, top, right, bottom)
         """
-        px, py, pw, ph = parent_box["x"], parent_box["y"], parent_box["width"], parent_box["height"]
-        cx, cy, cw, ch = child_box["x"], child_box["y"], child_box["width"], child_box["height"]
+        if isinstance(parent_box, dict):
+            px, py, pw, ph = parent_box["x"], parent_box["y"], parent_box["width"], parent_box["height"]
+        else:
+            px, py, pw, ph = parent_box
+        if isinstance(child_box, dict):
+            cx, cy, cw, ch = child_box["x"], child_box["y"], child_box["width"], child_box["height"]
+        else:
+            cx, cy, cw, ch = child_box
         
         return {
             "left": round(cx - px, 2),
@@ -98,84 +175,36 @@ class DataCleaner:
             "bottom": round((py + ph) - (cy + ch), 2)
         }
     
-    def _is_same_row(self, box1: Dict[str, float], box2: Dict[str, float], tolerance: float = 2) -> bool:
-        """Check if two elements are in the same row.
+    def _process_siblings(self, children: list, geometry: Optional[GeometryStore] = None) -> None:
+        """Process sibling relationships and add layout information.
         
         Args:
-            box1 (dict): First element bounding box
-            box2 (dict): Second element bounding box
-            tolerance (float): Tolerance for row alignment
-            
-        Returns:
-            bool: True if elements are in same row
+            children (list): List of child nodes
+            geometry (GeometryStore, optional): Boxes of the document the children come from
         """
-        return abs(box1["y"] - box2["y"]) < tolerance
+        process_siblings(children, geometry=geometry)
     
-    def _is_same_column(self, box1: Dict[str, float], box2: Dict[str, float], tolerance: float = 2) -> bool:
-        """Check if two elements are in the same column.
+    def dedupe_instances(self, data: Any) -> Dict[str, Any]:
+        """Store each component's subtree once and instances as references with their overrides.
         
         Args:
-            box1 (dict): First element bounding box
-            box2 (dict): Second element bounding box
-            tolerance (float): Tolerance for column alignment
+            data: Cleaned node (filter_node output), or a dict or list of them
             
         Returns:
-            bool: True if elements are in same column
+            dict: Instance table; expand_instances() restores data from it
         """
-        return abs(box1["x"] - box2["x"]) < tolerance
+        return dedupe_instances(data)
     
-    def _calc_distance(self, box1: Dict[str, float], box2: Dict[str, float], relation: str) -> Optional[float]:
-        """Calculate distance between two elements based on their relationship.
+    def expand_instances(self, table: Dict[str, Any]) -> Any:
+        """Inline every instance of a dedupe_instances() table again.
         
         Args:
-            box1 (dict): First element bounding box
-            box2 (dict): Second element bounding box
-            relation (str): Relationship type ('sameRow' or 'sameColumn')
+            table (dict): dedupe_instances() output
             
         Returns:
-            float: Distance between elements
-        """
-        if relation == "sameRow":
-            return abs(box1["x"] - box2["x"])
-        elif relation == "sameColumn":
-            return abs(box1["y"] - box2["y"])
-        return None
-    
-    def _process_siblings(self, children: list) -> None:
-        """Process sibling relationships and add layout information.
-        
-        Args:
-            children (list): List of child nodes
+            Data identical to the input of dedupe_instances()
         """
-        for i, node_i in enumerate(children):
-            box_i = node_i.get("absoluteBoundingBox")
-            if not box_i:
-                continue
-            
-            siblings_info = []
-            for j, node_j in enumerate(children):
-                if i == j:
-                    continue
-                
-                box_j = node_j.get("absoluteBoundingBox")
-                if not box_j:
-                    continue
-                
-                if self._is_same_row(box_i, box_j):
-                    siblings_info.append({
-                        "targetId": node_j.get("id"),
-                        "relation": "sameRow",
-                        "distance": round(self._calc_distance(box_i, box_j, "sameRow"), 2)
-                    })
-                elif self._is_same_column(box_i, box_j):
-                    siblings_info.append({
-                        "targetId": node_j.get("id"),
-                        "relation": "sameColumn",
-                        "distance": round(self._calc_distance(box_i, box_j, "sameColumn"), 2)
-                    })
-            
-            if siblings_info:
-                node_i["siblingsLayout"] = siblings_info
+        return expand_instances(table)
     
     def remove_empty_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Remove empty fields from data.
@@ -186,21 +215,66 @@ class DataCleaner:
         Returns:
             dict: Data with empty fields removed
         """
-        if isinstance(data, dict):
-            cleaned = {}
-            for key, value in data.items():
-                if value is not None and value != "" and value != []:
-                    if isinstance(value, (dict, list)):
-                        cleaned_value = self.remove_empty_fields(value)
-                        if cleaned_value:  # Only add if not empty
-                            cleaned[key] = cleaned_value
-                    else:
-                        cleaned[key] = value
-            return cleaned
-        elif isinstance(data, list):
-            return [self.remove_empty_fields(item) for item in data if item is not None]
-        else:
+        if not isinstance(data, (dict, list)):
             return data
+        
+        cleaned = {} if isinstance(data, dict) else []
+        stack = [(data, cleaned)]
+        # (parent, key, container) for nested values of dicts, in the order
+        # they were created: every container comes after its ancestors
+        nested = []
+        while stack:
+            source, target = stack.pop()
+            if isinstance(source, dict):
+                for key, value in source.items():
+                    if value is not None and value != "" and value != []:
+                        if isinstance(value, (dict, list)):
+                            target[key] = {} if isinstance(value, dict) else []
+                            nested.append((target, key, target[key]))
+                            stack.append((value, target[key]))
+                        else:
+                            target[key] = value
+            else:
+                for item in source:
+                    if item is None:
+                        continue
+                    if isinstance(item, (dict, list)):
+                        target.append({} if isinstance(item, dict) else [])
+                        stack.append((item, target[-1]))
+                    else:
+                        target.append(item)
+        
+        # Drop values that ended up empty, innermost first
+        for parent, key, container in reversed(nested):
+            if not container:  # Only keep if not empty
+                del parent[key]
+        return cleaned
+    
+    def remove_empty_node_fields(self, node: Dict[str, Any], children: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Remove empty fields from one node whose children are already processed.
+        
+        Same result as remove_empty_fields() on the node, for use in a
+        single-pass traversal.
+        
+        Args:
+            node (dict): Node to clean
+            children (list): Processed children of the node
+            
+        Returns:
+            dict: Node with empty fields removed
+        """
+        cleaned = {}
+        for key, value in node.items():
+            if value is not None and value != "" and value != []:
+                if key == 'children' and isinstance(value, list):
+                    cleaned[key] = children
+                elif isinstance(value, (dict, list)):
+                    cleaned_value = self.remove_empty_fields(value)
+                    if cleaned_value:  # Only add if not empty
+                        cleaned[key] = cleaned_value
+                else:
+                    cleaned[key] = value
+        return cleaned
     
     def normalize_colors(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize color values in the data.
@@ -211,20 +285,71 @@ class DataCleaner:
         Returns:
             dict: Data with normalized colors
         """
-        if isinstance(data, dict):
-            normalized = {}
-            for key, value in data.items():
-                if key == 'fills' and isinstance(value, list):
-                    normalized[key] = self._normalize_fills(value)
-                elif isinstance(value, (dict, list)):
-                    normalized[key] = self.normalize_colors(value)
-                else:
-                    normalized[key] = value
-            return normalized
-        elif isinstance(data, list):
-            return [self.normalize_colors(item) for item in data]
-        else:
+        if not isinstance(data, (dict, list)):
             return data
+        
+        normalized = {} if isinstance(data, dict) else []
+        stack = [(data, normalized)]
+        while stack:
+            source, target = stack.pop()
+            if isinstance(source, dict):
+                for key, value in source.items():
+                    if key == 'fills' and isinstance(value, list):
+                        target[key] = self._normalize_fills(value)
+                    elif isinstance(value, (dict, list)):
+                        target[key] = {} if isinstance(value, dict) else []
+                        stack.append((value, target[key]))
+                    else:
+                        target[key] = value
+            else:
+                for item in source:
+                    if isinstance(item, (dict, list)):
+                        target.append({} if isinstance(item, dict) else [])
+                        stack.append((item, target[-1]))
+                    else:
+                        target.append(item)
+        return normalized
+    
+    def normalize_node_colors(self, node: Dict[str, Any], children: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Normalize colors of one node whose children are already normalized.
+        
+        Same result as normalize_colors() on the node, for use in a
+        single-pass traversal.
+        
+        Args:
+            node (dict): Node to normalize
+            children (list): Normalized children of the node
+            
+        Returns:
+            dict: Node with normalized colors
+        """
+        normalized = {}
+        for key, value in node.items():
+            if key == 'fills' and isinstance(value, list):
+                normalized[key] = self._normalize_fills(value)
+            elif key == 'children' and isinstance(value, list):
+                normalized[key] = children
+            elif isinstance(value, (dict, list)):
+                normalized[key] = self.normalize_colors(value)
+            else:
+                normalized[key] = value
+        return normalized
+    
+    def traversal_stages(self, keep_fields: Optional[set] = None) -> List[TransformStage]:
+        """Create stages producing clean(), remove_empty_fields() and
+        normalize_colors() output of a node tree in one shared traversal.
+        
+        Args:
+            keep_fields (set, optional): Fields to keep when cleaning. Defaults to KEEP_FIELDS.
+            
+        Returns:
+            list: 'clean', 'remove_empty' and 'normalize_colors' stages
+        """
+        return [
+            TransformStage('clean', lambda node, children: self.clean_node(node, children, keep_fields)),
+            TransformStage('remove_empty', self.remove_empty_node_fields),
+            TransformStage('normalize_colors', self.normalize_node_colors)
+        ]
     
     def _normalize_fills(self, fills: list) -> list:
         """Normalize fill color values.
@@ -1,22 +1,69 @@
 """Distance calculator for calculating layout distances between Figma elements."""
 
 from typing import Dict, Any, List, Tuple, Optional
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from ..utils.file_handler import FileHandler
+from ..utils.json_stream import iter_bounds
+from ..utils.reporting import Reporter, NullReporter
+from ..core.geometry_store import GeometryStore
+from .traversal import CollectStage
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import DISTANCE_BACKEND, DISTANCE_WORKERS
 
 
 class DistanceCalculator:
     """Calculator for distances between Figma elements."""
     
-    def __init__(self):
-        """Initialize the distance calculator."""
-        self.file_handler = FileHandler()
+    # Below this many children the NumPy setup costs more than the Python loop
+    NUMPY_MIN_CHILDREN = 24
     
-    def calculate(self, data: Dict[str, Any], target_node_id: str = '1:5055') -> Dict[str, Any]:
+    # Below this many sibling pairs in total a process pool costs more than it saves
+    PARALLEL_MIN_PAIRS = 20000
+    # Tasks per worker; more, smaller tasks even out uneven parents
+    PARALLEL_TASKS_PER_WORKER = 4
+    
+    def __init__(self, backend: str = DISTANCE_BACKEND, workers: Optional[int] = DISTANCE_WORKERS,
+                 reporter: Optional[Reporter] = None):
+        """Initialize the distance calculator.
+        
+        Args:
+            backend (str): 'python', 'numpy' or 'auto'. 'auto' uses NumPy for
+                larger sibling groups when it is installed and Python otherwise.
+            workers (int, optional): Processes used to split parent nodes across;
+                1 calculates in this process, None uses every CPU
+            reporter (Reporter, optional): Receives one event per parent and per
+                pair of children. Silent by default.
+        """
+        if backend not in ('python', 'numpy', 'auto'):
+            raise ValueError(f"Unknown distance backend: {backend}")
+        if backend == 'numpy' and np is None:
+            raise ImportError("The numpy distance backend requires numpy")
+        
+        self.backend = backend
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.reporter = reporter or NullReporter()
+        self.file_handler = FileHandler(reporter=self.reporter)
+    
+    def calculate(self, data: Dict[str, Any], target_node_id: str = '1:5055',
+                  geometry: Optional[GeometryStore] = None) -> Dict[str, Any]:
         """Calculate distances between sibling elements in Figma data.
         
         Args:
             data (dict): Figma file data
             target_node_id (str): Target node ID to analyze
+            geometry (GeometryStore, optional): Boxes of the same document, read
+                instead of the nodes' absoluteBoundingBox dicts
             
         Returns:
             dict: Distance calculation results
@@ -34,70 +81,291 @@ class DistanceCalculator:
                 if 'children' in node and node['children']:
                     parent_nodes.append(node)
         
+        return self._calculate_for_parents(parent_nodes, geometry)
+    
+    def calculate_stream(self, source: Any, target_node_id: str = '1:5055') -> Dict[str, Any]:
+        """Calculate sibling distances while parsing a /nodes response as a stream.
+        
+        Only ids, names and bounding boxes are kept while reading, so large
+        responses are never loaded as a whole. The result is the same as
+        calculate() on the same data.
+        
+        Args:
+            source (str|Path|file): Saved /nodes response or an open stream
+            target_node_id (str): Target node ID to analyze
+            
+        Returns:
+            dict: Distance calculation results
+        """
+        root_paths = (('nodes', target_node_id, 'document'),)
+        parent_nodes = [
+            record for record in iter_bounds(source, root_paths, with_children=True)
+            if record['child_count']
+        ]
+        # Records arrive children-first; restore document (pre-)order
+        parent_nodes.sort(key=lambda record: record['order'])
+        return self._calculate_for_parents(parent_nodes)
+    
+    def _calculate_for_parents(self, parent_nodes: List[Dict[str, Any]],
+                               geometry: Optional[GeometryStore] = None,
+                               distances: Optional[List[List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """Calculate distances between the children of each parent node.
+        
+        Args:
+            parent_nodes (list): Nodes with bounds and children, in document order
+            geometry (GeometryStore, optional): Boxes of the document
+            distances (list, optional): Entries already known for each parent
+                with children, in order; calculated when omitted
+            
+        Returns:
+            dict: Distance calculation results keyed by parent ID
+        """
+        reporter = self.reporter
         if not parent_nodes:
-            print("Không tìm thấy các node có chứa children để tính khoảng cách.")
+            reporter.emit('distances.empty')
             return {}
         
-        print("✅ Tính toán khoảng cách giữa các đối tượng anh em ruột (siblings):\n")
+        reporter.emit('distances.start')
+        
+        parents = [parent for parent in parent_nodes if parent.get('children')]
+        if distances is None:
+            distances = self._distances_for_parents(parents, geometry)
         
         results = {}
         
-        for parent in parent_nodes:
-            if not parent.get('children'):
-                continue
-            
+        for parent, parent_results in zip(parents, distances):
             parent_id = parent['id']
             parent_name = parent['name']
             
-            print(f"Parent Node: {parent_name} (ID: {parent_id})")
-            
-            children = parent['children']
-            parent_results = []
-            
-            # Calculate distances between all pairs of children
-            for i in range(len(children)):
-                for j in range(i + 1, len(children)):
-                    node1 = children[i]
-                    node2 = children[j]
-                    
-                    # Ensure both nodes have absoluteBoundingBox
-                    if 'absoluteBoundingBox' not in node1 or 'absoluteBoundingBox' not in node2:
-                        continue
-                    
-                    h_dist, v_dist = self._calculate_distance(node1, node2)
-                    if h_dist is not None and v_dist is not None:
-                        distance_info = {
-                            'node1': {
-                                'id': node1['id'],
-                                'name': node1.get('name', 'Unknown')
-                            },
-                            'node2': {
-                                'id': node2['id'],
-                                'name': node2.get('name', 'Unknown')
-                            },
-                            'horizontal_distance': round(h_dist, 2),
-                            'vertical_distance': round(v_dist, 2)
-                        }
-                        parent_results.append(distance_info)
-                        
-                        print(f"  Khoảng cách giữa '{node1.get('name', 'Unknown')}' (ID: {node1['id']}) và '{node2.get('name', 'Unknown')}' (ID: {node2['id']}):")
-                        print(f"    Ngang: {h_dist:.2f}")
-                        print(f"    Dọc: {v_dist:.2f}")
-            
             results[parent_id] = {
                 'parent_name': parent_name,
                 'distances': parent_results
             }
             
-            print("-" * 60)
+            if not reporter.enabled:
+                continue
+            
+            reporter.emit('distances.parent', parent_id=parent_id, parent_name=parent_name)
+            # Rounding to 2 places first does not change the 2-decimal console output
+            for distance_info in parent_results:
+                node1 = distance_info['node1']
+                node2 = distance_info['node2']
+                reporter.emit('distances.pair', node1_id=node1['id'], node1_name=node1['name'],
+                              node2_id=node2['id'], node2_name=node2['name'],
+                              horizontal_distance=distance_info['horizontal_distance'],
+                              vertical_distance=distance_info['vertical_distance'])
+            reporter.emit('distances.parent_done', parent_id=parent_id)
         
         return results
     
+    def _distances_for_parents(self, parents: List[Dict[str, Any]],
+                               geometry: Optional[GeometryStore] = None) -> List[List[Dict[str, Any]]]:
+        """Calculate the distance entries of each parent, on a process pool if configured.
+        
+        Args:
+            parents (list): Parent nodes with children, in document order
+            geometry (GeometryStore, optional): Boxes of the document
+            
+        Returns:
+            list: Distance entries per parent, in input order
+        """
+        if self.workers > 1:
+            return self._parallel_distances(parents, geometry)
+        return [self._distance_entries(parent['children'], geometry) for parent in parents]
+    
+    def _distance_entries(self, children: List[Dict[str, Any]],
+                          geometry: Optional[GeometryStore] = None) -> List[Dict[str, Any]]:
+        """Build the distance entries between every pair of children of one parent.
+        
+        Args:
+            children (list): Child nodes of one parent
+            geometry (GeometryStore, optional): Boxes of the document
+            
+        Returns:
+            list: Distance info per pair of children with bounding boxes
+        """
+        entries = []
+        for node1, node2, h_dist, v_dist in self._child_distances(children, geometry):
+            entries.append({
+                'node1': {
+                    'id': node1['id'],
+                    'name': node1.get('name', 'Unknown')
+                },
+                'node2': {
+                    'id': node2['id'],
+                    'name': node2.get('name', 'Unknown')
+                },
+                'horizontal_distance': round(h_dist, 2),
+                'vertical_distance': round(v_dist, 2)
+            })
+        return entries
+    
+    def _parallel_distances(self, parents: List[Dict[str, Any]],
+                            geometry: Optional[GeometryStore] = None) -> List[List[Dict[str, Any]]]:
+        """Calculate the distance entries of many parents on a process pool.
+        
+        Workers never receive the node tree: each parent is reduced to a
+        tuple of (id, name, x, y, width, height) rows for its children with
+        bounding boxes. Parents are split into contiguous chunks of similar
+        pair counts and results come back in input order, so the output is
+        identical to the serial calculation.
+        
+        Args:
+            parents (list): Parent nodes with children, in document order
+            geometry (GeometryStore, optional): Boxes of the document
+            
+        Returns:
+            list: Distance entries per parent, in input order
+        """
+        rows = []
+        for parent in parents:
+            parent_rows = []
+            for child in parent['children']:
+                if geometry is not None:
+                    box = geometry.get(child.get('id'))
+                else:
+                    box = child.get('absoluteBoundingBox')
+                    box = box and (box['x'], box['y'], box['width'], box['height'])
+                if box:
+                    parent_rows.append((child['id'], child.get('name', 'Unknown')) + box)
+            rows.append(tuple(parent_rows))
+        
+        pair_counts = [len(parent_rows) * (len(parent_rows) - 1) // 2 for parent_rows in rows]
+        total_pairs = sum(pair_counts)
+        if total_pairs < self.PARALLEL_MIN_PAIRS:
+            return [self._distance_entries(parent['children'], geometry) for parent in parents]
+        
+        chunks = []
+        chunk = []
+        chunk_pairs = 0
+        target = max(1, total_pairs // (self.workers * self.PARALLEL_TASKS_PER_WORKER))
+        for parent_rows, pairs in zip(rows, pair_counts):
+            chunk.append(parent_rows)
+            chunk_pairs += pairs
+            if chunk_pairs >= target:
+                chunks.append(chunk)
+                chunk = []
+                chunk_pairs = 0
+        if chunk:
+            chunks.append(chunk)
+        
+        distances = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+            for chunk_results in executor.map(_distance_chunk, chunks, [self.backend] * len(chunks)):
+                distances.extend(chunk_results)
+        return distances
+    
+    def _child_distances(self, children: List[Dict[str, Any]],
+                         geometry: Optional[GeometryStore] = None) -> List[Tuple[Dict[str, Any], Dict[str, Any], float, float]]:
+        """Compute gaps between every pair of children that have bounding boxes.
+        
+        Args:
+            children (list): Child nodes of one parent
+            geometry (GeometryStore, optional): Boxes of the document; read
+                instead of each child's absoluteBoundingBox dict
+            
+        Returns:
+            list: (node1, node2, horizontal_distance, vertical_distance) per pair,
+                in (i, j) order with i < j
+        """
+        nodes = []
+        boxes = []
+        if geometry is not None:
+            numbers = geometry.numbers
+            for node in children:
+                number = numbers.get(node.get('id'))
+                if number is not None:
+                    nodes.append(node)
+                    boxes.append(geometry.box(number))
+        else:
+            for node in children:
+                box = node.get('absoluteBoundingBox')
+                if box:
+                    nodes.append(node)
+                    boxes.append((box['x'], box['y'], box['width'], box['height']))
+        
+        if self.backend == 'numpy' or (
+            self.backend == 'auto' and np is not None and len(boxes) >= self.NUMPY_MIN_CHILDREN
+        ):
+            return self._child_distances_numpy(nodes, boxes)
+        
+        # Boxes are unpacked once per child rather than read from dicts for every pair
+        pairs = []
+        box_gaps = self._box_gaps
+        for i, box1 in enumerate(boxes):
+            node1 = nodes[i]
+            for j in range(i + 1, len(boxes)):
+                h_dist, v_dist = box_gaps(box1, boxes[j])
+                pairs.append((node1, nodes[j], h_dist, v_dist))
+        return pairs
+    
+    def _child_distances_numpy(self, nodes: List[Dict[str, Any]],
+                               boxes: List[Tuple[Any, Any, Any, Any]]) -> List[Tuple[Dict[str, Any], Dict[str, Any], float, float]]:
+        """Vectorized _child_distances: one array operation per block of pairs.
+        
+        Same values and types as the pure-Python path: gaps are computed in
+        float64 like Python floats, and pairs whose Python result would be an
+        int (integer coordinates, or the clipped overlap 0) are returned as ints.
+        """
+        count = len(nodes)
+        if count < 2:
+            return []
+        
+        values = np.array(boxes, dtype=np.float64)
+        is_int = np.array([[type(v) is int for v in box] for box in boxes], dtype=bool)
+        
+        pairs = []
+        # Rows per block keep the (rows x count) temporaries around a million cells
+        block = max(1, (1 << 20) // count)
+        for start in range(0, count - 1, block):
+            rows = np.arange(start, min(start + block, count - 1))
+            i, j = np.nonzero(rows[:, None] < np.arange(count)[None, :])
+            i = rows[i]
+            h_dist, h_int = self._axis_gaps(values[:, 0], values[:, 2], is_int[:, 0], is_int[:, 2], i, j)
+            v_dist, v_int = self._axis_gaps(values[:, 1], values[:, 3], is_int[:, 1], is_int[:, 3], i, j)
+            pairs.extend(zip(map(nodes.__getitem__, i.tolist()), map(nodes.__getitem__, j.tolist()),
+                             self._to_python(h_dist, h_int), self._to_python(v_dist, v_int)))
+        return pairs
+    
+    @staticmethod
+    def _to_python(values, is_int) -> List[float]:
+        """Convert gaps to Python numbers, as int where Python arithmetic gives an int."""
+        result = values.tolist()
+        for index in np.flatnonzero(is_int).tolist():
+            result[index] = int(result[index])
+        return result
+    
+    @staticmethod
+    def _axis_gaps(start, size, start_int, size_int, i, j):
+        """Gap along one axis for pairs (i, j), mirroring _calculate_distance.
+        
+        Returns:
+            tuple: (gaps, is_int) arrays; is_int marks results Python computes as int
+        """
+        s1, s2 = start[i], start[j]
+        e1, e2 = s1 + size[i], s2 + size[j]
+        s1_int, s2_int = start_int[i], start_int[j]
+        e1_int, e2_int = s1_int & size_int[i], s2_int & size_int[j]
+        
+        first_before = e1 < s2
+        second_before = ~first_before & (e2 < s1)
+        overlapping = ~first_before & ~second_before
+        
+        # max() and min() return the first argument on ties, which fixes the result type
+        overlap = np.where(s2 > s1, s2, s1) - np.where(e2 < e1, e2, e1)
+        overlap_int = np.where(s2 > s1, s2_int, s1_int) & np.where(e2 < e1, e2_int, e1_int)
+        clipped = overlapping & (overlap < 0)
+        
+        gaps = np.where(first_before, s2 - e1, np.where(second_before, s1 - e2, np.where(clipped, 0.0, overlap)))
+        gaps_int = np.where(first_before, s2_int & e1_int,
+                            np.where(second_before, s1_int & e2_int, clipped | overlap_int))
+        return gaps, gaps_int
+    
     def _get_nodes_with_bounds(self, node: Dict[str, Any], nodes_with_bounds: Optional[List] = None) -> List[Dict[str, Any]]:
-        """Recursively find all nodes with 'absoluteBoundingBox'.
+        """Find all nodes with 'absoluteBoundingBox' in document order.
         
         Args:
-            node (dict): Current node to search
+            node (dict): Root node to search
             nodes_with_bounds (list, optional): List to append nodes to
             
         Returns:
@@ -106,15 +374,25 @@ class DistanceCalculator:
         if nodes_with_bounds is None:
             nodes_with_bounds = []
         
-        if 'absoluteBoundingBox' in node:
-            nodes_with_bounds.append(node)
-        
-        if 'children' in node:
-            for child in node['children']:
-                self._get_nodes_with_bounds(child, nodes_with_bounds)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if 'absoluteBoundingBox' in node:
+                nodes_with_bounds.append(node)
+            
+            if 'children' in node:
+                stack.extend(reversed(node['children']))
         
         return nodes_with_bounds
     
+    def traversal_stage(self) -> CollectStage:
+        """Create a stage collecting the same nodes as _get_nodes_with_bounds() in a shared traversal.
+        
+        Returns:
+            CollectStage: 'bounds' stage
+        """
+        return CollectStage('bounds', lambda node: node if 'absoluteBoundingBox' in node else None)
+    
     def _calculate_distance(self, node1: Dict[str, Any], node2: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
         """Calculate horizontal and vertical distances between two nodes.
         
@@ -131,13 +409,16 @@ class DistanceCalculator:
         if not bounds1 or not bounds2:
             return None, None
         
-        x1, y1 = bounds1['x'], bounds1['y']
-        w1, h1 = bounds1['width'], bounds1['height']
-        x2, y2 = bounds2['x'], bounds2['y']
-        w2, h2 = bounds2['width'], bounds2['height']
+        return self._box_gaps((bounds1['x'], bounds1['y'], bounds1['width'], bounds1['height']),
+                              (bounds2['x'], bounds2['y'], bounds2['width'], bounds2['height']))
+    
+    @staticmethod
+    def _box_gaps(box1: Tuple[Any, Any, Any, Any], box2: Tuple[Any, Any, Any, Any]) -> Tuple[float, float]:
+        """Calculate horizontal and vertical distances between two (x, y, width, height) boxes."""
+        x1, y1, w1, h1 = box1
+        x2, y2, w2, h2 = box2
         
         # Calculate horizontal distance
-        horz_dist = 0
         if x1 + w1 < x2:  # node1 is to the left of node2
             horz_dist = x2 - (x1 + w1)
         elif x2 + w2 < x1:  # node2 is to the left of node1
@@ -148,7 +429,6 @@ class DistanceCalculator:
                 horz_dist = 0  # Consider overlap as 0 distance
         
         # Calculate vertical distance
-        vert_dist = 0
         if y1 + h1 < y2:  # node1 is above node2
             vert_dist = y2 - (y1 + h1)
         elif y2 + h2 < y1:  # node2 is above node1
@@ -172,3 +452,15 @@ class DistanceCalculator:
         """
         data = self.file_handler.load_json(file_path)
         return self.calculate(data, target_node_id)
+
+
+def _distance_chunk(chunk: List[Tuple[Tuple[Any, ...], ...]], backend: str) -> List[List[Dict[str, Any]]]:
+    """Process pool task: distance entries for a chunk of parents' child rows."""
+    calculator = DistanceCalculator(backend=backend, workers=1)
+    return [
+        calculator._distance_entries([
+            {'id': node_id, 'name': name, 'absoluteBoundingBox': {'x': x, 'y': y, 'width': width, 'height': height}}
+            for node_id, name, x, y, width, height in parent_rows
+        ])
+        for parent_rows in chunk
+    ]
@@ -0,0 +1,256 @@
+"""Memoized filter_node for repeated component instance subtrees."""
+
+import math
+from collections import OrderedDict
+from itertools import repeat
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+from pathlib import Path
+from .data_cleaner import DataCleaner
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import KEEP_FIELDS, FILTER_MEMO_SIZE
+
+# Coordinates must be multiples of 2**-30 below 2**21 in magnitude, which
+# covers whole pixels and float32 values on any realistic canvas: every sum
+# and difference filter_node takes is then exact in a float, so the layout
+# of a translated copy is bit-for-bit the same
+_GRID = 2.0 ** 30
+_LIMIT = 2.0 ** 21
+
+
+def _exact(value: Any) -> bool:
+    return (type(value) is float and abs(value) < _LIMIT and (value * _GRID).is_integer()
+            and (value != 0 or math.copysign(1.0, value) > 0))
+
+
+class FilterMemo:
+    """DataCleaner.filter_node that computes the layout of repeated subtrees once.
+
+    Instances of one component repeat the same subtree at other positions:
+    list rows, cards, status bars. filter_node copies the kept fields of
+    every node, which only costs references, and then computes padding and
+    siblingsLayout, which is most of its time and depends only on the
+    subtree's geometry relative to its origin. Instance subtrees are keyed by
+    that geometry (relative boxes and child counts in pre-order), so a copy
+    elsewhere on the page, or one with other texts or fills, reuses the
+    layout of the first copy with its own ids as targetIds. Outputs are
+    identical to DataCleaner.filter_node.
+
+    Subtrees with coordinates off a 2**-30 grid, non-float coordinates, or
+    boxed siblings sharing an id are filtered normally. Nested instances are
+    looked up again when their outer instance misses.
+    """
+
+    def __init__(self, data_cleaner: Optional[DataCleaner] = None, keep_fields: Optional[set] = None,
+                 max_entries: int = FILTER_MEMO_SIZE, node_types: Tuple[str, ...] = ('INSTANCE',)):
+        """Initialize the memo.
+
+        Args:
+            data_cleaner (DataCleaner, optional): Cleaner providing padding and sibling layout
+            keep_fields (set, optional): Fields to keep. Defaults to KEEP_FIELDS.
+            max_entries (int): Subtree layouts kept, least recently used dropped first
+            node_types (tuple): Node types whose subtrees are memoized
+        """
+        self.data_cleaner = data_cleaner or DataCleaner()
+        self.keep_fields = KEEP_FIELDS if keep_fields is None else keep_fields
+        self.max_entries = max_entries
+        self.node_types = set(node_types)
+        # layout key -> per pre-order node (padding, [(sibling position, relation, distance)])
+        self._entries: 'OrderedDict[tuple, List[Tuple[Optional[dict], Optional[list]]]]' = OrderedDict()
+        self._counts = {'lookups': 0, 'hits': 0, 'misses': 0, 'uncacheable': 0,
+                        'reused_nodes': 0, 'evictions': 0}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Lookups, hits, misses and hit rate since creation or the last clear()."""
+        lookups = self._counts['lookups']
+        return {**self._counts, 'entries': len(self._entries),
+                'hit_rate': round(self._counts['hits'] / lookups, 4) if lookups else 0.0}
+
+    def clear(self) -> None:
+        """Forget every memoized layout and reset the counters."""
+        self._entries.clear()
+        for key in self._counts:
+            self._counts[key] = 0
+
+    def filter_node(self, node: Dict[str, Any], parent_box: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Filter and clean a node tree, keeping only relevant fields.
+
+        Args:
+            node (dict): Raw node data from Figma
+            parent_box (dict, optional): Parent bounding box for padding calculation
+
+        Returns:
+            dict: Filtered node data, as DataCleaner.filter_node returns it
+        """
+        keep_fields = self.keep_fields
+        cleaner = self.data_cleaner
+        memoize = self.max_entries > 0
+
+        root = {}
+        # Same entries and order as DataCleaner.filter_node, plus
+        # ('store', key, raw_nodes, new) once a missed subtree is complete
+        stack = [('node', node, root, parent_box)]
+        while stack:
+            entry = stack.pop()
+
+            if entry[0] == 'siblings':
+                cleaner._process_siblings(entry[1])
+                continue
+            if entry[0] == 'padding':
+                _, new_node, box, current_box = entry
+                new_node['padding'] = cleaner._extract_padding(box, current_box)
+                continue
+            if entry[0] == 'store':
+                self._store(*entry[1:])
+                continue
+
+            _, raw_node, new_node, box = entry
+            current_box = raw_node.get('absoluteBoundingBox')
+
+            if memoize and raw_node.get('type') in self.node_types and raw_node.get('children'):
+                keyed = self._layout_key(raw_node)
+                if keyed is None:
+                    self._counts['uncacheable'] += 1
+                else:
+                    key, raw_nodes = keyed
+                    self._counts['lookups'] += 1
+                    template = self._entries.get(key)
+                    if template is not None:
+                        self._entries.move_to_end(key)
+                        self._counts['hits'] += 1
+                        self._counts['reused_nodes'] += len(raw_nodes)
+                        self._instantiate(raw_node, new_node, template)
+                        if box and current_box:
+                            new_node['padding'] = cleaner._extract_padding(box, current_box)
+                        continue
+                    self._counts['misses'] += 1
+                    stack.append(('store', key, raw_nodes, new_node))
+
+            # Calculate padding if parent box is available (after all fields)
+            if box and current_box:
+                stack.append(('padding', new_node, box, current_box))
+
+            # Copy relevant fields
+            for key, value in raw_node.items():
+                if key in keep_fields:
+                    if key == 'children':
+                        new_children = [{} for _ in value]
+                        new_node[key] = new_children
+                        stack.append(('siblings', new_children))
+                        stack.extend(
+                            ('node', child, new_child, current_box)
+                            for child, new_child in zip(reversed(value), reversed(new_children))
+                        )
+                    else:
+                        new_node[key] = value
+
+        return root
+
+    def _layout_key(self, root: Dict[str, Any]) -> Optional[Tuple[tuple, List[Dict[str, Any]]]]:
+        """Key of everything padding and sibling layout read from a subtree.
+
+        Returns:
+            tuple: The key and the subtree's raw nodes in pre-order, or None
+                when the subtree's coordinates are not exact
+        """
+        origin = root.get('absoluteBoundingBox')
+        if not origin:
+            return None
+        ox, oy = origin.get('x'), origin.get('y')
+        descend = 'children' in self.keep_fields
+
+        key = []
+        raw_nodes = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            raw_nodes.append(node)
+            box = node.get('absoluteBoundingBox')
+            if box:
+                x, y, width, height = box.get('x'), box.get('y'), box.get('width'), box.get('height')
+                if not (_exact(x) and _exact(y) and _exact(width) and _exact(height)):
+                    return None
+                geometry = (x - ox, y - oy, width, height)
+            else:
+                geometry = None
+            children = node.get('children') if descend else None
+            if children is None:
+                key.append((geometry, -1))
+            else:
+                key.append((geometry, len(children)))
+                stack.extend(reversed(children))
+        return tuple(key), raw_nodes
+
+    def _store(self, key: tuple, raw_nodes: List[Dict[str, Any]], new_root: Dict[str, Any]) -> None:
+        """Remember the padding and sibling layout of a filtered subtree.
+
+        targetIds are kept as sibling positions, so subtrees whose boxed
+        siblings share an id are not stored.
+        """
+        template = []
+        position = 0
+        stack = [(new_root, None)]
+        while stack:
+            new_node, sibling_positions = stack.pop()
+            raw_node = raw_nodes[position]
+            padding = new_node.get('padding') if position else None
+            if padding is not None:
+                padding = dict(padding)
+            layout = new_node.get('siblingsLayout')
+            if layout is not None:
+                layout = [(sibling_positions[item['targetId']], item['relation'], item['distance'])
+                          for item in layout]
+            template.append((padding, layout))
+            position += 1
+
+            children = new_node.get('children')
+            if children is not None and raw_node.get('children') is not None:
+                positions = {}
+                boxed = 0
+                for index, child in enumerate(raw_node['children']):
+                    if child.get('absoluteBoundingBox'):
+                        positions[child.get('id')] = index
+                        boxed += 1
+                if len(positions) != boxed:
+                    return
+                stack.extend(zip(reversed(children), repeat(positions)))
+
+        self._entries[key] = template
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counts['evictions'] += 1
+
+    def _instantiate(self, raw_root: Dict[str, Any], new_root: Dict[str, Any],
+                     template: List[Tuple[Optional[dict], Optional[list]]]) -> None:
+        """Fill new_root with the kept fields of a subtree and its memoized layout.
+
+        The root's padding is left to the caller, since it depends on the parent box.
+        """
+        keep_fields = self.keep_fields
+        position = 0
+        stack = [(raw_root, new_root, None)]
+        while stack:
+            raw_node, new_node, siblings = stack.pop()
+            padding, layout = template[position]
+            position += 1
+
+            for key, value in raw_node.items():
+                if key in keep_fields:
+                    if key == 'children':
+                        new_children = [{} for _ in value]
+                        new_node[key] = new_children
+                        stack.extend(zip(reversed(value), reversed(new_children), repeat(value)))
+                    else:
+                        new_node[key] = value
+
+            if padding is not None:
+                new_node['padding'] = dict(padding)
+            if layout is not None:
+                new_node['siblingsLayout'] = [
+                    {"targetId": siblings[index].get("id"), "relation": relation, "distance": distance}
+                    for index, relation, distance in layout
+                ]
@@ -0,0 +1,377 @@
+"""Incremental cleaning and distance calculation across document versions."""
+
+import hashlib
+import json
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+from pathlib import Path
+from .data_cleaner import DataCleaner
+from .distance_calculator import DistanceCalculator
+from ..utils.file_handler import FileHandler
+from ..utils.reporting import Reporter, NullReporter
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import KEEP_FIELDS, DISTANCE_TOLERANCE
+
+STATE_VERSION = 1
+
+
+def _digest(payload: str) -> bytes:
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+class IncrementalProcessor:
+    """Re-run filter_node, sibling layout and distances only where a document changed.
+
+    Every node gets a Merkle hash of the fields the outputs depend on and the
+    hashes of its children. A node whose hash and parent box match the
+    previous run reuses its whole filtered subtree; changed nodes and their
+    ancestors are filtered again, with sibling layout recalculated for their
+    children. Distances are reused per parent while the ids, names and boxes
+    of its children are unchanged. Outputs are identical to
+    ``DataCleaner.filter_node`` and ``DistanceCalculator.calculate`` on the
+    whole tree.
+
+    Nodes without an id, or whose id occurs more than once, are always
+    recalculated. Reused subtrees are shared between the outputs of
+    consecutive runs, so outputs must be treated as read-only.
+    """
+
+    def __init__(self, data_cleaner: Optional[DataCleaner] = None,
+                 distance_calculator: Optional[DistanceCalculator] = None,
+                 keep_fields: Optional[set] = None, file_handler: Optional[FileHandler] = None,
+                 state_filename: Optional[str] = None, reporter: Optional[Reporter] = None):
+        """Initialize the incremental processor.
+
+        Args:
+            data_cleaner (DataCleaner, optional): Cleaner providing padding and sibling layout
+            distance_calculator (DistanceCalculator, optional): Calculator for changed parents
+            keep_fields (set, optional): Fields to keep. Defaults to KEEP_FIELDS.
+            file_handler (FileHandler, optional): Handler used to persist state
+            state_filename (str, optional): File the state is loaded from before
+                the first run and saved to after every run. None keeps it in memory.
+            reporter (Reporter, optional): Receives one event per run. Silent by default.
+        """
+        self.data_cleaner = data_cleaner or DataCleaner()
+        self.distance_calculator = distance_calculator or DistanceCalculator()
+        self.keep_fields = set(KEEP_FIELDS if keep_fields is None else keep_fields)
+        self.reporter = reporter or NullReporter()
+        self.file_handler = file_handler or FileHandler(reporter=self.reporter)
+        self.state_filename = state_filename
+
+        # Fields the outputs depend on; distances also read ids, names and boxes
+        self._hashed_fields = self.keep_fields | {'id', 'name', 'absoluteBoundingBox'}
+        # node id -> (subtree hash, parent box key, children layout key,
+        # filtered node in the last output)
+        self._nodes: Dict[str, Tuple[bytes, Optional[str], Optional[bytes], Dict[str, Any]]] = {}
+        # parent id -> (children key, distance entries)
+        self._distances: Dict[str, Tuple[bytes, List[Dict[str, Any]]]] = {}
+        self._clean = None
+        self._state_loaded = state_filename is None
+        self.stats: Dict[str, Any] = {}
+
+    def process(self, node: Dict[str, Any], parent_box: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Filter a node tree and calculate sibling distances, reusing unchanged parts.
+
+        Args:
+            node (dict): Root node, e.g. a file's document or a /nodes document
+            parent_box (dict, optional): Parent bounding box for the root's padding
+
+        Returns:
+            dict: 'clean', the filter_node output, and 'distances', the
+                calculate() output for the same tree
+        """
+        if not self._state_loaded:
+            self.load_state()
+
+        start = time.perf_counter()
+        nodes, child_lists, digests, sizes, unique = self._hash_tree(node)
+        clean, reused = self._filter(nodes, child_lists, digests, sizes, unique, parent_box)
+        distances, distances_reused, parent_count = self._calculate_distances(nodes, unique)
+        self._clean = clean
+
+        self.stats = {
+            'nodes': len(nodes),
+            'reused_nodes': reused,
+            'recomputed_nodes': len(nodes) - reused,
+            'parents': parent_count,
+            'reused_distances': distances_reused,
+            'seconds': round(time.perf_counter() - start, 4)
+        }
+        self.reporter.emit('incremental.done', **self.stats)
+
+        if self.state_filename:
+            self.save_state()
+        return {'clean': clean, 'distances': distances}
+
+    def _hash_tree(self, root: Dict[str, Any]):
+        """Number nodes in pre-order and hash every subtree, without recursion.
+
+        Returns:
+            tuple: nodes, child index lists, subtree hashes, subtree sizes and
+                the ids occurring exactly once
+        """
+        nodes = []
+        child_lists = []
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(nodes)
+            nodes.append(node)
+            child_lists.append([])
+            if parent >= 0:
+                child_lists[parent].append(index)
+            children = node.get('children')
+            if isinstance(children, list):
+                stack.extend((child, index) for child in reversed(children))
+
+        seen = set()
+        duplicates = set()
+        for node in nodes:
+            node_id = node.get('id')
+            if node_id in seen:
+                duplicates.add(node_id)
+            seen.add(node_id)
+        unique = {node_id for node_id in seen - duplicates if isinstance(node_id, str)}
+
+        hashed_fields = self._hashed_fields
+        digests = [b''] * len(nodes)
+        sizes = [1] * len(nodes)
+        # Children follow their parent in pre-order, so walk backwards
+        for index in range(len(nodes) - 1, -1, -1):
+            node = nodes[index]
+            fields = {
+                key: (len(value) if key == 'children' and isinstance(value, list) else value)
+                for key, value in node.items() if key in hashed_fields
+            }
+            digest = hashlib.blake2b(json.dumps(fields, separators=(',', ':')).encode('utf-8'),
+                                     digest_size=16)
+            for child in child_lists[index]:
+                digest.update(digests[child])
+                sizes[index] += sizes[child]
+            digests[index] = digest.digest()
+        return nodes, child_lists, digests, sizes, unique
+
+    def _filter(self, nodes, child_lists, digests, sizes, unique,
+                parent_box: Optional[Dict[str, float]]) -> Tuple[Dict[str, Any], int]:
+        """Build the filter_node output, reusing subtrees whose hash is unchanged.
+
+        Returns:
+            tuple: Filtered root and the number of nodes in reused subtrees
+        """
+        keep_fields = self.keep_fields
+        cleaner = self.data_cleaner
+        old_nodes = self._nodes
+        new_nodes = {}
+        reused = 0
+
+        holder = [None]
+        # Entries are ('node', index, slots, slot, parent_box) to place a node
+        # in a list slot, ('siblings', new_children, child_ids, reuse_layout)
+        # once a node's children are all placed and ('padding', new,
+        # parent_box, current_box) once a whole subtree is done, in the same
+        # order as DataCleaner.filter_node
+        stack = [('node', 0, holder, 0, parent_box)]
+        while stack:
+            entry = stack.pop()
+
+            if entry[0] == 'siblings':
+                _, new_children, child_ids, reuse_layout = entry
+                if reuse_layout:
+                    # Same ids and positions as last time: same sibling layout
+                    for new_child, child_id in zip(new_children, child_ids):
+                        layout = old_nodes[child_id][3].get('siblingsLayout')
+                        if layout is not None:
+                            new_child['siblingsLayout'] = layout
+                else:
+                    cleaner._process_siblings(new_children)
+                continue
+            if entry[0] == 'padding':
+                _, new_node, box, current_box = entry
+                new_node['padding'] = cleaner._extract_padding(box, current_box)
+                continue
+
+            _, index, slots, slot, box = entry
+            raw_node = nodes[index]
+            node_id = raw_node.get('id')
+            current_box = raw_node.get('absoluteBoundingBox')
+            box_key = json.dumps(box) if box else None
+
+            previous = old_nodes.get(node_id) if node_id in unique else None
+            if previous is not None and previous[0] == digests[index]:
+                new_node = self._reuse(previous, box_key, box, current_box, is_root=slots is holder)
+                slots[slot] = new_node
+                new_nodes[node_id] = (digests[index], box_key, previous[2], new_node)
+                # The subtree is contiguous in pre-order; carry its entries over
+                for descendant in range(index + 1, index + sizes[index]):
+                    descendant_id = nodes[descendant].get('id')
+                    if descendant_id in old_nodes and descendant_id in unique:
+                        new_nodes[descendant_id] = old_nodes[descendant_id]
+                reused += sizes[index]
+                continue
+
+            new_node = {}
+            slots[slot] = new_node
+            child_ids = [nodes[child].get('id') for child in child_lists[index]]
+            layout_key = self._layout_key(nodes, child_lists[index], unique)
+            # Every child must be looked up by an id of its own, boxed or not:
+            # a box-less child sharing an id would pick up another node's layout
+            reuse_layout = (layout_key is not None and previous is not None and previous[2] == layout_key
+                            and all(child_id in unique and child_id in old_nodes for child_id in child_ids))
+            if node_id in unique:
+                new_nodes[node_id] = (digests[index], box_key, layout_key, new_node)
+
+            # Calculate padding if parent box is available (after all fields)
+            if box and current_box:
+                stack.append(('padding', new_node, box, current_box))
+
+            # Copy relevant fields
+            for key, value in raw_node.items():
+                if key in keep_fields:
+                    if key == 'children':
+                        new_children = [None] * len(value)
+                        new_node[key] = new_children
+                        stack.append(('siblings', new_children, child_ids, reuse_layout))
+                        stack.extend(
+                            ('node', child, new_children, position, current_box)
+                            for position, child in reversed(list(enumerate(child_lists[index])))
+                        )
+                    else:
+                        new_node[key] = value
+
+        self._nodes = new_nodes
+        return holder[0], reused
+
+    @staticmethod
+    def _layout_key(nodes: List[Dict[str, Any]], children: List[int], unique: set) -> Optional[bytes]:
+        """Key of everything process_siblings reads from a node's children.
+
+        None when a positioned child has no id or a repeated one, so its
+        previous layout cannot be looked up.
+        """
+        positions = []
+        for child in children:
+            node = nodes[child]
+            box = node.get('absoluteBoundingBox')
+            if box:
+                if node.get('id') not in unique:
+                    return None
+                positions.append([node['id'], box['x'], box['y']])
+            else:
+                positions.append(None)
+        return _digest(json.dumps(positions, separators=(',', ':')))
+
+    def _reuse(self, previous, box_key: Optional[str], box, current_box, is_root: bool) -> Dict[str, Any]:
+        """Place a filtered subtree from the last output into the new one."""
+        _, previous_box_key, _, filtered = previous
+        if is_root and previous_box_key == box_key:
+            return filtered
+        # The parent is being rebuilt and sets siblingsLayout again; the
+        # padding only changes with the parent box
+        new_node = {key: value for key, value in filtered.items()
+                    if key != 'siblingsLayout' and (key != 'padding' or previous_box_key == box_key)}
+        if previous_box_key != box_key and box and current_box:
+            new_node['padding'] = self.data_cleaner._extract_padding(box, current_box)
+        return new_node
+
+    def _calculate_distances(self, nodes: List[Dict[str, Any]], unique: set) -> Tuple[Dict[str, Any], int, int]:
+        """Build the calculate() output, reusing entries of parents whose children are unchanged.
+
+        Returns:
+            tuple: Distance results, the number of reused parents and the number of parents
+        """
+        calculator = self.distance_calculator
+        old_distances = self._distances
+        new_distances = {}
+
+        parent_nodes = [node for node in nodes if 'absoluteBoundingBox' in node]
+        parents = [parent for parent in parent_nodes if parent.get('children')]
+        entries = [None] * len(parents)
+        changed = []
+        reused = 0
+        for position, parent in enumerate(parents):
+            parent_id = parent.get('id')
+            key = _digest(json.dumps([
+                [child.get('id'), child.get('name', 'Unknown'), child.get('absoluteBoundingBox')]
+                for child in parent['children']
+            ], separators=(',', ':')))
+            previous = old_distances.get(parent_id) if parent_id in unique else None
+            if previous is not None and previous[0] == key:
+                entries[position] = previous[1]
+                reused += 1
+            else:
+                changed.append(position)
+            if parent_id in unique:
+                new_distances[parent_id] = (key, position)
+
+        for position, parent_entries in zip(changed, calculator._distances_for_parents(
+                [parents[position] for position in changed])):
+            entries[position] = parent_entries
+
+        self._distances = {parent_id: (key, entries[position])
+                           for parent_id, (key, position) in new_distances.items()}
+        return calculator._calculate_for_parents(parents, distances=entries), reused, len(parents)
+
+    def save_state(self) -> Optional[Path]:
+        """Save hashes and outputs of the last run to the state file.
+
+        Returns:
+            Path: Saved file, or None if nothing has been processed yet
+        """
+        if self._clean is None or not self.state_filename:
+            return None
+        state = {
+            'version': STATE_VERSION,
+            'keep_fields': sorted(self.keep_fields),
+            'tolerance': DISTANCE_TOLERANCE,
+            'clean': self._clean,
+            'nodes': {
+                node_id: [digest.hex(), box_key, layout_key and layout_key.hex()]
+                for node_id, (digest, box_key, layout_key, _) in self._nodes.items()
+            },
+            'distances': {parent_id: [key.hex(), entries] for parent_id, (key, entries) in self._distances.items()}
+        }
+        return self.file_handler.save_json(state, self.state_filename, pretty=False)
+
+    def load_state(self) -> bool:
+        """Load hashes and outputs of an earlier run from the state file.
+
+        A missing file, or state written with other fields or tolerance,
+        leaves the processor empty so the next run recalculates everything.
+
+        Returns:
+            bool: True if state was loaded
+        """
+        self._state_loaded = True
+        try:
+            state = self.file_handler.load_json(self.state_filename)
+        except FileNotFoundError:
+            return False
+        if (state.get('version') != STATE_VERSION or state.get('keep_fields') != sorted(self.keep_fields)
+                or state.get('tolerance') != DISTANCE_TOLERANCE):
+            return False
+
+        # Filtered nodes are found again by id in the saved output
+        filtered = {}
+        stack = [state['clean']]
+        while stack:
+            node = stack.pop()
+            if isinstance(node.get('id'), str):
+                filtered[node['id']] = node
+            children = node.get('children')
+            if isinstance(children, list):
+                stack.extend(children)
+
+        self._clean = state['clean']
+        self._nodes = {
+            node_id: (bytes.fromhex(digest), box_key, layout_key and bytes.fromhex(layout_key), filtered[node_id])
+            for node_id, (digest, box_key, layout_key) in state['nodes'].items() if node_id in filtered
+        }
+        self._distances = {
+            parent_id: (bytes.fromhex(key), entries)
+            for parent_id, (key, entries) in state['distances'].items()
+        }
+        return True
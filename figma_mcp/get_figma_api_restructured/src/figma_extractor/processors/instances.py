@@ -0,0 +1,293 @@
+"""Shared component table for instance-heavy cleaned output."""
+
+import marshal
+import operator
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Marks a saved table and the nodes standing in for instances
+TABLE_KEY = 'instanceTable'
+TABLE_VERSION = 1
+REFERENCE_KEY = 'instanceOf'
+
+# Fields describing where an instance sits in its parent, not the component
+_PLACEMENT_FIELDS = ('padding', 'siblingsLayout')
+
+
+def _is_number(value: Any) -> bool:
+    return type(value) in (int, float)
+
+
+def _identical(first: Any, second: Any) -> bool:
+    """Whether two JSON values are equal and serialize the same way.
+
+    Unlike ==, 1 and 1.0, 0.0 and -0.0, and dicts with other key orders differ.
+    """
+    if first is second:
+        return True
+    if type(first) is not type(second) or first != second:
+        return False
+    # Equal containers and floats can still differ in key order, number types or signed zeros
+    return not isinstance(first, (dict, list, float)) or repr(first) == repr(second)
+
+
+def _transform(root: Dict[str, Any], map_id: Callable[[Any], Any], dx: float, dy: float,
+               drop_placement: bool = False) -> Dict[str, Any]:
+    """Copy a cleaned subtree with ids mapped and boxes translated, without recursion.
+
+    Ids are mapped in 'id', siblingsLayout targetIds and overrides ids.
+    Other values are shared with the input.
+    """
+    result = {}
+    stack = [(root, result)]
+    while stack:
+        node, new_node = stack.pop()
+        for key, value in node.items():
+            if drop_placement and node is root and key in _PLACEMENT_FIELDS:
+                continue
+            if key == 'id':
+                new_node[key] = map_id(value)
+            elif key == 'absoluteBoundingBox' and isinstance(value, dict) and _is_number(value.get('x')) \
+                    and _is_number(value.get('y')):
+                box = dict(value)
+                box['x'] = value['x'] + dx
+                box['y'] = value['y'] + dy
+                new_node[key] = box
+            elif key == 'siblingsLayout' and isinstance(value, list):
+                new_node[key] = [
+                    dict(item, targetId=map_id(item['targetId'])) if isinstance(item, dict) and 'targetId' in item
+                    else item
+                    for item in value
+                ]
+            elif key == 'overrides' and isinstance(value, list):
+                new_node[key] = [
+                    dict(item, id=map_id(item['id'])) if isinstance(item, dict) and 'id' in item else item
+                    for item in value
+                ]
+            elif key == 'children' and isinstance(value, list):
+                new_children = []
+                for child in value:
+                    if isinstance(child, dict):
+                        new_children.append({})
+                        stack.append((child, new_children[-1]))
+                    else:
+                        new_children.append(child)
+                new_node[key] = new_children
+            else:
+                new_node[key] = value
+    return result
+
+
+def _id_mappers(instance_id: str) -> Tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+    """Functions turning ids of an instance's subtree into component-relative ids and back.
+
+    Nodes inside an instance have ids 'I<instance id>;<node id>'; the table
+    keeps '<node id>', and '' for the instance itself.
+    """
+    prefix = f'I{instance_id};'
+
+    def relative(value):
+        if value == instance_id:
+            return ''
+        if isinstance(value, str) and value.startswith(prefix):
+            return value[len(prefix):]
+        return value
+
+    def absolute(value):
+        if value == '':
+            return instance_id
+        if isinstance(value, str):
+            return prefix + value
+        return value
+
+    return relative, absolute
+
+
+def _same_shape(children: Any, reference_children: Any) -> bool:
+    """Whether two children lists can be patched child by child."""
+    return (isinstance(children, list) and isinstance(reference_children, list)
+            and len(children) == len(reference_children)
+            and all(isinstance(child, dict) for child in children)
+            and all(isinstance(child, dict) for child in reference_children))
+
+
+def _diff(actual: Dict[str, Any], expected: Dict[str, Any],
+          same: Callable[[Any, Any], bool] = _identical) -> Dict[str, Any]:
+    """Smallest patch turning the expected subtree into the actual one.
+
+    Values for which same() holds are left out of the patch.
+
+    A patch holds 'set' (changed or added fields), 'unset' (removed fields),
+    'keys' (field order, when it changed) and 'children' (patches of
+    children by index, when both have the same number of children).
+    """
+    patch = {}
+    # (actual, expected, patch) per node; patches are filled top-down
+    # and empty ones dropped afterwards, innermost first
+    nested = []
+    stack = [(actual, expected, patch)]
+    while stack:
+        node, reference, node_patch = stack.pop()
+        if 'children' not in node and same(node, reference):
+            continue
+        changed = {}
+        for key, value in node.items():
+            if key == 'children' and _same_shape(value, reference.get(key)):
+                children = {}
+                for index, (child, reference_child) in enumerate(zip(value, reference[key])):
+                    children[str(index)] = {}
+                    stack.append((child, reference_child, children[str(index)]))
+                node_patch['children'] = children
+                nested.append((node_patch, children))
+            elif key not in reference or not same(value, reference[key]):
+                changed[key] = value
+        if changed:
+            node_patch['set'] = changed
+        removed = [key for key in reference if key not in node]
+        if removed:
+            node_patch['unset'] = removed
+        order = [key for key in reference if key not in removed] + [key for key in changed if key not in reference]
+        if order != list(node):
+            node_patch['keys'] = list(node)
+
+    for node_patch, children in reversed(nested):
+        for index in [index for index, child_patch in children.items() if not child_patch]:
+            del children[index]
+        if not children:
+            del node_patch['children']
+    return patch
+
+
+def _apply(node: Dict[str, Any], patch: Dict[str, Any]) -> None:
+    """Apply a _diff patch to a subtree in place."""
+    stack = [(node, patch)]
+    while stack:
+        target, target_patch = stack.pop()
+        for key in target_patch.get('unset', ()):
+            del target[key]
+        target.update(target_patch.get('set', {}))
+        for index, child_patch in target_patch.get('children', {}).items():
+            stack.append((target['children'][int(index)], child_patch))
+        if 'keys' in target_patch:
+            ordered = {key: target[key] for key in target_patch['keys']}
+            target.clear()
+            target.update(ordered)
+
+
+def _rebuild(data: Any, replace: Callable[[Dict[str, Any]], Any]) -> Any:
+    """Copy cleaned data in document order, replacing nodes for which replace() returns a value.
+
+    Nodes (dicts with a 'type') are copied shallowly and only their
+    children are visited; other dicts and lists are searched for nodes.
+    """
+    holder = [None]
+    stack = [(data, holder, 0)]
+    while stack:
+        value, target, key = stack.pop()
+        replaced = replace(value) if isinstance(value, dict) else None
+        if replaced is not None:
+            target[key] = replaced
+        elif isinstance(value, dict) and 'type' in value:
+            target[key] = node = dict(value)
+            children = value.get('children')
+            if isinstance(children, list):
+                node['children'] = container = [None] * len(children)
+                stack.extend((item, container, index) for index, item in reversed(list(enumerate(children))))
+        elif isinstance(value, dict):
+            target[key] = container = {}
+            stack.extend((item, container, item_key) for item_key, item in reversed(list(value.items())))
+        elif isinstance(value, list):
+            target[key] = container = [None] * len(value)
+            stack.extend((item, container, index) for index, item in reversed(list(enumerate(value))))
+        else:
+            target[key] = value
+    return holder[0]
+
+
+def _origin(node: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Position of a node that can be stored as a reference, or None."""
+    if node.get('type') != 'INSTANCE' or not node.get('children') or REFERENCE_KEY in node:
+        return None
+    if not isinstance(node.get('componentId'), str) or not isinstance(node.get('id'), str):
+        return None
+    box = node.get('absoluteBoundingBox')
+    if not isinstance(box, dict) or not _is_number(box.get('x')) or not _is_number(box.get('y')):
+        return None
+    return box['x'], box['y']
+
+
+def dedupe_instances(data: Any) -> Dict[str, Any]:
+    """Store every component's subtree once and instances as references to it.
+
+    The first instance of each componentId becomes the table entry, with
+    ids relative to the instance and boxes relative to its origin. Every
+    INSTANCE node with children is then replaced by a reference holding its
+    id, origin and a patch of what differs from the entry: overridden
+    fields, its padding and sibling layout, and coordinates that do not
+    translate exactly. Instances inside an entry stay inline.
+
+    Args:
+        data: Cleaned node, or any JSON value containing cleaned nodes
+            (e.g. ComponentExtractor.extract_many output)
+
+    Returns:
+        dict: 'instanceTable' (format version), 'components' (entries by
+            componentId) and 'document' (data with instances replaced)
+    """
+    components = {}
+    result = _rebuild(data, lambda node: _reference(node, components) if _origin(node) is not None else None)
+    return {TABLE_KEY: TABLE_VERSION, 'components': components, 'document': result}
+
+
+def _reference(node: Dict[str, Any], components: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Reference standing in for an instance, adding its component to the table if new."""
+    x, y = _origin(node)
+    relative, absolute = _id_mappers(node['id'])
+    component = components.get(node['componentId'])
+    if component is None:
+        component = _transform(node, relative, -x, -y, drop_placement=True)
+        components[node['componentId']] = component
+    reference = {REFERENCE_KEY: node['componentId'], 'id': node['id'], 'origin': [x, y]}
+    # Diff with == and check the result once: marshal tells 1 from 1.0, 0.0
+    # from -0.0 and key orders apart, and only a mismatch pays for the strict diff
+    expected = _transform(component, absolute, x, y)
+    patch = _diff(node, expected, operator.eq)
+    _apply(expected, patch)
+    try:
+        exact = marshal.dumps(expected, 0) == marshal.dumps(node, 0)
+    except ValueError:  # Nested too deeply for marshal
+        exact = False
+    if not exact:
+        patch = _diff(node, _transform(component, absolute, x, y))
+    if patch:
+        reference['patch'] = patch
+    return reference
+
+
+def expand_instances(table: Dict[str, Any]) -> Any:
+    """Rebuild cleaned output from dedupe_instances() output.
+
+    The result is identical to the data given to dedupe_instances(),
+    including key order and number types. Expanded instances share values
+    that were not overridden with the table.
+
+    Args:
+        table (dict): dedupe_instances() output
+
+    Returns:
+        Cleaned data with every instance inlined again
+
+    Raises:
+        ValueError: If table is not dedupe_instances() output
+    """
+    if not isinstance(table, dict) or table.get(TABLE_KEY) != TABLE_VERSION:
+        raise ValueError(f"Not an instance table (expected {TABLE_KEY!r} version {TABLE_VERSION})")
+    components = table['components']
+
+    def expand(reference):
+        _, absolute = _id_mappers(reference['id'])
+        x, y = reference['origin']
+        node = _transform(components[reference[REFERENCE_KEY]], absolute, x, y)
+        _apply(node, reference.get('patch', {}))
+        return node
+
+    return _rebuild(table['document'], lambda node: expand(node) if REFERENCE_KEY in node else None)
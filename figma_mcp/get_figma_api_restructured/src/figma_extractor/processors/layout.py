@@ -0,0 +1,90 @@
+"""Sibling layout relations (same row / same column) between child nodes."""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List, Optional
+import sys
+from pathlib import Path
+from ..core.geometry_store import GeometryStore
+
+# Add config to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
+
+from settings import DISTANCE_TOLERANCE
+
+
+def _window(sorted_values: List[float], value: float, tolerance: float) -> slice:
+    """Slice of sorted_values that may lie strictly within tolerance of value.
+
+    The window is widened by a tiny margin so floating-point rounding in the
+    bounds never drops a candidate; callers apply the exact test afterwards.
+    """
+    margin = 1e-9 * max(1.0, abs(value), tolerance)
+    start = bisect_right(sorted_values, value - tolerance - margin)
+    end = bisect_left(sorted_values, value + tolerance + margin)
+    return slice(start, end)
+
+
+def process_siblings(children: List[Dict[str, Any]], tolerance: float = DISTANCE_TOLERANCE,
+                     geometry: Optional[GeometryStore] = None) -> None:
+    """Add 'siblingsLayout' entries to children aligned in a row or column.
+
+    Two siblings are in the same row when their top edges differ by less than
+    tolerance, otherwise in the same column when their left edges do. Rows
+    take priority, as before. Children are sorted by x and by y once and each
+    child only compares against the siblings inside its tolerance window, so
+    the cost is O(n log n) plus the size of the output instead of O(n²).
+
+    Entries are identical to the pairwise comparison: one per aligned sibling
+    with a bounding box, in sibling order.
+
+    Args:
+        children (list): Child nodes of one parent, modified in place
+        tolerance (float): Maximum coordinate difference (exclusive) for alignment
+        geometry (GeometryStore, optional): Boxes of the document, read instead
+            of each child's absoluteBoundingBox dict
+    """
+    boxed = []
+    if geometry is not None:
+        for node, position in zip(children, geometry.positions([node.get("id") for node in children])):
+            if position is not None:
+                boxed.append((node, position[0], position[1]))
+    else:
+        for node in children:
+            box = node.get("absoluteBoundingBox")
+            if box:
+                boxed.append((node, box["x"], box["y"]))
+    if len(boxed) < 2:
+        return
+
+    xs = [x for _, x, _ in boxed]
+    ys = [y for _, _, y in boxed]
+    by_x = sorted(range(len(boxed)), key=xs.__getitem__)
+    by_y = sorted(range(len(boxed)), key=ys.__getitem__)
+    sorted_xs = [xs[k] for k in by_x]
+    sorted_ys = [ys[k] for k in by_y]
+
+    for i, (node_i, x_i, y_i) in enumerate(boxed):
+        candidates = set(by_y[_window(sorted_ys, y_i, tolerance)])
+        candidates.update(by_x[_window(sorted_xs, x_i, tolerance)])
+        candidates.discard(i)
+        if not candidates:
+            continue
+
+        siblings_info = []
+        for j in sorted(candidates):
+            node_j, x_j, y_j = boxed[j]
+            if abs(y_i - y_j) < tolerance:
+                siblings_info.append({
+                    "targetId": node_j.get("id"),
+                    "relation": "sameRow",
+                    "distance": round(abs(x_i - x_j), 2)
+                })
+            elif abs(x_i - x_j) < tolerance:
+                siblings_info.append({
+                    "targetId": node_j.get("id"),
+                    "relation": "sameColumn",
+                    "distance": round(abs(y_i - y_j), 2)
+                })
+
+        if siblings_info:
+            node_i["siblingsLayout"] = siblings_info
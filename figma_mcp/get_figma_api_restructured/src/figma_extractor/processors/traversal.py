@@ -0,0 +1,189 @@
+"""Single-pass traversal engine running several node processors in one walk."""
+
+import time
+from typing import Dict, Any, List, Callable, Iterable, Optional
+
+
+class TraversalStage:
+    """One processor taking part in a fused tree traversal.
+
+    ``enter`` is called for every node before its children (pre-order) and
+    ``exit`` after them (post-order) with this stage's results for the
+    children. Whatever ``exit`` returns becomes the node's result, and the
+    root's result is passed to ``finish``.
+    """
+
+    name = 'stage'
+
+    def enter(self, node: Dict[str, Any]) -> None:
+        """Visit a node before its children."""
+
+    def exit(self, node: Dict[str, Any], children: List[Any]) -> Any:
+        """Visit a node after its children.
+
+        Args:
+            node (dict): Current node
+            children (list): This stage's results for the node's children, in order
+
+        Returns:
+            Any: Result for the node, handed to its parent's exit
+        """
+        return None
+
+    def finish(self, root_result: Any) -> Any:
+        """Build the stage output once the walk is complete.
+
+        Args:
+            root_result (Any): Result of exit for the root node
+
+        Returns:
+            Any: Stage output
+        """
+        return root_result
+
+
+class CollectStage(TraversalStage):
+    """Collects one item per node in document (pre-)order."""
+
+    def __init__(self, name: str, select: Callable[[Dict[str, Any]], Any]):
+        """Initialize the collect stage.
+
+        Args:
+            name (str): Stage name, used as the key of its output
+            select (callable): Returns the item for a node, or None to skip it
+        """
+        self.name = name
+        self.select = select
+        self.items = []
+
+    def enter(self, node: Dict[str, Any]) -> None:
+        item = self.select(node)
+        if item is not None:
+            self.items.append(item)
+
+    def finish(self, root_result: Any) -> List[Any]:
+        return self.items
+
+
+class TransformStage(TraversalStage):
+    """Builds a transformed copy of the tree bottom-up."""
+
+    def __init__(self, name: str, transform: Callable[[Dict[str, Any], List[Any]], Any]):
+        """Initialize the transform stage.
+
+        Args:
+            name (str): Stage name, used as the key of its output
+            transform (callable): Builds a node's result from the node and its
+                already transformed children
+        """
+        self.name = name
+        self.transform = transform
+
+    def exit(self, node: Dict[str, Any], children: List[Any]) -> Any:
+        return self.transform(node, children)
+
+
+class TreeTraversal:
+    """Runs several stages over a node tree in a single explicit-stack walk.
+
+    Nodes are visited once however many stages are registered, so the tree
+    is read from memory once instead of once per processor. Time spent in
+    each stage's callbacks is accumulated in ``timings``.
+    """
+
+    def __init__(self, stages: Iterable[TraversalStage]):
+        """Initialize the traversal.
+
+        Args:
+            stages (iterable): Stages to run; names must be unique
+        """
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+
+        self.timings = {name: 0.0 for name in names}
+        self.walk_seconds = 0.0
+        self.node_count = 0
+
+    def run(self, root: Dict[str, Any]) -> Dict[str, Any]:
+        """Walk the tree once and collect every stage's output.
+
+        Args:
+            root (dict): Root node
+
+        Returns:
+            dict: Stage outputs keyed by stage name
+        """
+        stages = self.stages
+        timings = [0.0] * len(stages)
+        clock = time.perf_counter
+        started = clock()
+
+        # Only call the hooks a stage actually overrides
+        enters = [(index, stage.enter) for index, stage in enumerate(stages)
+                  if type(stage).enter is not TraversalStage.enter]
+        exits = [(index, stage.exit) for index, stage in enumerate(stages)
+                 if type(stage).exit is not TraversalStage.exit]
+
+        # Results of finished children, one list per exit hook, for each open node
+        pending = [[[] for _ in exits]]
+        # Entries are (node, False) to enter a node and (node, True) to exit it
+        stack = [(root, False)]
+        node_count = 0
+
+        while stack:
+            node, leaving = stack.pop()
+
+            if not leaving:
+                node_count += 1
+                for index, enter in enters:
+                    start = clock()
+                    enter(node)
+                    timings[index] += clock() - start
+
+                stack.append((node, True))
+                children = node.get('children')
+                if children:
+                    pending.append([[] for _ in exits])
+                    stack.extend((child, False) for child in reversed(children))
+                else:
+                    # Leaves share the exit path below with an empty result list
+                    pending.append(None)
+                continue
+
+            child_results = pending.pop()
+            parent_results = pending[-1]
+            for position, (index, exit_) in enumerate(exits):
+                start = clock()
+                result = exit_(node, child_results[position] if child_results else [])
+                timings[index] += clock() - start
+                parent_results[position].append(result)
+
+        root_results = dict(
+            (index, pending[0][position][0]) for position, (index, _) in enumerate(exits)
+        )
+        outputs = {}
+        for index, stage in enumerate(stages):
+            start = clock()
+            outputs[stage.name] = stage.finish(root_results.get(index))
+            timings[index] += clock() - start
+
+        total = clock() - started
+        for index, stage in enumerate(stages):
+            self.timings[stage.name] += timings[index]
+        self.walk_seconds += total - sum(timings)
+        self.node_count += node_count
+        return outputs
+
+    def report(self) -> Dict[str, Any]:
+        """Get per-stage timings for the walks run so far.
+
+        Returns:
+            dict: Node count, seconds per stage and traversal overhead in seconds
+        """
+        return {
+            'nodes': self.node_count,
+            'stages': {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            'walk_seconds': round(self.walk_seconds, 4)
+        }
@@ -0,0 +1,150 @@
+"""Background thread running file writes while the caller keeps working."""
+
+import atexit
+import queue
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+# Writers with a running thread; flushed at interpreter exit so queued
+# writes are not lost when a caller forgets to close them
+_live_writers = weakref.WeakSet()
+
+
+class BackgroundWriter:
+    """Run write jobs in order on one worker thread, behind a bounded queue.
+
+    ``submit`` returns as soon as the job is queued, so the caller overlaps
+    its own work with the write. When ``max_pending`` jobs are waiting,
+    ``submit`` blocks until the worker catches up, which bounds the memory
+    held by queued data.
+
+    A failed job's exception is set on its future and is also raised to the
+    caller by the next ``submit``, ``flush`` or ``close``, so errors are not
+    lost when nobody looks at the future.
+    """
+
+    def __init__(self, max_pending: int = 4):
+        """Initialize the writer.
+
+        Args:
+            max_pending (int): Queued jobs beyond which submit() blocks
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.max_pending = max_pending
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, job: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue a job, blocking while the queue is full.
+
+        Args:
+            job (callable): Function to run on the worker thread
+            *args, **kwargs: Arguments for the job
+
+        Returns:
+            Future: Resolves to the job's return value or exception
+
+        Raises:
+            RuntimeError: If the writer is closed
+            Exception: The error of an earlier job that has not been raised yet
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BackgroundWriter is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='figma-background-writer', daemon=True)
+                self._thread.start()
+                _live_writers.add(self)
+        self._raise_errors(wait=False)
+
+        future = Future()
+        with self._lock:
+            self._futures.append(future)
+        self._queue.put((future, job, args, kwargs))
+        return future
+
+    def flush(self) -> None:
+        """Wait until every queued job has finished.
+
+        Raises:
+            Exception: The first error of a job that has not been raised yet
+        """
+        if self._thread is not None:
+            self._queue.join()
+        self._raise_errors(wait=True)
+
+    def close(self) -> None:
+        """Flush queued jobs and stop the worker thread.
+
+        Raises:
+            Exception: The first error of a job that has not been raised yet
+        """
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                _live_writers.discard(self)
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        return self._queue.unfinished_tasks
+
+    def _raise_errors(self, wait: bool) -> None:
+        """Drop finished futures and raise the first error among them."""
+        with self._lock:
+            if wait:
+                finished, self._futures = self._futures, []
+            else:
+                # The worker resolves futures without the lock, so done() is read once per future
+                finished, running = [], []
+                for future in self._futures:
+                    (finished if future.done() else running).append(future)
+                self._futures = running
+        for future in finished:
+            error = future.exception()
+            if error is not None:
+                raise error
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                future, job, args, kwargs = item
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(job(*args, **kwargs))
+                    except BaseException as error:
+                        future.set_exception(error)
+            finally:
+                self._queue.task_done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@atexit.register
+def _flush_live_writers() -> None:
+    for writer in list(_live_writers):
+        try:
+            writer.flush()
+        except Exception:
+            # Errors are reported to callers; at exit the files are all we can save
+            pass
@@ -0,0 +1,94 @@
+"""Streaming gzip/zstd compression for saved files."""
+
+import gzip
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# File extension per compression format
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def compression_for(path: Union[str, Path]) -> Optional[str]:
+    """Detect the compression format from a file name.
+
+    Args:
+        path (str|Path): File name or path
+
+    Returns:
+        str: 'gzip', 'zstd', or None for uncompressed files
+    """
+    suffix = Path(path).suffix
+    for compression, extension in EXTENSIONS.items():
+        if suffix == extension:
+            return compression
+    return None
+
+
+def _check(compression: str) -> None:
+    if compression not in EXTENSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstd compression requires the zstandard package")
+
+
+@contextmanager
+def open_write(path: Union[str, Path], compression: Optional[str] = None,
+               level: Optional[int] = None) -> Iterator[BinaryIO]:
+    """Open a binary stream that compresses into a file as it is written.
+
+    Args:
+        path (str|Path): File to create or overwrite
+        compression (str, optional): 'gzip', 'zstd', or None to write plain bytes
+        level (int, optional): Compression level; the format's default if omitted
+
+    Yields:
+        file: Binary stream; data is compressed chunk by chunk, never as a whole
+    """
+    if compression is None:
+        with open(path, 'wb') as f:
+            yield f
+        return
+
+    _check(compression)
+    with open(path, 'wb') as f:
+        if compression == 'gzip':
+            # mtime=0 keeps the output identical for identical data
+            with gzip.GzipFile(filename='', mode='wb', fileobj=f, mtime=0,
+                               compresslevel=6 if level is None else level) as stream:
+                yield stream
+        else:
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+            with compressor.stream_writer(f, closefd=False) as stream:
+                yield stream
+
+
+@contextmanager
+def open_read(path: Union[str, Path], compression: Optional[str] = None) -> Iterator[BinaryIO]:
+    """Open a binary stream that decompresses a file as it is read.
+
+    Args:
+        path (str|Path): File to read
+        compression (str, optional): 'gzip', 'zstd', or None for plain files
+
+    Yields:
+        file: Binary stream of the decompressed bytes
+    """
+    if compression is None:
+        with open(path, 'rb') as f:
+            yield f
+        return
+
+    _check(compression)
+    with open(path, 'rb') as f:
+        if compression == 'gzip':
+            with gzip.GzipFile(mode='rb', fileobj=f) as stream:
+                yield stream
+        else:
+            with zstandard.ZstdDecompressor().stream_reader(f, closefd=False) as stream:
+                yield stream
@@ -1,59 +1,198 @@
 """File handler utility for JSON file operations."""
 
 import json
+import os
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 import sys
 from pathlib import Path
+from .background_writer import BackgroundWriter
+from .compression import EXTENSIONS, compression_for, open_read, open_write
+from .json_backends import get_json_backend
+from .reporting import Reporter, NullReporter
+from .snapshot import Snapshot, write_snapshot
 
 # Add config to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / 'config'))
 
-from settings import OUTPUT_DIR, INPUT_DIR
+from settings import (OUTPUT_DIR, INPUT_DIR, JSON_BACKEND, JSON_PRETTY, OUTPUT_COMPRESSION, COMPRESSION_LEVEL,
+                      WRITE_QUEUE_SIZE)
 
 
 class FileHandler:
     """Utility class for handling file operations."""
     
-    def __init__(self, output_dir: Union[str, Path] = None, input_dir: Union[str, Path] = None):
+    def __init__(self, output_dir: Union[str, Path] = None, input_dir: Union[str, Path] = None,
+                 reporter: Optional[Reporter] = None, json_backend: str = JSON_BACKEND,
+                 pretty: bool = JSON_PRETTY, compression: Optional[str] = OUTPUT_COMPRESSION,
+                 compression_level: Optional[int] = COMPRESSION_LEVEL, background: bool = False,
+                 max_pending: int = WRITE_QUEUE_SIZE):
         """Initialize the file handler.
         
         Args:
             output_dir (str|Path, optional): Output directory path
             input_dir (str|Path, optional): Input directory path
+            reporter (Reporter, optional): Receives save/load events. Silent by default.
+            json_backend (str): 'stdlib', 'orjson' or 'auto' (orjson when installed).
+                Compressed files always use the incremental stdlib encoder.
+            pretty (bool): Default for save_json: indented output, or compact
+                output without whitespace
+            compression (str, optional): Default for save_json: 'gzip', 'zstd' or
+                None. Compressed files get a .gz/.zst extension.
+            compression_level (int, optional): Compression level; the format's
+                default if omitted
+            background (bool): Let save_json return at once and write on a
+                background thread. Call flush() or close() to wait for the
+                writes and raise their errors.
+            max_pending (int): Queued background saves beyond which save_json waits
         """
         self.output_dir = Path(output_dir) if output_dir else OUTPUT_DIR
         self.input_dir = Path(input_dir) if input_dir else INPUT_DIR
+        self.reporter = reporter or NullReporter()
+        self.json_backend = get_json_backend(json_backend)
+        # Compressed files stream through the compressor chunk by chunk
+        self.stream_backend = self.json_backend if self.json_backend.incremental else get_json_backend('stdlib')
+        self.pretty = pretty
+        self.compression = compression
+        self.compression_level = compression_level
+        self.background = background
+        self.writer = BackgroundWriter(max_pending)
         
         # Ensure directories exist
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.input_dir.mkdir(parents=True, exist_ok=True)
     
-    def save_json(self, data: Dict[str, Any], filename: str, output_dir: Union[str, Path] = None) -> Path:
+    def save_json(self, data: Dict[str, Any], filename: str, output_dir: Union[str, Path] = None,
+                  pretty: Optional[bool] = None, compression: Optional[str] = None) -> Path:
         """Save data to a JSON file.
         
+        The data is written to a temporary file that is renamed over the
+        target, so an interrupted save never leaves a truncated file. With
+        background writes the file is written later on the writer thread;
+        the data must not be modified until then.
+        
         Args:
             data (dict): Data to save
             filename (str): Name of the file
             output_dir (str|Path, optional): Output directory. Defaults to instance output_dir.
+            pretty (bool, optional): Indent the output (True) or write it compact
+                (False). Defaults to the handler's setting.
+            compression (str, optional): 'gzip', 'zstd' or 'none'. Defaults to the
+                format named by the filename's .gz/.zst extension, then to the
+                handler's setting. The extension is appended when missing.
+            
+        Returns:
+            Path: Path of the saved file (or the file being saved in background mode)
             
+        Raises:
+            Exception: In background mode, the error of an earlier failed save
+        """
+        file_path, compression = self._target(filename, output_dir, compression)
+        if self.background:
+            self.writer.submit(self._write_json, data, file_path, pretty, compression)
+            return file_path
+        return self._write_json(data, file_path, pretty, compression)
+    
+    def save_json_async(self, data: Dict[str, Any], filename: str, output_dir: Union[str, Path] = None,
+                        pretty: Optional[bool] = None, compression: Optional[str] = None) -> Future:
+        """Save data to a JSON file on the background writer thread.
+        
+        Returns once the save is queued; blocks while the queue is full. The
+        data must not be modified until the returned future is done. Takes the
+        same arguments as save_json.
+        
         Returns:
-            Path: Path to the saved file
+            Future: Resolves to the Path of the saved file, or to the error
+                raised while saving it
+        
+        Raises:
+            Exception: The error of an earlier failed save that has not been raised yet
+        """
+        file_path, compression = self._target(filename, output_dir, compression)
+        return self.writer.submit(self._write_json, data, file_path, pretty, compression)
+    
+    def flush(self) -> None:
+        """Wait for queued background saves.
+        
+        Raises:
+            Exception: The first error of a failed save that has not been raised yet
         """
+        self.writer.flush()
+    
+    def close(self) -> None:
+        """Wait for queued background saves and stop the writer thread.
+        
+        Raises:
+            Exception: The first error of a failed save that has not been raised yet
+        """
+        self.writer.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _target(self, filename: str, output_dir: Union[str, Path, None],
+                compression: Optional[str]):
+        """Resolve the path and compression format of a save."""
         directory = Path(output_dir) if output_dir else self.output_dir
         directory.mkdir(parents=True, exist_ok=True)
         
-        file_path = directory / filename
+        if compression is None:
+            compression = compression_for(filename) or self.compression
+        elif compression == 'none':
+            compression = None
+        if compression is not None and compression_for(filename) != compression:
+            filename = filename + EXTENSIONS[compression]
+        
+        return directory / filename, compression
+    
+    def _write_json(self, data: Dict[str, Any], file_path: Path, pretty: Optional[bool],
+                    compression: Optional[str]) -> Path:
+        """Write a JSON file through a temporary file renamed into place."""
+        # Encoded output goes through the compressor in chunks
+        backend = self.json_backend if compression is None else self.stream_backend
+        
+        def write(tmp_path):
+            with open_write(tmp_path, compression, self.compression_level) as f:
+                backend.write(data, f, self.pretty if pretty is None else pretty)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._write_atomic(file_path, write)
         
-        print(f"✅ Saved data to: {file_path}")
+        self.reporter.emit('file.saved', path=str(file_path))
         return file_path
     
+    def _write_snapshot(self, data: Dict[str, Any], file_path: Path) -> Path:
+        """Write a snapshot file through a temporary file renamed into place."""
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                write_snapshot(data, f)
+        
+        self._write_atomic(file_path, write)
+        
+        self.reporter.emit('file.saved', path=str(file_path))
+        return file_path
+    
+    @staticmethod
+    def _write_atomic(file_path: Path, write) -> None:
+        """Call write(tmp_path) and rename the temporary file over file_path."""
+        tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    
     def load_json(self, filename: str, input_dir: Union[str, Path] = None) -> Dict[str, Any]:
         """Load data from a JSON file.
         
+        Files ending in .gz or .zst are decompressed while reading. If the
+        plain file does not exist, a compressed copy of it is loaded instead.
+        
         Args:
             filename (str): Name of the file to load
             input_dir (str|Path, optional): Input directory. Defaults to instance input_dir.
@@ -65,21 +204,80 @@ class FileHandler:
             FileNotFoundError: If file doesn't exist
             json.JSONDecodeError: If file contains invalid JSON
         """
+        # A queued background save of this file must land before it is read
+        self.flush()
+        
         directory = Path(input_dir) if input_dir else self.input_dir
-        file_path = directory / filename
+        names = [filename]
+        if compression_for(filename) is None:
+            names.extend(filename + extension for extension in EXTENSIONS.values())
         
-        if not file_path.exists():
-            # Try in output directory as fallback
-            file_path = self.output_dir / filename
-            if not file_path.exists():
-                raise FileNotFoundError(f"File not found: {filename}")
+        # Try in output directory as fallback; plain files win over compressed copies
+        candidates = [folder / name for name in names for folder in (directory, self.output_dir)]
+        file_path = next((path for path in candidates if path.exists()), None)
+        if file_path is None:
+            raise FileNotFoundError(f"File not found: {filename}")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        compression = compression_for(file_path)
+        backend = self.json_backend if compression is None else self.stream_backend
+        with open_read(file_path, compression) as f:
+            data = backend.read(f)
         
-        print(f"✅ Loaded data from: {file_path}")
+        self.reporter.emit('file.loaded', path=str(file_path))
         return data
     
+    def save_snapshot(self, data: Dict[str, Any], filename: str, output_dir: Union[str, Path] = None) -> Path:
+        """Save node trees as a binary snapshot that open_snapshot reopens lazily.
+        
+        Accepts file and /nodes responses as well as bare node trees such as
+        cleaned output. Written atomically, and on the writer thread in
+        background mode, like save_json.
+        
+        Args:
+            data (dict): Data to save
+            filename (str): Name of the file, e.g. 'figma_file.snapshot'
+            output_dir (str|Path, optional): Output directory. Defaults to instance output_dir.
+            
+        Returns:
+            Path: Path of the saved file (or the file being saved in background mode)
+        """
+        file_path, _ = self._target(filename, output_dir, 'none')
+        if self.background:
+            self.writer.submit(self._write_snapshot, data, file_path)
+            return file_path
+        return self._write_snapshot(data, file_path)
+    
+    def open_snapshot(self, filename: str, input_dir: Union[str, Path] = None) -> Snapshot:
+        """Open a snapshot through mmap without decoding it.
+        
+        Nodes are decoded as they are accessed; call to_dict() on the
+        snapshot for the data it was saved from. Close the snapshot when done.
+        
+        Args:
+            filename (str): Name of the file to open
+            input_dir (str|Path, optional): Input directory. Defaults to instance
+                input_dir, with output_dir as fallback.
+            
+        Returns:
+            Snapshot: Open snapshot
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If the file is not a snapshot
+        """
+        # A queued background save of this file must land before it is mapped
+        self.flush()
+        
+        directory = Path(input_dir) if input_dir else self.input_dir
+        file_path = next((folder / filename for folder in (directory, self.output_dir)
+                          if (folder / filename).exists()), None)
+        if file_path is None:
+            raise FileNotFoundError(f"File not found: {filename}")
+        
+        snapshot = Snapshot(file_path)
+        self.reporter.emit('file.loaded', path=str(file_path))
+        return snapshot
+    
     def file_exists(self, filename: str, directory: Union[str, Path] = None) -> bool:
         """Check if a file exists.
         
@@ -125,7 +323,7 @@ class FileHandler:
         dest_path.parent.mkdir(parents=True, exist_ok=True)
         
         shutil.copy2(source_path, dest_path)
-        print(f"✅ Copied {source_path} to {dest_path}")
+        self.reporter.emit('file.copied', source=str(source_path), destination=str(dest_path))
         
         return dest_path
     
@@ -148,7 +346,7 @@ class FileHandler:
         dest_path.parent.mkdir(parents=True, exist_ok=True)
         
         shutil.move(str(source_path), str(dest_path))
-        print(f"✅ Moved {source_path} to {dest_path}")
+        self.reporter.emit('file.moved', source=str(source_path), destination=str(dest_path))
         
         return dest_path
     
@@ -167,10 +365,10 @@ class FileHandler:
         
         if file_path.exists():
             file_path.unlink()
-            print(f"✅ Deleted file: {file_path}")
+            self.reporter.emit('file.deleted', path=str(file_path))
             return True
         else:
-            print(f"❌ File not found: {file_path}")
+            self.reporter.emit('file.missing', path=str(file_path))
             return False
     
     def get_file_size(self, filename: str, directory: Union[str, Path] = None) -> int:
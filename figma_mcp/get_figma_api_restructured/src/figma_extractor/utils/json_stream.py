@@ -0,0 +1,388 @@
+"""Streaming, event-based JSON parsing for large Figma documents.
+
+The functions here read a document incrementally from a file path, a file
+object or an HTTP stream and never build the full tree in memory. Node
+records keep only the fields a caller asks for; everything else (``fills``,
+``effects``, vector data, ...) is skipped while reading.
+"""
+
+import codecs
+import json
+import re
+from pathlib import Path
+from typing import Dict, Any, Iterator, Iterable, Optional, Tuple, Union
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Fields kept on node records by default
+NODE_SCALAR_FIELDS = frozenset({'id', 'name', 'type'})
+NODE_OBJECT_FIELDS = frozenset({'absoluteBoundingBox'})
+
+# Paths (map keys from the response root) at which node trees start. '*'
+# matches any key, e.g. the node ID in a /nodes response.
+DEFAULT_ROOT_PATHS = (('document',), ('nodes', '*', 'document'))
+
+_START_EVENTS = frozenset({'start_map', 'start_array'})
+_END_EVENTS = frozenset({'end_map', 'end_array'})
+
+_TOKEN_RE = re.compile(r'''
+    [ \t\n\r]*
+    (?:
+        (?P<punct>[{}\[\],:])
+      | (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+      | (?P<literal>true|false|null)
+    )
+''', re.VERBOSE | re.DOTALL)
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+
+def _iter_tokens(read, chunk_size: int) -> Iterator[Tuple[str, Any]]:
+    """Tokenize JSON text supplied by a read(size) callable.
+
+    Args:
+        read (callable): Returns the next non-empty chunk of text, or None at end of input
+        chunk_size (int): Number of characters to request per read
+
+    Yields:
+        tuple: (kind, value) where kind is 'punct', 'string', 'number' or 'literal'
+    """
+    buffer = ''
+    pos = 0
+    eof = False
+
+    while True:
+        # A token ending near the end of the buffer may continue in the next
+        # chunk (e.g. '1.5e' + '+3'), so it is only accepted after a refill
+        limit = len(buffer) if eof else len(buffer) - 3
+        for m in iter(_TOKEN_RE.scanner(buffer, pos).match, None):
+            if m.end() > limit:
+                break
+            pos = m.end()
+            kind = m.lastgroup
+            text = m.group(kind)
+            if kind == 'punct':
+                yield kind, text
+            elif kind == 'string':
+                yield kind, json.loads(text) if '\\' in text else text[1:-1]
+            elif kind == 'number':
+                yield kind, float(text) if ('.' in text or 'e' in text or 'E' in text) else int(text)
+            else:
+                yield kind, _LITERALS[text]
+
+        if eof:
+            if buffer[pos:].strip():
+                raise ValueError(f"Invalid JSON near: {buffer[pos:pos + 40]!r}")
+            return
+        chunk = read(chunk_size)
+        if chunk is None:
+            eof = True
+            chunk = ''
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def _iter_basic_events(read, chunk_size: int) -> Iterator[Tuple[str, Any]]:
+    """Turn tokens into ijson-style basic events."""
+    # Each entry is True for an object, False for an array
+    containers = []
+    expect_key = False
+
+    for kind, value in _iter_tokens(read, chunk_size):
+        if kind == 'punct':
+            if value == '{':
+                containers.append(True)
+                expect_key = True
+                yield 'start_map', None
+            elif value == '[':
+                containers.append(False)
+                yield 'start_array', None
+            elif value == '}':
+                containers.pop()
+                expect_key = False
+                yield 'end_map', None
+            elif value == ']':
+                containers.pop()
+                yield 'end_array', None
+            elif value == ',':
+                expect_key = bool(containers) and containers[-1]
+            continue
+
+        if expect_key:
+            expect_key = False
+            yield 'map_key', value
+        elif kind == 'string':
+            yield 'string', value
+        elif kind == 'number':
+            yield 'number', value
+        elif value is None:
+            yield 'null', None
+        else:
+            yield 'boolean', value
+
+
+def iter_events(source: Union[str, Path, Any], chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """Parse JSON incrementally into (event, value) pairs.
+
+    Events follow ijson's basic_parse: 'start_map', 'map_key', 'end_map',
+    'start_array', 'end_array', 'string', 'number', 'boolean' and 'null'.
+    ijson is used when installed; otherwise a pure-Python tokenizer runs.
+
+    Args:
+        source (str|Path|file): File path, or a binary/text file object such as
+            an HTTP response's raw stream
+        chunk_size (int): Read size in bytes
+
+    Yields:
+        tuple: (event, value)
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            yield from iter_events(f, chunk_size)
+        return
+
+    if ijson is not None:
+        for event, value in ijson.basic_parse(source, buf_size=chunk_size):
+            # ijson yields Decimal for non-integer numbers
+            if event == 'number' and not isinstance(value, int):
+                value = float(value)
+            yield event, value
+        return
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def read(size):
+        # A short read may end inside a multi-byte character and decode to
+        # nothing, so only an empty raw read means end of input
+        while True:
+            chunk = source.read(size)
+            if isinstance(chunk, bytes):
+                text = decoder.decode(chunk, final=not chunk)
+            else:
+                text = chunk
+            if text:
+                return text
+            if not chunk:
+                return None
+
+    yield from _iter_basic_events(read, chunk_size)
+
+
+class _ValueBuilder:
+    """Builds a complete JSON value from events."""
+
+    def __init__(self, event: str):
+        self.value = {} if event == 'start_map' else []
+        self._stack = [self.value]
+        self._keys = [None]
+
+    def feed(self, event: str, value: Any) -> bool:
+        """Consume one event. Returns True when the value is complete."""
+        if event == 'map_key':
+            self._keys[-1] = value
+            return False
+        if event in _END_EVENTS:
+            self._stack.pop()
+            self._keys.pop()
+            return not self._stack
+
+        if event == 'start_map':
+            item = {}
+        elif event == 'start_array':
+            item = []
+        else:
+            item = value
+
+        container = self._stack[-1]
+        if isinstance(container, dict):
+            container[self._keys[-1]] = item
+        else:
+            container.append(item)
+
+        if event in _START_EVENTS:
+            self._stack.append(item)
+            self._keys.append(None)
+        return False
+
+
+def _matches(path: Tuple[str, ...], pattern: Tuple[str, ...]) -> bool:
+    return len(path) <= len(pattern) and all(p == '*' or p == k for k, p in zip(path, pattern))
+
+
+def iter_node_records(source: Union[str, Path, Any],
+                      root_paths: Iterable[Tuple[str, ...]] = DEFAULT_ROOT_PATHS,
+                      scalar_fields: Iterable[str] = NODE_SCALAR_FIELDS,
+                      object_fields: Iterable[str] = NODE_OBJECT_FIELDS,
+                      with_children: bool = False,
+                      chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream compact records for every node of the document trees in a response.
+
+    A record holds the requested fields plus 'child_count', 'depth' (0 for a
+    tree root), 'order' (pre-order position in the stream) and 'parent_id'.
+    Records are yielded when a node ends, i.e. children before parents.
+    Memory use is bounded by tree depth (and, with with_children, by the
+    width of the open nodes), not by document size.
+
+    Args:
+        source (str|Path|file): File path or file object with a file or /nodes response
+        root_paths (iterable): Key paths at which node trees start
+        scalar_fields (iterable): Scalar node fields to keep
+        object_fields (iterable): Object or array node fields to keep whole
+        with_children (bool): Attach a 'children' list of child records (without
+            their own children) to each record
+        chunk_size (int): Read size in bytes
+
+    Yields:
+        dict: Node record
+    """
+    root_paths = tuple(tuple(path) for path in root_paths)
+    scalar_fields = frozenset(scalar_fields)
+    object_fields = frozenset(object_fields)
+
+    # Frames: ['outer', path, key] for maps leading to roots,
+    # ['node', record, key] for node objects and ['children', record] for children arrays
+    stack = []
+    skip_depth = 0
+    builder = None
+    builder_target = None
+    order = 0
+
+    for event, value in iter_events(source, chunk_size):
+        if skip_depth:
+            if event in _START_EVENTS:
+                skip_depth += 1
+            elif event in _END_EVENTS:
+                skip_depth -= 1
+            continue
+
+        if builder is not None:
+            if builder.feed(event, value):
+                record, key = builder_target
+                record[key] = builder.value
+                builder = None
+            continue
+
+        if not stack:
+            if event == 'start_map':
+                stack.append(['outer', (), None])
+            elif event == 'start_array':
+                skip_depth = 1
+            continue
+
+        frame = stack[-1]
+        kind = frame[0]
+
+        if kind == 'children':
+            if event == 'end_array':
+                stack.pop()
+            elif event == 'start_map':
+                parent = frame[1]
+                parent['child_count'] += 1
+                record = {'child_count': 0, 'depth': parent['depth'] + 1, 'order': order,
+                          'parent_id': parent.get('id')}
+                if with_children:
+                    record['children'] = []
+                order += 1
+                stack.append(['node', record, None])
+            elif event == 'start_array':
+                skip_depth = 1
+            continue
+
+        if event == 'map_key':
+            frame[2] = value
+            continue
+
+        if event == 'end_map':
+            stack.pop()
+            if kind == 'node':
+                record = frame[1]
+                yield record
+                if with_children and stack and stack[-1][0] == 'children':
+                    stack[-1][1]['children'].append(
+                        {key: value for key, value in record.items() if key != 'children'}
+                    )
+            continue
+
+        key = frame[2]
+        if kind == 'outer':
+            path = frame[1] + (key,)
+            if event == 'start_map' and any(len(path) == len(p) and _matches(path, p) for p in root_paths):
+                record = {'child_count': 0, 'depth': 0, 'order': order, 'parent_id': None}
+                if with_children:
+                    record['children'] = []
+                order += 1
+                stack.append(['node', record, None])
+            elif event == 'start_map' and any(_matches(path, p) for p in root_paths):
+                stack.append(['outer', path, None])
+            elif event in _START_EVENTS:
+                skip_depth = 1
+            continue
+
+        # Value inside a node object
+        record = frame[1]
+        if key == 'children' and event == 'start_array':
+            stack.append(['children', record])
+        elif key in object_fields:
+            if event in _START_EVENTS:
+                builder = _ValueBuilder(event)
+                builder_target = (record, key)
+            else:
+                record[key] = value
+        elif event in _START_EVENTS:
+            skip_depth = 1
+        elif key in scalar_fields:
+            record[key] = value
+
+
+def iter_frames(source: Union[str, Path, Any], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream FRAME records shaped like FrameExtractor output.
+
+    Frames are yielded as soon as they end (children before parents). Each
+    record also carries its pre-order position under 'order'.
+
+    Args:
+        source (str|Path|file): File path or file object with a file or /nodes response
+        chunk_size (int): Read size in bytes
+
+    Yields:
+        dict: Frame info with id, name, x, y, width, height, child_count and order
+    """
+    for record in iter_node_records(source, chunk_size=chunk_size):
+        if record.get('type') != 'FRAME':
+            continue
+        box = record.get('absoluteBoundingBox') or {}
+        yield {
+            'id': record.get('id'),
+            'name': record.get('name'),
+            'x': box.get('x'),
+            'y': box.get('y'),
+            'width': box.get('width'),
+            'height': box.get('height'),
+            'child_count': record['child_count'],
+            'order': record['order']
+        }
+
+
+def iter_bounds(source: Union[str, Path, Any], root_paths: Iterable[Tuple[str, ...]] = DEFAULT_ROOT_PATHS,
+                with_children: bool = False, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream records for nodes that have an absoluteBoundingBox.
+
+    Args:
+        source (str|Path|file): File path or file object with a file or /nodes response
+        root_paths (iterable): Key paths at which node trees start
+        with_children (bool): Attach compact child records, including children without bounds
+        chunk_size (int): Read size in bytes
+
+    Yields:
+        dict: Node record with id, name, type and absoluteBoundingBox
+    """
+    for record in iter_node_records(source, root_paths, with_children=with_children, chunk_size=chunk_size):
+        if 'absoluteBoundingBox' in record:
+            yield record
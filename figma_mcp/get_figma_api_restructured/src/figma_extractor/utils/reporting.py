@@ -0,0 +1,114 @@
+"""Progress reporting for extractors, processors and file operations."""
+
+import json
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+
+class Reporter(ABC):
+    """Receives progress events as an event name plus keyword fields.
+
+    Library code emits events instead of printing, and the reporter decides
+    whether and how they are shown. Hot loops check ``enabled`` first so a
+    silent reporter costs nothing per item. Subclasses implement emit().
+    """
+
+    enabled = True
+
+    @abstractmethod
+    def emit(self, event: str, **fields: Any) -> None:
+        """Report one event.
+
+        Args:
+            event (str): Dotted event name, e.g. 'distances.pair'
+            **fields: Event data; JSON-serializable values
+        """
+
+
+class NullReporter(Reporter):
+    """Discards every event; the default for library use."""
+
+    enabled = False
+
+    def emit(self, event: str, **fields: Any) -> None:
+        pass
+
+
+def _distance_pair_lines(fields: Dict[str, Any]) -> List[str]:
+    return [
+        f"  Khoảng cách giữa '{fields['node1_name']}' (ID: {fields['node1_id']}) "
+        f"và '{fields['node2_name']}' (ID: {fields['node2_id']}):",
+        f"    Ngang: {fields['horizontal_distance']:.2f}",
+        f"    Dọc: {fields['vertical_distance']:.2f}"
+    ]
+
+
+def _frame_lines(fields: Dict[str, Any]) -> List[str]:
+    return [
+        f"🖼️ Frame: {fields['name']}",
+        f"  ID: {fields['id']}",
+        f"  Position: ({fields['x']}, {fields['y']})",
+        f"  Size: {fields['width']} x {fields['height']}",
+        f"  Children: {fields['child_count']}",
+        "-" * 40
+    ]
+
+
+class ConsoleReporter(Reporter):
+    """Prints events as the human-readable lines the scripts have always shown."""
+
+    FORMATTERS: Dict[str, Callable[[Dict[str, Any]], List[str]]] = {
+        'distances.empty': lambda f: ["Không tìm thấy các node có chứa children để tính khoảng cách."],
+        'distances.start': lambda f: ["✅ Tính toán khoảng cách giữa các đối tượng anh em ruột (siblings):\n"],
+        'distances.parent': lambda f: [f"Parent Node: {f['parent_name']} (ID: {f['parent_id']})"],
+        'distances.pair': _distance_pair_lines,
+        'distances.parent_done': lambda f: ["-" * 60],
+        'incremental.done': lambda f: [f"♻️ Reused {f['reused_nodes']} of {f['nodes']} node(s) "
+                                       f"and {f['reused_distances']} of {f['parents']} parent distance set(s)"],
+        'filter_memo.done': lambda f: [f"🧩 Reused layout of {f['hits']} of {f['lookups']} instance subtree(s) "
+                                       f"({f['hit_rate']:.0%} hit rate)"],
+        'frames.found': lambda f: [f"✅ Tìm thấy {f['count']} FRAME(s)\n"],
+        'frames.frame': _frame_lines,
+        'file.saved': lambda f: [f"✅ Saved data to: {f['path']}"],
+        'file.loaded': lambda f: [f"✅ Loaded data from: {f['path']}"],
+        'file.copied': lambda f: [f"✅ Copied {f['source']} to {f['destination']}"],
+        'file.moved': lambda f: [f"✅ Moved {f['source']} to {f['destination']}"],
+        'file.deleted': lambda f: [f"✅ Deleted file: {f['path']}"],
+        'file.missing': lambda f: [f"❌ File not found: {f['path']}"]
+    }
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """Initialize the console reporter.
+
+        Args:
+            stream (file, optional): Text stream to write to. Defaults to the
+                current sys.stdout.
+        """
+        self.stream = stream
+
+    def emit(self, event: str, **fields: Any) -> None:
+        formatter = self.FORMATTERS.get(event)
+        if formatter is None:
+            lines = [f"{event}: " + ", ".join(f"{key}={value}" for key, value in fields.items())]
+        else:
+            lines = formatter(fields)
+        stream = self.stream or sys.stdout
+        stream.write("\n".join(lines) + "\n")
+
+
+class JsonLinesReporter(Reporter):
+    """Writes one JSON object per event, for logs and machine consumers."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """Initialize the JSON lines reporter.
+
+        Args:
+            stream (file, optional): Text stream to write to. Defaults to the
+                current sys.stdout.
+        """
+        self.stream = stream
+
+    def emit(self, event: str, **fields: Any) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps({'event': event, **fields}, ensure_ascii=False, default=str) + "\n")
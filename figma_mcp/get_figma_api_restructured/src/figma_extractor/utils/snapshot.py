@@ -0,0 +1,430 @@
+"""Binary snapshots of node trees, reopened lazily through mmap.
+
+A snapshot stores a node tree in a layout that can be read in place:
+
+- header: magic, counts and section offsets
+- string table: every id, name and type once, as uint32 offsets into a
+  UTF-8 blob
+- node table: one fixed-size record per node in breadth-first order, so the
+  children of a node are a contiguous range of records
+- properties: each node's fields except ``children`` as compact JSON,
+  comma-separated so the whole section also decodes in one call
+- envelope: the rest of a file or /nodes response (``components``,
+  ``styles``, ...) and the key paths at which the trees were cut out
+
+Opening a snapshot maps the file and reads the header; nodes, strings and
+properties are decoded only when they are accessed.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .json_stream import DEFAULT_ROOT_PATHS
+
+MAGIC = b'FIGSNAP1'
+VERSION = 1
+
+# magic, version, node count, string count, root count, then offsets of the
+# string offsets, string data, node table, properties and envelope sections
+# and the sizes of the properties and envelope sections
+_HEADER = struct.Struct('<8sIIIiQQQQQQQ')
+# id, name and type string numbers, parent, first child, child count,
+# properties offset and length, position of the 'children' key (-1: none)
+_RECORD = struct.Struct('<IIIiIIQIi')
+_NO_STRING = 0xFFFFFFFF
+
+
+def _tree_children(node: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    children = node.get('children')
+    if isinstance(children, list) and all(isinstance(child, dict) for child in children):
+        return children
+    return None
+
+
+def _uint32_bytes(values: List[int]) -> bytes:
+    table = array('I', values)
+    if sys.byteorder != 'little':
+        table.byteswap()
+    return table.tobytes()
+
+
+def _find_roots(data: Any, pattern: Tuple[str, ...], path: Tuple[str, ...] = ()):
+    """Yield (path, node) for every node tree at a key path pattern."""
+    if len(path) == len(pattern):
+        if isinstance(data, dict):
+            yield path, data
+        return
+    if not isinstance(data, dict):
+        return
+    key = pattern[len(path)]
+    for name in (data if key == '*' else [key] if key in data else []):
+        yield from _find_roots(data[name], pattern, path + (name,))
+
+
+def _replace_paths(data: Dict[str, Any], paths: List[List[str]]) -> Dict[str, Any]:
+    """Copy the dicts along each path, replacing the value at its end with None."""
+    data = dict(data)
+    for path in paths:
+        parent = data
+        for key in path[:-1]:
+            parent[key] = dict(parent[key])
+            parent = parent[key]
+        parent[path[-1]] = None
+    return data
+
+
+def write_snapshot(data: Dict[str, Any], stream: BinaryIO,
+                   root_paths: Iterable[Tuple[str, ...]] = DEFAULT_ROOT_PATHS) -> None:
+    """Write node trees and the response around them as a snapshot.
+
+    Args:
+        data (dict): A file or /nodes response, or a bare node with nested ``children``
+        stream (file): Binary stream to write to
+        root_paths (iterable): Key paths at which node trees start. When none
+            matches, ``data`` itself is the tree.
+    """
+    found = [root for pattern in root_paths for root in _find_roots(data, tuple(pattern))]
+    if found:
+        # The envelope keeps every key in place, with null where a tree was cut out
+        paths = [list(path) for path, _ in found]
+        envelope = _replace_paths(data, paths)
+        roots = [node for _, node in found]
+    else:
+        paths = [[]]
+        envelope = None
+        roots = [data]
+    envelope = json.dumps({'data': envelope, 'roots': paths},
+                          separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    string_numbers = {}
+    strings = []
+
+    def intern(value):
+        if not isinstance(value, str):
+            return _NO_STRING
+        number = string_numbers.get(value)
+        if number is None:
+            number = string_numbers[value] = len(strings)
+            strings.append(value.encode('utf-8'))
+        return number
+
+    records = bytearray()
+    properties = []
+    properties_size = 0
+
+    # Breadth-first: the children of each node are appended as one run
+    order = deque((root, -1) for root in roots)
+    count = 0
+    while order:
+        node, parent = order.popleft()
+        children = _tree_children(node)
+        first_child = count + 1 + len(order)
+        if children is not None:
+            order.extend((child, count) for child in children)
+            children_position = list(node).index('children')
+            fields = {key: value for key, value in node.items() if key != 'children'}
+        else:
+            children_position = -1
+            fields = node
+        encoded = json.dumps(fields, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+        records += _RECORD.pack(
+            intern(node.get('id')), intern(node.get('name')), intern(node.get('type')),
+            parent, first_child, len(children) if children is not None else 0,
+            properties_size + count, len(encoded), children_position
+        )
+        properties.append(encoded)
+        properties_size += len(encoded)
+        count += 1
+
+    string_offsets = [0]
+    for encoded in strings:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+    string_table = _uint32_bytes(string_offsets)
+    string_data = b''.join(strings)
+    properties_data = b','.join(properties)
+
+    string_table_offset = _HEADER.size
+    string_data_offset = string_table_offset + len(string_table)
+    nodes_offset = string_data_offset + len(string_data)
+    properties_offset = nodes_offset + len(records)
+    envelope_offset = properties_offset + len(properties_data)
+
+    stream.write(_HEADER.pack(
+        MAGIC, VERSION, count, len(strings), len(roots),
+        string_table_offset, string_data_offset, nodes_offset, properties_offset,
+        envelope_offset, len(properties_data), len(envelope)
+    ))
+    stream.write(string_table)
+    stream.write(string_data)
+    stream.write(records)
+    stream.write(properties_data)
+    stream.write(envelope)
+
+
+class SnapshotNode(Mapping):
+    """Read-only view of one node in a snapshot.
+
+    Behaves like the node dict it was written from: keys come in the
+    original order and ``children`` is a list of SnapshotNodes. ``id``,
+    ``name`` and ``type`` are read from the string table; the other fields
+    are decoded on first access.
+    """
+
+    __slots__ = ('snapshot', 'index', '_fields')
+
+    def __init__(self, snapshot: 'Snapshot', index: int):
+        self.snapshot = snapshot
+        self.index = index
+        self._fields = None
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.snapshot._string(self.snapshot._record(self.index)[0])
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.snapshot._string(self.snapshot._record(self.index)[1])
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.snapshot._string(self.snapshot._record(self.index)[2])
+
+    @property
+    def parent(self) -> Optional['SnapshotNode']:
+        parent = self.snapshot._record(self.index)[3]
+        return SnapshotNode(self.snapshot, parent) if parent >= 0 else None
+
+    @property
+    def children(self) -> List['SnapshotNode']:
+        """Child nodes; empty for leaves."""
+        _, _, _, _, first, count, _, _, _ = self.snapshot._record(self.index)
+        return [SnapshotNode(self.snapshot, index) for index in range(first, first + count)]
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """Every field of the node except ``children``, decoded once."""
+        if self._fields is None:
+            self._fields = self.snapshot._fields(self.index)
+        return self._fields
+
+    def _has_children(self) -> bool:
+        return self.snapshot._record(self.index)[8] >= 0
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'children' and self._has_children():
+            return self.children
+        return self.fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        keys = list(self.fields)
+        position = self.snapshot._record(self.index)[8]
+        if position >= 0:
+            keys.insert(position, 'children')
+        return iter(keys)
+
+    def __len__(self) -> int:
+        return len(self.fields) + self._has_children()
+
+    def __repr__(self) -> str:
+        return f"SnapshotNode(id={self.id!r}, name={self.name!r}, type={self.type!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Decode this node and its subtree into plain dicts."""
+        return self.snapshot._build([self.index])[0]
+
+
+class Snapshot:
+    """A snapshot file opened through mmap.
+
+    Only the header is read when the snapshot is opened; the operating system
+    pages in the parts of the file that are accessed. Close the snapshot (or
+    use it as a context manager) to release the mapping.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Open a snapshot.
+
+        Args:
+            path (str|Path): Snapshot file
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"Not a snapshot file: {self.path}")
+        (magic, version, self.node_count, self.string_count, self.root_count,
+         self._string_table_offset, self._string_data_offset, self._nodes_offset,
+         self._properties_offset, self._envelope_offset, self._properties_size,
+         self._envelope_size) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a version {VERSION} snapshot file: {self.path}")
+
+        self._ids = None
+        self._envelope = None
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    @property
+    def root(self) -> SnapshotNode:
+        """Root node of the first tree (the ``document`` of a file response)."""
+        return SnapshotNode(self, 0)
+
+    @property
+    def roots(self) -> List[SnapshotNode]:
+        """Root node of every tree, in the order of root_paths."""
+        return [SnapshotNode(self, index) for index in range(self.root_count)]
+
+    @property
+    def root_paths(self) -> List[Tuple[str, ...]]:
+        """Key path of every tree in the response; () for a bare tree."""
+        return [tuple(path) for path in self._load_envelope()['roots']]
+
+    def node(self, index: int) -> SnapshotNode:
+        """Get a node by its breadth-first position."""
+        if not 0 <= index < self.node_count:
+            raise IndexError(index)
+        return SnapshotNode(self, index)
+
+    def find(self, node_id: str) -> Optional[SnapshotNode]:
+        """Get a node by ID.
+
+        The first lookup maps every id from the node and string tables;
+        node fields are not decoded.
+        """
+        if self._ids is None:
+            strings = self._strings()
+            ids = {}
+            for index, record in enumerate(self._records()):
+                if record[0] != _NO_STRING:
+                    ids.setdefault(strings[record[0]], index)
+            self._ids = ids
+        index = self._ids.get(node_id)
+        return SnapshotNode(self, index) if index is not None else None
+
+    def iter_nodes(self) -> Iterator[SnapshotNode]:
+        """Iterate nodes in breadth-first order."""
+        for index in range(self.node_count):
+            yield SnapshotNode(self, index)
+
+    @property
+    def envelope(self) -> Optional[Dict[str, Any]]:
+        """The response around the trees, with None in place of each tree.
+
+        None when the snapshot holds a bare tree.
+        """
+        return self._load_envelope()['data']
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Decode the whole snapshot into the data it was written from."""
+        roots = self._build(list(range(self.root_count)))
+        envelope = self._load_envelope()
+        if envelope['data'] is None:
+            return roots[0]
+        data = json.loads(self._mmap[self._envelope_offset:self._envelope_offset + self._envelope_size])['data']
+        for path, root in zip(envelope['roots'], roots):
+            parent = data
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = root
+        return data
+
+    def close(self) -> None:
+        """Release the memory mapping."""
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _record(self, index: int):
+        return _RECORD.unpack_from(self._mmap, self._nodes_offset + index * _RECORD.size)
+
+    def _string(self, number: int) -> Optional[str]:
+        if number == _NO_STRING:
+            return None
+        start, end = struct.unpack_from('<II', self._mmap, self._string_table_offset + number * 4)
+        offset = self._string_data_offset
+        return self._mmap[offset + start:offset + end].decode('utf-8')
+
+    def _fields(self, index: int) -> Dict[str, Any]:
+        offset, length = self._record(index)[6:8]
+        start = self._properties_offset + offset
+        return json.loads(self._mmap[start:start + length])
+
+    def _records(self) -> Iterator[Tuple[Any, ...]]:
+        """Unpack every node record in order."""
+        start = self._nodes_offset
+        return _RECORD.iter_unpack(self._mmap[start:start + self.node_count * _RECORD.size])
+
+    def _strings(self) -> List[str]:
+        """Decode the whole string table."""
+        start = self._string_table_offset
+        offsets = array('I', self._mmap[start:start + (self.string_count + 1) * 4])
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        data = self._mmap[self._string_data_offset:self._string_data_offset + offsets[-1]]
+        return [data[offsets[number]:offsets[number + 1]].decode('utf-8') for number in range(self.string_count)]
+
+    def _load_envelope(self) -> Dict[str, Any]:
+        if self._envelope is None:
+            start = self._envelope_offset
+            self._envelope = json.loads(self._mmap[start:start + self._envelope_size])
+        return self._envelope
+
+    def _build(self, starts: List[int]) -> List[Dict[str, Any]]:
+        """Rebuild the subtrees of some nodes as dicts, without recursion."""
+        # A subtree is not one contiguous range of the breadth-first order,
+        # so collect it level by level; from all roots this is every node
+        if len(starts) == self.root_count and list(starts) == list(range(self.root_count)):
+            # From all roots the levels are the whole breadth-first order
+            indexes = range(self.node_count)
+            records = list(self._records())
+        else:
+            indexes = list(starts)
+            records = [self._record(index) for index in indexes]
+            position = 0
+            while position < len(indexes):
+                first, count = records[position][4:6]
+                for child in range(first, first + count):
+                    indexes.append(child)
+                    records.append(self._record(child))
+                position += 1
+
+        if len(indexes) == self.node_count:
+            # Decode the comma-separated section of every node in one call
+            start = self._properties_offset
+            fields = json.loads(b'[' + self._mmap[start:start + self._properties_size] + b']')
+        else:
+            fields = [self._fields(node_index) for node_index in indexes]
+
+        nodes = {}
+        # Children are finished before their parents when walking backwards
+        for slot in range(len(indexes) - 1, -1, -1):
+            _, _, _, _, first, count, _, _, children_position = records[slot]
+            node = fields[slot]
+            if children_position >= 0:
+                children = [nodes.pop(child) for child in range(first, first + count)]
+                if children_position == len(node):
+                    node['children'] = children
+                else:
+                    items = list(node.items())
+                    items.insert(children_position, ('children', children))
+                    node = dict(items)
+            nodes[indexes[slot]] = node
+        return [nodes[index] for index in starts]
@@ -0,0 +1,241 @@
+"""Local stand-in for the Figma REST API used by tests and benchmarks."""
+
+import gzip
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler serving canned Figma documents."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls on keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        stub = self.server.stub
+        with stub.lock:
+            stub.connection_count += 1
+        if stub.connect_latency:
+            # Simulates the TCP+TLS handshake cost paid once per new connection
+            threading.Event().wait(stub.connect_latency)
+
+    def log_message(self, format: str, *args) -> None:
+        """Silence the default stderr access log."""
+
+    def do_GET(self) -> None:
+        stub = self.server.stub
+        with stub.lock:
+            stub.request_count += 1
+            stub.active_requests += 1
+            stub.max_active_requests = max(stub.max_active_requests, stub.active_requests)
+        try:
+            self._handle_get()
+        finally:
+            with stub.lock:
+                stub.active_requests -= 1
+
+    def _handle_get(self) -> None:
+        stub = self.server.stub
+        with stub.lock:
+            injected = stub.injected_errors.pop(0) if stub.injected_errors else None
+        if injected:
+            status, headers = injected
+            self._send_json(status, {'status': status, 'err': 'Injected error'}, headers)
+            return
+
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        parts = [part for part in parsed.path.split('/') if part]
+
+        # Expected paths: /v1/files/<key>[/nodes|/components]
+        if len(parts) < 3 or parts[:2] != ['v1', 'files']:
+            self._send_json(404, {'status': 404, 'err': 'Not found'})
+            return
+
+        file_key = parts[2]
+        document = stub.documents.get(file_key)
+        if document is None:
+            self._send_json(404, {'status': 404, 'err': 'Not found'})
+            return
+
+        depth = int(params['depth']) if 'depth' in params else None
+        endpoint = parts[3] if len(parts) > 3 else None
+        if endpoint is None:
+            if depth is not None:
+                document = dict(document, document=stub.truncate(document.get('document', {}), depth))
+            self._send_json(200, document)
+        elif endpoint == 'nodes':
+            self._send_json(200, stub.build_nodes_response(document, params.get('ids', ''), depth))
+        elif endpoint == 'components':
+            components = document.get('components', {})
+            self._send_json(200, {'status': 200, 'error': False, 'meta': {'components': components}})
+        else:
+            self._send_json(404, {'status': 404, 'err': 'Not found'})
+
+    def _send_json(self, status: int, payload: Dict[str, Any], extra_headers: Optional[Dict[str, str]] = None) -> None:
+        stub = self.server.stub
+        if stub.latency:
+            threading.Event().wait(stub.latency)
+
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        headers.update(extra_headers or {})
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        headers['Content-Length'] = str(len(body))
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    """Threading server that ignores clients hanging up mid-response."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FigmaStubServer:
+    """In-process HTTP server that mimics the Figma file endpoints.
+
+    Serves ``/v1/files/<key>``, ``/v1/files/<key>/nodes`` and
+    ``/v1/files/<key>/components`` from a dictionary of documents, and counts
+    requests, TCP connections and peak in-flight requests so callers can
+    verify connection reuse and concurrency limits.
+    """
+
+    def __init__(self, documents: Optional[Dict[str, Dict[str, Any]]] = None, latency: float = 0.0,
+                 connect_latency: float = 0.0):
+        """Initialize the stub server.
+
+        Args:
+            documents (dict, optional): Mapping of file key to file response data
+            latency (float): Artificial delay in seconds added to every response
+            connect_latency (float): Artificial delay in seconds added to every new connection
+        """
+        self.documents = documents or {}
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.request_count = 0
+        self.connection_count = 0
+        self.active_requests = 0
+        self.max_active_requests = 0
+        self.injected_errors = []
+        self.lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to ``FigmaAPIClient(base_url=...)``."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'FigmaStubServer':
+        """Start serving on a free localhost port in a background thread."""
+        self._server = _StubHTTPServer(('127.0.0.1', 0), _StubRequestHandler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and wait for the serving thread to exit."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def inject_error(self, status: int, count: int = 1, headers: Optional[Dict[str, str]] = None) -> None:
+        """Answer the next requests with an error status instead of data.
+
+        Args:
+            status (int): HTTP status code to return, e.g. 429
+            count (int): Number of requests to fail
+            headers (dict, optional): Extra response headers, e.g. Retry-After
+        """
+        with self.lock:
+            self.injected_errors.extend([(status, headers or {})] * count)
+
+    def reset_counters(self) -> None:
+        """Reset request and connection counters."""
+        with self.lock:
+            self.request_count = 0
+            self.connection_count = 0
+            self.max_active_requests = 0
+
+    @staticmethod
+    def truncate(node: Dict[str, Any], depth: int) -> Dict[str, Any]:
+        """Copy a node tree, dropping children deeper than ``depth`` levels.
+
+        Args:
+            node (dict): Root node
+            depth (int): Number of child levels to keep below the root
+
+        Returns:
+            dict: Truncated copy of the tree
+        """
+        root = dict(node)
+        stack = [(root, depth)]
+        while stack:
+            current, remaining = stack.pop()
+            if 'children' not in current:
+                continue
+            if remaining <= 0:
+                del current['children']
+                continue
+            current['children'] = [dict(child) for child in current['children']]
+            stack.extend((child, remaining - 1) for child in current['children'])
+        return root
+
+    def build_nodes_response(self, document: Dict[str, Any], ids: str, depth: Optional[int] = None) -> Dict[str, Any]:
+        """Build a ``/nodes`` response for comma-separated node IDs.
+
+        Args:
+            document (dict): File response data
+            ids (str): Comma-separated node IDs
+            depth (int, optional): Number of child levels to return below each node
+
+        Returns:
+            dict: Response with a ``nodes`` map, unknown IDs mapped to None
+        """
+        wanted = {node_id.replace('-', ':') for node_id in ids.split(',') if node_id}
+        found = {}
+        stack = [document.get('document', {})]
+        while stack and len(found) < len(wanted):
+            node = stack.pop()
+            if node.get('id') in wanted:
+                found[node['id']] = node
+            stack.extend(node.get('children', []))
+
+        nodes = {}
+        for node_id in sorted(wanted):
+            node = found.get(node_id)
+            if node and depth is not None:
+                node = self.truncate(node, depth)
+            nodes[node_id] = {'document': node, 'components': {}, 'styles': {}} if node else None
+
+        response = {key: value for key, value in document.items() if key != 'document'}
+        response['nodes'] = nodes
+        return response
+
+    def __enter__(self) -> 'FigmaStubServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
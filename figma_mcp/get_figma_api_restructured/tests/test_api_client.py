@@ -0,0 +1,431 @@
+"""Tests for the Figma API client."""
+
+import asyncio
+import copy
+import tempfile
+import time
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from figma_extractor.core.api_client import FigmaAPIClient
+from figma_extractor.core.async_api_client import AsyncFigmaAPIClient
+from figma_extractor.core.lazy_document import LazyDocument
+from figma_extractor.core.rate_limiter import RequestScheduler
+from figma_extractor.core.response_cache import ResponseCache
+from figma_extractor.extractors.frame_extractor import FrameExtractor
+from figma_extractor.utils.stub_server import FigmaStubServer
+
+
+SAMPLE_FILE = {
+    'name': 'Sample',
+    'version': '1',
+    'lastModified': '2025-07-31T11:04:29Z',
+    'document': {
+        'id': '0:0',
+        'type': 'DOCUMENT',
+        'children': [
+            {'id': '1:1', 'name': 'Frame', 'type': 'FRAME', 'children': []}
+        ]
+    }
+}
+
+
+class TestFigmaAPIClientSession(unittest.TestCase):
+    """Test cases for the pooled HTTP session."""
+
+    def setUp(self):
+        """Start a local stand-in for the Figma API."""
+        self.server = FigmaStubServer({'sample': SAMPLE_FILE}).start()
+        self.addCleanup(self.server.stop)
+
+    def test_requests_reuse_one_connection(self):
+        """Test that sequential calls share a single keep-alive connection."""
+        with FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url) as client:
+            client.get_file()
+            client.get_file_nodes('1-1')
+            client.get_file_components()
+
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_gzip_response_is_decoded(self):
+        """Test that gzip is negotiated and transparently decoded."""
+        with FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url) as client:
+            self.assertIn('gzip', client.session.headers['Accept-Encoding'])
+            data = client.get_file()
+
+        self.assertEqual(data['document']['children'][0]['id'], '1:1')
+
+    def test_close_keeps_caller_session_open(self):
+        """Test that close() only closes sessions owned by the client."""
+        owned = FigmaAPIClient(token='test', base_url=self.server.base_url)
+        shared = FigmaAPIClient(token='test', base_url=self.server.base_url, session=owned.session)
+
+        with patch.object(owned.session, 'close') as mock_close:
+            shared.close()
+            mock_close.assert_not_called()
+            owned.close()
+            mock_close.assert_called_once()
+
+
+class FakeClock:
+    """Deterministic clock whose sleep advances time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """Test cases for the rate-limiting request scheduler."""
+
+    def setUp(self):
+        """Start a local stand-in for the Figma API and a scheduler on a fake clock."""
+        self.server = FigmaStubServer({'sample': SAMPLE_FILE}).start()
+        self.addCleanup(self.server.stop)
+        self.clock = FakeClock()
+        self.scheduler = RequestScheduler(rate=2, burst=2, clock=self.clock, sleep=self.clock.sleep,
+                                          jitter=lambda: 0.5)
+        self.client = FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url,
+                                     scheduler=self.scheduler)
+        self.addCleanup(self.client.close)
+
+    def test_retry_after_is_honoured(self):
+        """Test that a 429 waits for Retry-After plus jitter, then succeeds."""
+        self.server.inject_error(429, headers={'Retry-After': '7'})
+
+        data = self.client.get_file()
+
+        self.assertEqual(data['name'], 'Sample')
+        self.assertEqual(self.clock.sleeps, [7.5])
+        stats = self.scheduler.stats()
+        self.assertEqual((stats['throttled'], stats['retried'], stats['failed']), (1, 1, 0))
+
+    def test_fatal_status_is_not_retried(self):
+        """Test that a 403 fails immediately without retrying."""
+        self.server.inject_error(403)
+
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_file()
+
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.scheduler.stats()['retried'], 0)
+
+    def test_server_errors_use_jittered_backoff_until_exhausted(self):
+        """Test that 5xx errors back off exponentially and give up after max attempts."""
+        self.server.inject_error(503, count=3)
+
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_file()
+
+        self.assertEqual(self.clock.sleeps, [1.0, 2.0])
+        self.assertEqual(self.scheduler.stats()['failed'], 1)
+
+    def test_interrupted_body_is_retried(self):
+        """Test that a response cut off mid-body is retried like a connection error."""
+        responses = [requests.exceptions.ChunkedEncodingError('connection broken'), Mock(status_code=200)]
+
+        def send():
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        self.assertEqual(self.scheduler.execute(send).status_code, 200)
+        self.assertEqual(self.clock.sleeps, [1.0])
+        self.assertEqual(self.scheduler.stats()['retried'], 1)
+
+    def test_retried_responses_are_closed(self):
+        """Test that a retryable response releases its connection before the retry."""
+        failed = Mock(status_code=503, url='https://api.figma.com/v1/files/sample')
+        responses = [failed, Mock(status_code=200)]
+
+        self.scheduler.execute(lambda: responses.pop(0))
+
+        failed.close.assert_called_once()
+        self.assertEqual(self.clock.sleeps, [1.0])
+
+    def test_token_bucket_limits_rate(self):
+        """Test that requests beyond the burst wait for new tokens."""
+        for _ in range(4):
+            self.scheduler.acquire()
+
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+
+class TestBatchedNodeFetching(unittest.TestCase):
+    """Test cases for batched multi-node requests."""
+
+    def setUp(self):
+        """Start a local stand-in for the Figma API with many nodes."""
+        children = [{'id': f'1:{i}', 'name': f'Node {i}', 'type': 'FRAME'} for i in range(300)]
+        document = dict(SAMPLE_FILE, document={'id': '0:0', 'type': 'DOCUMENT', 'children': children})
+        self.server = FigmaStubServer({'sample': document}).start()
+        self.addCleanup(self.server.stop)
+
+    def test_round_trips_grow_with_batches(self):
+        """Test that 300 nodes are fetched in a handful of merged requests."""
+        node_ids = [f'1:{i}' for i in range(300)]
+        batches = FigmaAPIClient._batch_node_ids(node_ids, 500)
+
+        with FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url) as client:
+            url_length = len(f"{client.base_url}/files/sample/nodes?ids=")
+            data = client.get_file_nodes_batched(node_ids, max_url_length=500 + url_length)
+
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(self.server.request_count, len(batches))
+        self.assertEqual(client.request_count, len(batches))
+        self.assertEqual(set(data['nodes']), set(node_ids))
+        self.assertEqual(data['name'], 'Sample')
+
+    def test_batches_respect_url_budget(self):
+        """Test that every encoded batch fits the length budget, keeping order and dropping duplicates."""
+        node_ids = [f'{i}:{i * 7}' for i in range(200)] + ['0:0']
+        batches = FigmaAPIClient._batch_node_ids(node_ids, 120)
+
+        for batch in batches:
+            self.assertLessEqual(len(','.join(batch).replace(':', '%3A').replace(',', '%2C')), 120)
+        self.assertEqual([node_id for batch in batches for node_id in batch], node_ids[:-1])
+
+
+def build_deep_file(pages=2, frames=3, depth=4):
+    """Build a file whose frames each contain a chain of nested groups with text leaves."""
+    def subtree(prefix, level):
+        node = {'id': f'{prefix}:{level}', 'name': f'Group {level}', 'type': 'GROUP',
+                'fills': [{'type': 'SOLID', 'color': {'r': 1, 'g': 1, 'b': 1, 'a': 1}}] * 5,
+                'absoluteBoundingBox': {'x': level, 'y': level, 'width': 10, 'height': 10}}
+        leaf = {'id': f'{prefix}:t{level}', 'name': 'Label', 'type': 'TEXT', 'characters': 'x' * 200}
+        node['children'] = [leaf] + ([subtree(prefix, level + 1)] if level < depth else [])
+        return node
+
+    canvases = []
+    for p in range(pages):
+        children = [
+            {'id': f'{p + 1}:{f + 100}', 'name': f'Screen {p}-{f}', 'type': 'FRAME',
+             'absoluteBoundingBox': {'x': f * 100, 'y': 0, 'width': 90, 'height': 90},
+             'children': [subtree(f'{p}{f}', 1)]}
+            for f in range(frames)
+        ]
+        canvases.append({'id': f'0:{p + 1}', 'name': f'Page {p}', 'type': 'CANVAS', 'children': children})
+    return dict(SAMPLE_FILE, document={'id': '0:0', 'type': 'DOCUMENT', 'children': canvases})
+
+
+class TestLazyDocument(unittest.TestCase):
+    """Test cases for depth-limited, lazily expanded documents."""
+
+    def setUp(self):
+        """Start a local stand-in for the Figma API with a nested file."""
+        self.file = build_deep_file()
+        self.server = FigmaStubServer({'sample': self.file}).start()
+        self.addCleanup(self.server.stop)
+        self.client = FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url,
+                                     scheduler=RequestScheduler(rate=1000, burst=100))
+        self.addCleanup(self.client.close)
+
+    def test_children_are_fetched_on_access(self):
+        """Test that descending past the skeleton fetches the subtree."""
+        document = LazyDocument(self.client, depth=2)
+        frame = document.document['children'][0]['children'][0]
+        self.assertFalse(frame.is_loaded)
+
+        group = frame['children'][0]
+
+        self.assertEqual(group['name'], 'Group 1')
+        self.assertEqual(document.expand_requests, 1)
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_fully_loaded_document_matches_original(self):
+        """Test that loading every level reproduces the full document."""
+        document = LazyDocument(self.client)
+        document.load()
+
+        self.assertEqual(document.unloaded_nodes(), [])
+        self.assertEqual(document.document, self.file['document'])
+
+    def test_shallow_frame_listing_transfers_fewer_bytes(self):
+        """Test that depth-limited frame listing matches a full scan at a fraction of the bytes."""
+        extractor = FrameExtractor(self.client)
+        with patch('builtins.print') as mock_print:
+            full = []
+            extractor._find_frames(self.client.get_file()['document'], full, max_depth=2)
+            full_bytes = self.client.bytes_received
+
+            lazy = extractor.extract_lazy(max_depth=2)
+        lazy_bytes = self.client.bytes_received - full_bytes
+
+        self.assertEqual(lazy, full)
+        self.assertLess(lazy_bytes, full_bytes / 2)
+        mock_print.assert_not_called()
+
+
+class TestStreamedFrames(unittest.TestCase):
+    """Test cases for frames parsed from the streamed HTTP response."""
+
+    def setUp(self):
+        """Start a local stand-in for the Figma API with a nested file."""
+        self.file = build_deep_file()
+        self.server = FigmaStubServer({'sample': self.file}).start()
+        self.addCleanup(self.server.stop)
+        self.client = FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url,
+                                     scheduler=RequestScheduler(rate=1000, burst=100))
+        self.addCleanup(self.client.close)
+
+    def test_streamed_frames_match_full_download(self):
+        """Test that frames parsed from the HTTP stream equal those from the parsed response."""
+        extractor = FrameExtractor(self.client)
+        with patch('builtins.print') as mock_print:
+            full = []
+            extractor._find_frames(self.client.get_file()['document'], full)
+
+            streamed = extractor.extract_stream()
+
+        self.assertEqual(streamed, full)
+        self.assertEqual(self.server.request_count, 2)
+        mock_print.assert_not_called()
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the version-aware response cache."""
+
+    def setUp(self):
+        """Start a local stand-in for the Figma API and an empty cache."""
+        self.document = copy.deepcopy(SAMPLE_FILE)
+        self.server = FigmaStubServer({'sample': self.document}).start()
+        self.addCleanup(self.server.stop)
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+
+    def _client(self, cache):
+        client = FigmaAPIClient(token='test', file_key='sample', base_url=self.server.base_url, cache=cache)
+        self.addCleanup(client.close)
+        return client
+
+    def test_unchanged_file_is_served_from_cache(self):
+        """Test that a second fetch only costs the metadata request."""
+        cache = ResponseCache(self.cache_dir)
+        client = self._client(cache)
+
+        first = client.get_file()
+        self.server.reset_counters()
+        second = client.get_file()
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_new_version_triggers_download(self):
+        """Test that a changed version invalidates the cached response."""
+        cache = ResponseCache(self.cache_dir)
+        client = self._client(cache)
+        client.get_file_nodes('1-1')
+
+        self.document['version'] = '2'
+        self.document['document']['children'][0]['name'] = 'Renamed'
+        data = client.get_file_nodes('1-1')
+
+        self.assertEqual(data['nodes']['1:1']['document']['name'], 'Renamed')
+        self.assertEqual(cache.stats()['stale'], 1)
+
+    def test_cache_persists_across_instances(self):
+        """Test that cached responses survive a new cache instance."""
+        self._client(ResponseCache(self.cache_dir)).get_file()
+
+        cache = ResponseCache(self.cache_dir)
+        self._client(cache).get_file()
+
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_lru_eviction_respects_size_bound(self):
+        """Test that least recently used entries are evicted first."""
+        cache = ResponseCache(self.cache_dir, max_bytes=100)
+        payload = {'data': 'x' * 30}
+        cache.put('a', payload, '1', 't')
+        cache.put('b', payload, '1', 't')
+        cache.get('a', '1', 't')
+        cache.put('c', payload, '1', 't')
+
+        self.assertIsNotNone(cache.get('a', '1', 't'))
+        self.assertIsNone(cache.get('b', '1', 't'))
+        self.assertLessEqual(cache.total_bytes, 100)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+class TestAsyncFigmaAPIClient(unittest.TestCase):
+    """Test cases for the asyncio client."""
+
+    def setUp(self):
+        """Start a slow local stand-in for the Figma API with several files."""
+        documents = {f'file{i}': dict(SAMPLE_FILE, name=f'File {i}') for i in range(6)}
+        self.server = FigmaStubServer(documents, latency=0.05).start()
+        self.addCleanup(self.server.stop)
+
+    def test_concurrency_is_bounded(self):
+        """Test that files are fetched concurrently up to the semaphore limit."""
+        async def fetch():
+            scheduler = RequestScheduler(rate=1000, burst=100)
+            async with AsyncFigmaAPIClient(token='test', base_url=self.server.base_url,
+                                           max_concurrency=3, scheduler=scheduler) as client:
+                return await client.get_files(f'file{i}' for i in range(6))
+
+        results = asyncio.run(fetch())
+
+        self.assertEqual([data['name'] for data in results.values()], [f'File {i}' for i in range(6)])
+        self.assertEqual(self.server.max_active_requests, 3)
+        self.assertLessEqual(self.server.connection_count, 3)
+
+    def test_request_timeout(self):
+        """Test that slow requests fail with a timeout."""
+        async def fetch():
+            async with AsyncFigmaAPIClient(token='test', file_key='file0', base_url=self.server.base_url,
+                                           request_timeout=0.01) as client:
+                return await client.get_file()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(fetch())
+
+    def test_requests_after_timeouts_still_run(self):
+        """Test that calls still running after a timeout hold their slot without failing later requests."""
+        delays = [0.8, 0.8, 0.01, 0.01]
+        calls = []
+
+        def get_file(file_key):
+            calls.append(file_key)
+            time.sleep(delays[len(calls) - 1])
+            return {'name': file_key}
+
+        client = Mock(spec=FigmaAPIClient, file_key='file0')
+        client.get_file.side_effect = get_file
+
+        async def fetch():
+            async with AsyncFigmaAPIClient(client=client, max_concurrency=2, request_timeout=0.3) as async_client:
+                hung = await asyncio.gather(async_client.get_file('hung0'), async_client.get_file('hung1'),
+                                            return_exceptions=True)
+                later = await asyncio.gather(async_client.get_file('file1'), async_client.get_file('file2'))
+                return hung, later
+
+        hung, later = asyncio.run(fetch())
+
+        self.assertTrue(all(isinstance(error, asyncio.TimeoutError) for error in hung))
+        self.assertEqual(later, [{'name': 'file1'}, {'name': 'file2'}])
+        self.assertEqual(calls, ['hung0', 'hung1', 'file1', 'file2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
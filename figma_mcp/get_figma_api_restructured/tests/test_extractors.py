@@ -1,17 +1,24 @@
 """Tests for Figma extractors."""
 
+import math
+import random
 import unittest
 import sys
 from pathlib import Path
+import tempfile
 from unittest.mock import Mock, patch
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from figma_extractor.core.api_client import FigmaAPIClient
+from figma_extractor.core.document_index import DocumentIndex
+from figma_extractor.core.document_session import DocumentSession
+from figma_extractor.core.spatial_index import SpatialIndex
 from figma_extractor.extractors.token_extractor import TokenExtractor
 from figma_extractor.extractors.frame_extractor import FrameExtractor
 from figma_extractor.extractors.component_extractor import ComponentExtractor
+from figma_extractor.utils.file_handler import FileHandler
 
 
 class TestTokenExtractor(unittest.TestCase):
@@ -82,7 +89,238 @@ class TestComponentExtractor(unittest.TestCase):
             'bottom': 10.0
         }
         self.assertEqual(padding, expected)
+    
+    def test_extract_many_uses_batched_request(self):
+        """Test that multiple nodes are fetched in one batched call and cleaned."""
+        self.mock_client.get_file_nodes_batched.return_value = {
+            'nodes': {
+                '1:1': {'document': {'id': '1:1', 'name': 'A', 'type': 'FRAME', 'fills': []}},
+                '1:2': {'document': {'id': '1:2', 'name': 'B', 'type': 'TEXT', 'scrollBehavior': 'FIXED'}},
+                '1:3': None
+            }
+        }
+        
+        with patch.object(self.extractor.file_handler, 'save_json'):
+            result = self.extractor.extract_many(['1-1', '1-2', '1-3'])
+        
+        self.mock_client.get_file_nodes_batched.assert_called_once()
+        self.assertEqual(list(result), ['1-1', '1-2'])
+        self.assertEqual(result['1-2'], {'id': '1:2', 'name': 'B', 'type': 'TEXT'})
+    
+    def test_dedupe_mode_saves_component_table(self):
+        """Test that dedupe mode saves instances as references and loads them back inlined."""
+        def instance(row):
+            y = 40.0 * row
+            return {'id': f'2:{row}', 'name': 'Row', 'type': 'INSTANCE', 'componentId': '9:1',
+                    'absoluteBoundingBox': {'x': 0.0, 'y': y, 'width': 100.0, 'height': 40.0},
+                    'children': [{'id': f'I2:{row};9:2', 'name': 'Label', 'type': 'TEXT', 'characters': f'Row {row}',
+                                  'absoluteBoundingBox': {'x': 8.0, 'y': y + 8, 'width': 80.0, 'height': 24.0}}]}
+        
+        self.mock_client.get_file_nodes_batched.return_value = {'nodes': {
+            '1:1': {'document': {'id': '1:1', 'name': 'List', 'type': 'FRAME',
+                                 'children': [instance(row) for row in range(3)]}}
+        }}
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        extractor = ComponentExtractor(self.mock_client, file_handler=FileHandler(output_dir.name, output_dir.name),
+                                       dedupe_instances=True)
+        
+        result = extractor.extract_many(['1:1'])
+        saved = extractor.file_handler.load_json('clean_figma_output.json')
+        
+        self.assertEqual(list(saved['components']), ['9:1'])
+        rows = saved['document']['1:1']['children']
+        self.assertEqual([row['instanceOf'] for row in rows], ['9:1'] * 3)
+        self.assertEqual(rows[2]['patch']['children'], {'0': {'set': {'characters': 'Row 2'}}})
+        self.assertEqual(extractor.load_clean_output(), result)
+
+
+
+class TestDocumentSession(unittest.TestCase):
+    """Test cases for DocumentSession sharing."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.mock_client = Mock(spec=FigmaAPIClient)
+        self.mock_client.file_key = 'sample'
+        self.mock_client.bytes_received = 0
+        self.mock_client.cache = None
+        self.mock_client.scheduler = None
+        self.mock_client.get_file.return_value = {
+            'document': {'id': '0:0', 'type': 'DOCUMENT', 'children': [
+                {'id': '1:1', 'name': 'Frame', 'type': 'FRAME', 'children': []}
+            ]}
+        }
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.session = DocumentSession(
+            self.mock_client, FileHandler(output_dir.name, output_dir.name)
+        )
+    
+    def test_extractors_share_one_fetch(self):
+        """Test that token and frame extraction download the file once."""
+        tokens = TokenExtractor(self.mock_client, self.session).extract()
+        frames = FrameExtractor(self.mock_client, self.session).extract()
+        
+        self.mock_client.get_file.assert_called_once()
+        self.assertIs(tokens, self.session.get_file())
+        self.assertEqual(len(frames), 1)
+        
+        report = self.session.report()
+        self.assertEqual(report['fetch_count'], 1)
+        self.assertEqual(report['reuse_count'], 2)
 
+    
+    def test_frame_lookup_uses_shared_index(self):
+        """Test that repeated frame lookups neither refetch nor rebuild the index."""
+        extractor = FrameExtractor(self.mock_client, self.session)
+        
+        frame = extractor.get_frame_by_id('1:1')
+        missing = extractor.get_frame_by_id('9:9')
+        
+        matches = extractor.get_frames_by_name('fra')
+        
+        self.mock_client.get_file.assert_called_once()
+        self.assertIs(self.session.get_index(), self.session.get_index())
+        self.assertEqual(frame['name'], 'Frame')
+        self.assertIsNone(missing)
+        self.assertEqual(matches, [frame])
+
+
+class TestDocumentIndex(unittest.TestCase):
+    """Test cases for DocumentIndex lookups."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.index = DocumentIndex({
+            'document': {'id': '0:0', 'type': 'DOCUMENT', 'children': [
+                {'id': '0:1', 'type': 'CANVAS', 'children': [
+                    {'id': '1:1', 'type': 'FRAME', 'children': [
+                        {'id': '1:2', 'type': 'TEXT'},
+                        {'id': '1:3', 'type': 'FRAME', 'children': [{'id': '1:4', 'type': 'TEXT'}]}
+                    ]},
+                    {'id': '2:1', 'type': 'FRAME'}
+                ]}
+            ]}
+        })
+    
+    def test_lookups(self):
+        """Test id, parent, type and depth lookups."""
+        self.assertEqual(len(self.index), 7)
+        self.assertEqual(self.index.get('1-3')['id'], '1:3')
+        self.assertEqual(self.index.get_parent('1:4')['id'], '1:3')
+        self.assertIsNone(self.index.get_parent('0:0'))
+        self.assertEqual(self.index.get_ids_by_type('FRAME'), ['1:1', '1:3', '2:1'])
+        self.assertEqual(self.index.get_depth('1:4'), 4)
+    
+    def test_ancestor_queries(self):
+        """Test ancestor chains and constant-time containment checks."""
+        self.assertEqual([node['id'] for node in self.index.get_ancestors('1:4')],
+                         ['1:3', '1:1', '0:1', '0:0'])
+        self.assertTrue(self.index.is_ancestor('1:1', '1:4'))
+        self.assertTrue(self.index.is_ancestor('0:0', '2:1'))
+        self.assertFalse(self.index.is_ancestor('1:1', '2:1'))
+        self.assertFalse(self.index.is_ancestor('1:4', '1:4'))
+        self.assertFalse(self.index.is_ancestor('1:3', '1:1'))
+    
+    def test_name_search(self):
+        """Test substring, prefix, exact and case-sensitive name queries."""
+        names = {'1:1': 'Login Screen', '1:2': 'Title', '1:3': 'Login Button', '1:4': 'label', '2:1': 'Sign up'}
+        for node_id, name in names.items():
+            self.index.get(node_id)['name'] = name
+        name_index = self.index.name_index
+        
+        self.assertEqual(name_index.search('login'), ['1:1', '1:3'])
+        self.assertEqual(name_index.search('n', node_type='FRAME'), ['1:1', '1:3', '2:1'])
+        self.assertEqual(name_index.search('l'), ['1:1', '1:2', '1:3', '1:4'])
+        self.assertEqual(name_index.search('Button', case_sensitive=True), ['1:3'])
+        self.assertEqual(name_index.search('button', case_sensitive=True), [])
+        self.assertEqual(name_index.search('LOG', mode='prefix'), ['1:1', '1:3'])
+        self.assertEqual(name_index.search('sign up', mode='exact'), ['2:1'])
+        self.assertEqual(name_index.search('screens'), [])
+    
+    def test_geometry_store(self):
+        """Test that stored boxes round-trip with their int/float types."""
+        boxes = {'1:1': {'x': 0, 'y': 0.5, 'width': 400, 'height': 800.25},
+                 '1:4': {'x': -30.125, 'y': 110, 'width': 24, 'height': 24}}
+        for node_id, box in boxes.items():
+            self.index.get(node_id)['absoluteBoundingBox'] = box
+        geometry = self.index.geometry
+        
+        self.assertEqual(len(geometry), 2)
+        self.assertNotIn('1:2', geometry)
+        self.assertIsNone(geometry.get('1:2'))
+        for node_id, box in boxes.items():
+            stored = geometry.get_dict(node_id)
+            self.assertEqual(stored, box)
+            self.assertEqual([type(value) for value in stored.values()], [type(value) for value in box.values()])
+        self.assertEqual(geometry.box(geometry.number('1:4')), (-30.125, 110, 24, 24))
+        self.assertEqual(geometry.nbytes, 2 * 4 * 8 + 2)
+        
+        # Frames read from the store match those read from the nodes, number types included
+        extractor = FrameExtractor(Mock(spec=FigmaAPIClient))
+        frames, stored_frames = [], []
+        extractor._find_frames(self.index.get('0:0'), frames)
+        extractor._find_frames(self.index.get('0:0'), stored_frames, geometry=geometry)
+        self.assertEqual(repr(stored_frames), repr(frames))
+    
+    def test_spatial_queries(self):
+        """Test intersection, containment, hit-test and nearest queries against a full scan."""
+        boxes = {'1:1': (0, 0, 400, 800), '1:2': (20, 20, 100, 30), '1:3': (20, 100, 200, 48),
+                 '1:4': (30, 110, 24, 24), '2:1': (500, 0, 400, 800)}
+        for node_id, (x, y, width, height) in boxes.items():
+            self.index.get(node_id)['absoluteBoundingBox'] = {'x': x, 'y': y, 'width': width, 'height': height}
+        spatial_index = self.index.spatial_index
+        
+        self.assertEqual(len(spatial_index), 5)
+        self.assertEqual(spatial_index.at_point(40, 120), ['1:1', '1:3', '1:4'])
+        self.assertEqual(spatial_index.at_point(450, 10), [])
+        self.assertEqual(spatial_index.intersecting(100, 40, 300, 80), ['1:1', '1:2', '1:3'])
+        self.assertEqual(spatial_index.intersecting(400, 0, 100, 10), ['1:1', '2:1'])  # Touching edges
+        self.assertEqual(spatial_index.within(0, 0, 250, 200), ['1:2', '1:3', '1:4'])
+        self.assertEqual(spatial_index.nearest(450, 10, k=2), ['1:1', '2:1'])
+        self.assertEqual(spatial_index.nearest(60, 60, k=2), ['1:1', '1:2'])
+        
+        rng = random.Random(15)
+        nodes = []
+        for index in range(300):
+            size = rng.choice([rng.uniform(0, 40), rng.uniform(0, 3000)])
+            nodes.append((f'3:{index}', {'absoluteBoundingBox': {
+                'x': rng.uniform(-1000, 1000), 'y': rng.uniform(-1000, 1000), 'width': size, 'height': 30}}))
+        spatial_index = SpatialIndex(nodes)
+        for _ in range(50):
+            x, y = rng.uniform(-1200, 1200), rng.uniform(-1200, 1200)
+            width, height = rng.uniform(0, 500), rng.uniform(0, 500)
+            expected = [node_id for node_id, node in nodes
+                        if node['absoluteBoundingBox']['x'] <= x + width
+                        and x <= node['absoluteBoundingBox']['x'] + node['absoluteBoundingBox']['width']
+                        and node['absoluteBoundingBox']['y'] <= y + height
+                        and y <= node['absoluteBoundingBox']['y'] + node['absoluteBoundingBox']['height']]
+            self.assertEqual(spatial_index.intersecting(x, y, width, height), expected)
+            
+            def distance(node):
+                box = node['absoluteBoundingBox']
+                return math.hypot(max(box['x'] - x, 0, x - box['x'] - box['width']),
+                                  max(box['y'] - y, 0, y - box['y'] - box['height']))
+            ranked = sorted(range(len(nodes)), key=lambda i: (distance(nodes[i][1]), i))[:5]
+            self.assertEqual(spatial_index.nearest(x, y, k=5), [nodes[i][0] for i in ranked])
+    
+    def test_nearest_stops_once_every_node_is_found(self):
+        """Test nearest queries asking for every node, and far-apart clusters."""
+        nodes = [(f'1:{index}', {'absoluteBoundingBox': {'x': index % 10 * 2, 'y': index // 10 * 2,
+                                                         'width': 1, 'height': 1}})
+                 for index in range(50)]
+        nodes.append(('2:0', {'absoluteBoundingBox': {'x': 20000, 'y': 20000, 'width': 1, 'height': 1}}))
+        spatial_index = SpatialIndex(nodes)
+        
+        everything = spatial_index.nearest(0, 0, k=len(spatial_index))
+        self.assertEqual(len(everything), 51)
+        self.assertEqual(everything[0], '1:0')
+        self.assertEqual(everything[-1], '2:0')
+        self.assertEqual(spatial_index.nearest(0, 0, k=100), everything)
+        self.assertEqual(spatial_index.nearest(20001, 20001), ['2:0'])
+        self.assertEqual(spatial_index.nearest(20001, 20001, k=2), ['2:0', '1:49'])
+        self.assertEqual(spatial_index.nearest(-50000, 0.5, k=1), ['1:0'])
 
 if __name__ == '__main__':
     unittest.main()
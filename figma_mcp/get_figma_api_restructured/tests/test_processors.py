@@ -0,0 +1,475 @@
+"""Tests for Figma data processors."""
+
+import copy
+import json
+import random
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from figma_extractor import FigmaExtractor
+from figma_extractor.extractors.frame_extractor import FrameExtractor
+from figma_extractor.processors.data_cleaner import DataCleaner
+from figma_extractor.core.geometry_store import GeometryStore
+from figma_extractor.processors import distance_calculator
+from figma_extractor.processors.distance_calculator import DistanceCalculator
+from figma_extractor.processors.filter_memo import FilterMemo
+from figma_extractor.processors.incremental import IncrementalProcessor
+from figma_extractor.processors.instances import expand_instances
+from figma_extractor.processors.layout import process_siblings
+from figma_extractor.processors.traversal import TreeTraversal, CollectStage, TransformStage
+from figma_extractor.utils.file_handler import FileHandler
+
+
+def build_sample_document():
+    """Build a small file document with frames, fills, text and empty fields."""
+    def box(x, y, width, height):
+        return {'x': x, 'y': y, 'width': width, 'height': height}
+
+    return {
+        'id': '0:0', 'name': 'Document', 'type': 'DOCUMENT', 'scrollBehavior': 'SCROLLS',
+        'children': [{
+            'id': '0:1', 'name': 'Page', 'type': 'CANVAS', 'backgroundColor': {'r': 1, 'g': 1, 'b': 1, 'a': 1},
+            'children': [{
+                'id': '1:1', 'name': 'Card', 'type': 'FRAME', 'absoluteBoundingBox': box(0, 0, 200, 100),
+                'fills': [{'type': 'SOLID', 'color': {'r': 1, 'g': 0, 'b': 0, 'a': 0.5}}],
+                'effects': [], 'strokes': [],
+                'children': [
+                    {'id': '1:2', 'name': 'Title', 'type': 'TEXT', 'characters': 'Hi', 'exportSettings': [],
+                     'style': {'fontFamily': 'Inter', 'fontSize': 16}, 'absoluteBoundingBox': box(10, 10, 50, 20)},
+                    {'id': '1:3', 'name': 'Icon', 'type': 'FRAME', 'absoluteBoundingBox': box(70, 10, 20, 20),
+                     'children': [{'id': '1:4', 'name': 'Vector', 'type': 'VECTOR', 'componentId': None}]},
+                    {'id': '1:5', 'name': 'Empty', 'type': 'GROUP', 'children': []}
+                ]
+            }]
+        }]
+    }
+
+
+class TestTreeTraversal(unittest.TestCase):
+    """Test cases for the fused single-pass traversal."""
+
+    def test_stages_see_nodes_in_document_order(self):
+        """Test that enter runs pre-order and exit post-order with child results."""
+        document = build_sample_document()
+        traversal = TreeTraversal([
+            CollectStage('ids', lambda node: node['id']),
+            TransformStage('post', lambda node, children: [id_ for child in children for id_ in child] + [node['id']])
+        ])
+
+        outputs = traversal.run(document)
+
+        self.assertEqual(outputs['ids'], ['0:0', '0:1', '1:1', '1:2', '1:3', '1:4', '1:5'])
+        self.assertEqual(outputs['post'], ['1:2', '1:4', '1:3', '1:5', '1:1', '0:1', '0:0'])
+        self.assertEqual(traversal.report()['nodes'], 7)
+
+    def test_process_document_matches_separate_passes(self):
+        """Test that one walk reproduces every processor's own output."""
+        document = build_sample_document()
+        with patch.object(FigmaExtractor, 'get_document', return_value={'document': document}):
+            extractor = FigmaExtractor(token='test', file_key='sample')
+            self.addCleanup(extractor.close)
+            outputs = extractor.process_document()
+
+        frames = []
+        extractor.frame_extractor._find_frames(document, frames)
+        cleaner = extractor.data_cleaner
+
+        self.assertEqual(outputs['frames'], frames)
+        self.assertEqual(outputs['clean'], cleaner.clean(document))
+        self.assertEqual(outputs['remove_empty'], cleaner.remove_empty_fields(document))
+        self.assertEqual(outputs['normalize_colors'], cleaner.normalize_colors(document))
+        self.assertEqual(outputs['bounds'], extractor.distance_calculator._get_nodes_with_bounds(document))
+        self.assertEqual(outputs['tokens']['1:2']['typography'], {'fontFamily': 'Inter', 'fontSize': 16})
+        self.assertEqual(set(extractor.report()['traversal']['stages']), set(outputs))
+
+
+
+class TestDeepDocuments(unittest.TestCase):
+    """Test cases for tree walkers on documents deeper than the recursion limit."""
+
+    def setUp(self):
+        """Build a chain of nested frames well past the recursion limit."""
+        self.depth = sys.getrecursionlimit() * 3
+        self.document = node = {'id': '0:0', 'type': 'DOCUMENT', 'children': []}
+        for level in range(1, self.depth + 1):
+            child = {'id': f'1:{level}', 'type': 'FRAME', 'effects': [],
+                     'absoluteBoundingBox': {'x': level, 'y': level, 'width': 10, 'height': 10}, 'children': []}
+            node['children'].append(child)
+            node = child
+
+    def _depth_of(self, node):
+        depth = 0
+        while node.get('children'):
+            node = node['children'][0]
+            depth += 1
+        return depth
+
+    def test_walkers_do_not_recurse(self):
+        """Test that every walker handles the deep chain and keeps its structure."""
+        cleaner = DataCleaner()
+        frames = []
+        FrameExtractor(Mock())._find_frames(self.document, frames)
+
+        self.assertEqual(len(frames), self.depth)
+        self.assertEqual(frames[0]['id'], '1:1')
+        self.assertEqual(len(DistanceCalculator()._get_nodes_with_bounds(self.document)), self.depth)
+        self.assertEqual(self._depth_of(cleaner.clean(self.document)), self.depth)
+        self.assertEqual(self._depth_of(cleaner.normalize_colors(self.document)), self.depth)
+
+        filtered = cleaner.filter_node(self.document)
+        self.assertEqual(self._depth_of(filtered), self.depth)
+        self.assertEqual(filtered['children'][0]['children'][0]['padding']['left'], 1)
+
+        # Every 'effects': [] is dropped
+        stripped = cleaner.remove_empty_fields(self.document)
+        self.assertEqual(self._depth_of(stripped), self.depth)
+        self.assertNotIn('effects', stripped['children'][0])
+
+
+def pairwise_siblings(children, tolerance=2):
+    """Reference O(n²) sibling layout, as originally implemented in DataCleaner."""
+    for i, node_i in enumerate(children):
+        box_i = node_i.get("absoluteBoundingBox")
+        if not box_i:
+            continue
+        siblings_info = []
+        for j, node_j in enumerate(children):
+            box_j = node_j.get("absoluteBoundingBox")
+            if i == j or not box_j:
+                continue
+            if abs(box_i["y"] - box_j["y"]) < tolerance:
+                siblings_info.append({"targetId": node_j.get("id"), "relation": "sameRow",
+                                      "distance": round(abs(box_i["x"] - box_j["x"]), 2)})
+            elif abs(box_i["x"] - box_j["x"]) < tolerance:
+                siblings_info.append({"targetId": node_j.get("id"), "relation": "sameColumn",
+                                      "distance": round(abs(box_i["y"] - box_j["y"]), 2)})
+        if siblings_info:
+            node_i["siblingsLayout"] = siblings_info
+
+
+class TestSiblingLayout(unittest.TestCase):
+    """Test cases for sort-based sibling layout detection."""
+
+    def _children(self, rng, count, coordinate):
+        children = []
+        for index in range(count):
+            node = {'id': f'1:{index}'}
+            if rng.random() > 0.1:
+                node['absoluteBoundingBox'] = {'x': coordinate(), 'y': coordinate(), 'width': 10, 'height': 10}
+            children.append(node)
+        return children
+
+    def test_matches_pairwise_comparison(self):
+        """Test identical entries on grids, boundary distances and scattered floats."""
+        rng = random.Random(7)
+        layouts = [
+            lambda: rng.choice([0, 1, 2, 3, 4, 100]),  # Many ties and exact tolerance gaps
+            lambda: rng.randint(0, 20) * 0.5,
+            lambda: rng.uniform(-1000, 1000),
+            lambda: rng.choice([0.1, 0.3, 2.1, 2.3, 1e6, 1e6 + 1.9999999])
+        ]
+        for coordinate in layouts:
+            for count in (0, 1, 2, 15, 200):
+                expected = self._children(rng, count, coordinate)
+                actual = [dict(node) for node in expected]
+                pairwise_siblings(expected)
+                process_siblings(actual)
+                self.assertEqual(actual, expected)
+
+    def test_geometry_store_gives_identical_results(self):
+        """Test that reading boxes from a geometry store changes neither layout nor distances."""
+        rng = random.Random(18)
+        children = self._children(rng, 60, lambda: rng.choice([rng.randint(0, 50), rng.uniform(0, 50)]))
+        geometry = GeometryStore((child['id'], child) for child in children)
+
+        expected = [dict(child) for child in children]
+        actual = [dict(child) for child in children]
+        process_siblings(expected)
+        process_siblings(actual, geometry=geometry)
+        self.assertEqual(actual, expected)
+
+        data = {'nodes': {'0:0': {'document': {
+            'id': '0:0', 'name': 'Root', 'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': 1, 'height': 1},
+            'children': children}}}}
+        calculator = DistanceCalculator(backend='python')
+        self.assertEqual(calculator.calculate(data, '0:0', geometry=geometry), calculator.calculate(data, '0:0'))
+
+        document = data['nodes']['0:0']['document']
+        geometry.add('0:0', document['absoluteBoundingBox'])
+        cleaner = DataCleaner()
+        self.assertEqual(json.dumps(cleaner.filter_node(document, geometry=geometry)),
+                         json.dumps(cleaner.filter_node(document)))
+
+
+class TestParallelDistances(unittest.TestCase):
+    """Test cases for process-pool distance calculation."""
+
+    def test_matches_serial_calculation(self):
+        """Test identical results, in document order, with several workers."""
+        rng = random.Random(16)
+        parents = []
+        for parent_index in range(12):
+            children = []
+            for index in range(rng.randint(0, 25)):
+                node = {'id': f'{parent_index}:{index}', 'name': f'Child {index}'}
+                if rng.random() > 0.1:
+                    node['absoluteBoundingBox'] = {
+                        'x': rng.choice([rng.randint(0, 500), rng.uniform(0, 500)]), 'y': rng.uniform(0, 500),
+                        'width': rng.randint(0, 80), 'height': rng.uniform(0, 80)}
+                children.append(node)
+            parents.append({'id': f'1:{parent_index}', 'name': f'Parent {parent_index}', 'children': children})
+        data = {'nodes': {'1:0': {'document': {
+            'id': '1:0', 'name': 'Root', 'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': 1, 'height': 1},
+            'children': parents}}}}
+
+        with patch('builtins.print') as mock_print:
+            expected = DistanceCalculator(workers=1).calculate(data, '1:0')
+            with patch.object(DistanceCalculator, 'PARALLEL_MIN_PAIRS', 0):
+                actual = DistanceCalculator(workers=3).calculate(data, '1:0')
+        mock_print.assert_not_called()
+        self.assertEqual(list(actual), list(expected))
+        self.assertEqual(actual, expected)
+
+
+class TestFilterMemo(unittest.TestCase):
+    """Test cases for the instance layout memo."""
+
+    def _instance(self, prefix, x, y, label='Label'):
+        def box(left, top, width, height):
+            return {'x': x + left, 'y': y + top, 'width': width, 'height': height}
+
+        return {
+            'id': prefix, 'name': 'Row', 'type': 'INSTANCE', 'componentId': '9:1',
+            'absoluteBoundingBox': box(0.0, 0.0, 300.0, 40.0),
+            'children': [
+                {'id': f'I{prefix};1', 'name': 'Icon', 'type': 'VECTOR',
+                 'absoluteBoundingBox': box(8.0, 8.0, 24.0, 24.0)},
+                {'id': f'I{prefix};2', 'name': 'Label', 'type': 'TEXT', 'characters': label,
+                 'absoluteBoundingBox': box(40.0, 10.25, 200.0, 20.0)},
+                {'id': f'I{prefix};3', 'name': 'Chevron', 'type': 'FRAME',
+                 'absoluteBoundingBox': box(272.0, 8.0, 24.0, 24.0),
+                 'children': [{'id': f'I{prefix};4', 'name': 'Vector', 'type': 'VECTOR',
+                               'absoluteBoundingBox': box(280.0, 12.0, 8.0, 16.0)}]}
+            ]
+        }
+
+    def _screen(self, instances):
+        return {'id': '0:1', 'name': 'Screen', 'type': 'FRAME', 'children': instances,
+                'absoluteBoundingBox': {'x': 0.0, 'y': 0.0, 'width': 375.0, 'height': 812.0}}
+
+    def test_translated_copies_reuse_layout(self):
+        """Test output identical to filter_node with the layout computed once."""
+        cleaner = DataCleaner()
+        screen = self._screen([self._instance(f'1:{row}', 16.0 + row * 0.5, 100.0 + row * 48, f'Item {row}')
+                               for row in range(5)])
+        memo = FilterMemo(cleaner)
+        self.assertEqual(json.dumps(memo.filter_node(screen)), json.dumps(cleaner.filter_node(screen)))
+        stats = memo.stats
+        self.assertEqual((stats['lookups'], stats['hits'], stats['entries']), (5, 4, 1))
+        self.assertEqual(stats['hit_rate'], 0.8)
+
+        # targetIds follow each copy's own ids
+        row = memo.filter_node(screen)['children'][3]
+        self.assertEqual(row['children'][0]['siblingsLayout'][0]['targetId'], 'I1:3;3')
+        self.assertEqual(memo.stats['hits'], 9)
+
+    def test_inexact_or_ambiguous_subtrees_are_filtered_normally(self):
+        """Test that coordinates off the grid and repeated sibling ids are never memoized."""
+        cleaner = DataCleaner()
+        memo = FilterMemo(cleaner)
+        off_grid = [self._instance(f'1:{row}', 0.1 * row, 48.0 * row) for row in range(1, 4)]
+        repeated = [self._instance(f'2:{row}', 0.0, 48.0 * row) for row in range(1, 4)]
+        for instance in repeated:
+            instance['children'][1]['id'] = instance['children'][0]['id']
+        screen = self._screen(off_grid + repeated)
+        self.assertEqual(json.dumps(memo.filter_node(screen)), json.dumps(cleaner.filter_node(screen)))
+        self.assertEqual(memo.stats['hits'], 0)
+        self.assertEqual(memo.stats['entries'], 0)
+
+
+class TestInstanceTable(unittest.TestCase):
+    """Test cases for deduplicated instance output."""
+
+    def _screen(self):
+        def row(index, x, y):
+            prefix = f'I5:{index};'
+            return {
+                'id': f'5:{index}', 'name': 'Row', 'type': 'INSTANCE', 'componentId': '9:1',
+                'overrides': [{'id': f'{prefix}9:3', 'overriddenFields': ['characters']}],
+                'absoluteBoundingBox': {'x': x, 'y': y, 'width': 300.0, 'height': 40.0},
+                'children': [
+                    {'id': f'{prefix}9:2', 'name': 'Icon', 'type': 'VECTOR',
+                     'absoluteBoundingBox': {'x': x + 8, 'y': y + 8, 'width': 24.0, 'height': 24.0}},
+                    {'id': f'{prefix}9:3', 'name': 'Label', 'type': 'TEXT', 'characters': f'Item {index}',
+                     'absoluteBoundingBox': {'x': x + 40, 'y': y + 8, 'width': 200.0, 'height': 24.0}}
+                ]
+            }
+
+        rows = [row(index, 16.0, 100.0 + 48 * index) for index in range(6)]
+        # A detached layer, an inexact position and a reordered node all need patches
+        del rows[2]['children'][0]
+        rows[3] = row(3, 0.1, 0.2)
+        rows[4]['children'][1] = dict(reversed(list(rows[4]['children'][1].items())))
+        return {'id': '0:1', 'name': 'Screen', 'type': 'FRAME', 'children': rows,
+                'absoluteBoundingBox': {'x': 0.0, 'y': 0.0, 'width': 375.0, 'height': 812.0}}
+
+    def test_round_trip_is_lossless(self):
+        """Test that expanding the table restores identical JSON."""
+        cleaner = DataCleaner()
+        clean = cleaner.filter_node(self._screen())
+        table = json.loads(json.dumps(cleaner.dedupe_instances(clean)))
+
+        self.assertEqual(list(table['components']), ['9:1'])
+        self.assertEqual(table['components']['9:1']['children'][1]['id'], '9:3')
+        rows = table['document']['children']
+        self.assertEqual(rows[1]['patch']['children'], {'1': {'set': {'characters': 'Item 1'}}})
+        self.assertEqual(json.dumps(cleaner.expand_instances(table)), json.dumps(clean))
+
+        # Lists of nodes keep one table too
+        table = json.loads(json.dumps(cleaner.dedupe_instances(clean['children'])))
+        self.assertEqual(json.dumps(expand_instances(table)), json.dumps(clean['children']))
+
+    def test_rejects_other_data(self):
+        """Test that only dedupe_instances() output is expanded."""
+        with self.assertRaises(ValueError):
+            expand_instances({'id': '0:1'})
+
+
+class TestIncrementalProcessor(unittest.TestCase):
+    """Test cases for incremental re-processing of changed documents."""
+
+    def setUp(self):
+        """Set up a processor persisting its state in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cleaner = DataCleaner()
+        self.calculator = DistanceCalculator(backend='python')
+
+    def _processor(self):
+        handler = FileHandler(output_dir=self.tmp_dir.name, input_dir=self.tmp_dir.name)
+        return IncrementalProcessor(self.cleaner, self.calculator, file_handler=handler,
+                                    state_filename='state.json')
+
+    def _check(self, processor, document):
+        outputs = processor.process(copy.deepcopy(document))
+        expected_clean = self.cleaner.filter_node(document)
+        expected_distances = self.calculator.calculate({'nodes': {'0:0': {'document': document}}}, '0:0')
+        self.assertEqual(json.dumps(outputs['clean']), json.dumps(expected_clean))
+        self.assertEqual(json.dumps(outputs['distances']), json.dumps(expected_distances))
+        return processor.stats
+
+    def test_changed_subtrees_match_full_runs(self):
+        """Test outputs identical to full runs while only changed parts are recalculated."""
+        document = build_sample_document()
+        card = document['children'][0]['children'][0]
+        card['children'].extend(
+            {'id': f'2:{i}', 'name': f'Dot {i}', 'type': 'ELLIPSE',
+             'absoluteBoundingBox': {'x': 10 + 30 * i, 'y': 60, 'width': 20, 'height': 20}}
+            for i in range(4)
+        )
+        processor = self._processor()
+        self.assertEqual(self._check(processor, document)['reused_nodes'], 0)
+
+        # Unchanged document: everything is reused
+        stats = self._check(processor, document)
+        self.assertEqual(stats['recomputed_nodes'], 0)
+        self.assertEqual(stats['reused_distances'], stats['parents'])
+
+        # Move one dot: the dot and its ancestors are rebuilt, other subtrees reused
+        card['children'][3]['absoluteBoundingBox'] = {'x': 12, 'y': 61.5, 'width': 20, 'height': 20}
+        stats = self._check(processor, document)
+        self.assertEqual(stats['recomputed_nodes'], 4)
+        self.assertEqual(stats['reused_distances'], stats['parents'] - 1)
+
+        # Fields outside the outputs do not invalidate anything
+        card['exportSettings'] = [{'format': 'PNG'}]
+        self.assertEqual(self._check(processor, document)['recomputed_nodes'], 0)
+
+        # A fresh processor picks up the saved state; a moved card changes every child's padding
+        card['absoluteBoundingBox'] = {'x': 5, 'y': 0, 'width': 200, 'height': 100}
+        del card['children'][2]
+        stats = self._check(self._processor(), document)
+        self.assertEqual(stats['recomputed_nodes'], 3)
+
+    def test_duplicate_ids_are_never_reused(self):
+        """Test that nodes sharing an id are recalculated instead of mixed up."""
+        document = build_sample_document()
+        page = document['children'][0]
+        page['children'].append(copy.deepcopy(page['children'][0]))
+        processor = self._processor()
+        self._check(processor, document)
+
+        page['children'][1]['children'][0]['absoluteBoundingBox']['x'] = 40
+        stats = self._check(processor, document)
+        self.assertEqual(stats['reused_nodes'], 0)
+
+        # An edit gives a box-less child the id of a node with a sibling layout elsewhere
+        document = build_sample_document()
+        page = document['children'][0]
+        card = page['children'][0]
+        card['children'].append({'id': '1:6', 'name': 'Spacer', 'type': 'FRAME'})
+        page['children'].append({
+            'id': '3:0', 'name': 'Bar', 'type': 'FRAME', 'children': [
+                {'id': f'3:{i}', 'name': f'Tab {i}', 'type': 'FRAME',
+                 'absoluteBoundingBox': {'x': 40 * i, 'y': 200, 'width': 30, 'height': 20}}
+                for i in (1, 2)
+            ]
+        })
+        processor = self._processor()
+        self._check(processor, document)
+        card['children'][3]['id'] = '3:1'
+        self._check(processor, document)
+
+
+@unittest.skipIf(distance_calculator.np is None, "numpy is not installed")
+class TestNumpyDistances(unittest.TestCase):
+    """Test cases for the NumPy distance backend."""
+
+    def _coordinate(self, rng):
+        # Mix ints, floats, signed zeros and repeated values to cover every branch
+        return rng.choice([
+            lambda: rng.randint(-50, 50),
+            lambda: rng.choice([0, 0.0, -0.0, 1.5, 2, 2.0]),
+            lambda: round(rng.uniform(-50, 50), rng.choice([0, 1, 3]))
+        ])()
+
+    def test_matches_python_backend(self):
+        """Test identical values and int/float types for every pair."""
+        rng = random.Random(14)
+        python_backend = DistanceCalculator(backend='python')
+        numpy_backend = DistanceCalculator(backend='numpy')
+        for _ in range(200):
+            children = []
+            for index in range(rng.randint(0, 30)):
+                node = {'id': f'1:{index}'}
+                if rng.random() > 0.1:
+                    node['absoluteBoundingBox'] = {
+                        'x': self._coordinate(rng), 'y': self._coordinate(rng),
+                        'width': abs(self._coordinate(rng)), 'height': abs(self._coordinate(rng))}
+                children.append(node)
+
+            expected = python_backend._child_distances(children)
+            actual = numpy_backend._child_distances(children)
+            self.assertEqual([(a['id'], b['id']) for a, b, _, _ in actual],
+                             [(a['id'], b['id']) for a, b, _, _ in expected])
+            self.assertEqual([(repr(h), repr(v)) for _, _, h, v in actual],
+                             [(repr(h), repr(v)) for _, _, h, v in expected])
+
+    def test_calculate_output_is_backend_independent(self):
+        """Test the full calculation result with both backends."""
+        data = {'nodes': {'1:1': {'document': build_sample_document()['children'][0]['children'][0]}}}
+        with patch('builtins.print') as mock_print:
+            expected = DistanceCalculator(backend='python').calculate(data, '1:1')
+            actual = DistanceCalculator(backend='numpy').calculate(data, '1:1')
+        mock_print.assert_not_called()
+        self.assertEqual(actual, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
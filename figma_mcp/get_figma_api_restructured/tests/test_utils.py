@@ -0,0 +1,338 @@
+"""Tests for Figma extractor utilities."""
+
+import gzip
+import io
+import json
+import math
+import tempfile
+import unittest
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from figma_extractor.core.api_client import FigmaAPIClient
+from figma_extractor.extractors.frame_extractor import FrameExtractor
+from figma_extractor.processors.distance_calculator import DistanceCalculator
+from figma_extractor.utils import compression, json_backends, json_stream
+from figma_extractor.utils.background_writer import BackgroundWriter
+from figma_extractor.utils.file_handler import FileHandler
+from figma_extractor.utils.reporting import ConsoleReporter, JsonLinesReporter, Reporter
+
+
+SAMPLE_NODES_FILE = Path(__file__).parent.parent.parent / 'get_figma_api' / 'figma_file.json'
+
+
+class TestJsonStream(unittest.TestCase):
+    """Test cases for the streaming JSON parser."""
+
+    def _rebuild(self, events):
+        events = iter(events)
+        event, _ = next(events)
+        builder = json_stream._ValueBuilder(event)
+        for event, value in events:
+            if builder.feed(event, value):
+                return builder.value
+
+    def test_events_rebuild_document_across_chunk_boundaries(self):
+        """Test that tiny read sizes never split tokens."""
+        data = {
+            'a': [1, -2.5, 1.5e+3, True, False, None],
+            'b': {'nested': 'quote \" and \\u00e9 and ünïcode', 'empty': {}},
+            'c': []
+        }
+        raw = json.dumps(data).encode('utf-8')
+        for chunk_size in (1, 2, 3, 7):
+            events = json_stream.iter_events(io.BytesIO(raw), chunk_size=chunk_size)
+            self.assertEqual(self._rebuild(events), data)
+
+    def test_multibyte_characters_split_across_reads(self):
+        """Test raw UTF-8 text whose characters are cut by short reads."""
+        data = {'document': {'id': '0:0', 'type': 'DOCUMENT', 'children': [
+            {'id': '1:1', 'type': 'FRAME', 'name': 'Trang chủ – Đăng nhập 🚀',
+             'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': 10, 'height': 10}}
+        ]}}
+        raw = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+        class OneByteReader(io.BytesIO):
+            def read(self, size=-1):
+                return super().read(1)
+
+        with patch.object(json_stream, 'ijson', None):
+            for chunk_size in (1, 2, 3):
+                events = json_stream.iter_events(io.BytesIO(raw), chunk_size=chunk_size)
+                self.assertEqual(self._rebuild(events), data)
+            frames = list(json_stream.iter_frames(OneByteReader(raw)))
+        self.assertEqual([frame['name'] for frame in frames], ['Trang chủ – Đăng nhập 🚀'])
+
+    def test_node_records_keep_only_requested_fields(self):
+        """Test that node records drop fills and other unneeded fields."""
+        data = {'document': {
+            'id': '0:0', 'type': 'DOCUMENT', 'fills': [{'type': 'SOLID'}],
+            'children': [{
+                'id': '1:1', 'type': 'FRAME', 'name': 'Frame',
+                'absoluteBoundingBox': {'x': 1, 'y': 2, 'width': 3, 'height': 4},
+                'effects': [{'type': 'DROP_SHADOW'}],
+                'children': [{'id': '1:2', 'type': 'TEXT', 'characters': 'Hi'}]
+            }]
+        }}
+
+        records = list(json_stream.iter_node_records(io.BytesIO(json.dumps(data).encode('utf-8'))))
+
+        self.assertEqual([record['id'] for record in records], ['1:2', '1:1', '0:0'])
+        frame = records[1]
+        self.assertEqual(frame['absoluteBoundingBox'], {'x': 1, 'y': 2, 'width': 3, 'height': 4})
+        self.assertEqual(frame['child_count'], 1)
+        self.assertEqual(frame['parent_id'], '0:0')
+        self.assertNotIn('effects', frame)
+        self.assertNotIn('fills', records[2])
+
+    @unittest.skipUnless(SAMPLE_NODES_FILE.exists(), "sample Figma export not available")
+    def test_stream_results_match_in_memory_results(self):
+        """Test that streamed frames and distances equal the in-memory ones."""
+        with open(SAMPLE_NODES_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        extractor = FrameExtractor(Mock(spec=FigmaAPIClient))
+        calculator = DistanceCalculator()
+        with patch('builtins.print') as mock_print, patch.object(extractor, '_get_file', return_value=data):
+            self.assertEqual(extractor.extract_stream(SAMPLE_NODES_FILE), extractor.extract())
+            self.assertEqual(calculator.calculate_stream(SAMPLE_NODES_FILE),
+                             calculator.calculate(data))
+        mock_print.assert_not_called()
+
+
+class TestFileHandler(unittest.TestCase):
+    """Test cases for JSON file saving and loading."""
+
+    def setUp(self):
+        """Set up a temporary output directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.data = {'name': 'Đăng nhập', 'box': {'x': 1.5, 'y': -2, 'width': 4.3711224861908704e-07},
+                     'children': [], 'visible': True, 'componentId': None}
+
+    def _handler(self, backend, pretty=True):
+        return FileHandler(output_dir=self.tmp_dir.name, input_dir=self.tmp_dir.name,
+                           json_backend=backend, pretty=pretty)
+
+    def _check_backend(self, backend):
+        handler = self._handler(backend)
+        pretty_path = handler.save_json(self.data, 'pretty.json')
+        compact_path = handler.save_json(self.data, 'compact.json', pretty=False)
+
+        self.assertEqual(handler.load_json('pretty.json'), self.data)
+        self.assertEqual(handler.load_json('compact.json'), self.data)
+        self.assertIn('\n  "name": "Đăng nhập"', pretty_path.read_text(encoding='utf-8'))
+        self.assertNotIn(' ', compact_path.read_text(encoding='utf-8').replace('Đăng nhập', ''))
+        return pretty_path.read_bytes(), compact_path.read_bytes()
+
+    def test_stdlib_backend_matches_json_module(self):
+        """Test that the stdlib backend writes what json.dump always wrote."""
+        pretty, compact = self._check_backend('stdlib')
+        self.assertEqual(pretty.decode('utf-8'), json.dumps(self.data, indent=2, ensure_ascii=False))
+        self.assertEqual(compact.decode('utf-8'), json.dumps(self.data, separators=(',', ':'), ensure_ascii=False))
+
+    @unittest.skipIf(json_backends.orjson is None, "orjson is not installed")
+    def test_orjson_backend_round_trips(self):
+        """Test orjson output, including the stdlib fallback for values orjson rejects."""
+        self._check_backend('orjson')
+        handler = self._handler('orjson')
+        handler.save_json({'big': 2 ** 70}, 'big.json')
+        self.assertEqual(handler.load_json('big.json'), {'big': 2 ** 70})
+        self.assertIs(type(handler.load_json('big.json')['big']), int)
+        
+        # Files written by the stdlib backend read back the same
+        data = {'nan': math.nan, 'inf': -math.inf, 'big': 10 ** 20, 'id': '1:2'}
+        self._handler('stdlib').save_json(data, 'stdlib.json')
+        loaded = handler.load_json('stdlib.json')
+        self.assertTrue(math.isnan(loaded['nan']))
+        self.assertEqual(repr(loaded), repr(data))
+    
+    def test_default_backend_round_trips_nan_and_big_integers(self):
+        """Test that NaN, Infinity and integers beyond 64 bits survive a save and load."""
+        handler = FileHandler(output_dir=self.tmp_dir.name, input_dir=self.tmp_dir.name)
+        data = {'nan': math.nan, 'inf': math.inf, 'big': 10 ** 20, 'small': -2 ** 70}
+        handler.save_json(data, 'values.json')
+        self.assertEqual(repr(handler.load_json('values.json')), repr(data))
+
+    def test_compressed_files_round_trip(self):
+        """Test compression chosen by extension, by option and found by the plain name."""
+        handler = self._handler('stdlib')
+        by_extension = handler.save_json(self.data, 'tokens.json.gz')
+        by_option = handler.save_json(self.data, 'frames.json', compression='gzip')
+
+        self.assertEqual(by_option.name, 'frames.json.gz')
+        self.assertEqual(by_extension.read_bytes()[:2], b'\x1f\x8b')
+        self.assertEqual(handler.load_json('tokens.json.gz'), self.data)
+        self.assertEqual(handler.load_json('frames.json'), self.data)
+
+        default_gzip = FileHandler(output_dir=self.tmp_dir.name, input_dir=self.tmp_dir.name,
+                                   json_backend='stdlib', compression='gzip')
+        self.assertEqual(default_gzip.save_json(self.data, 'raw.json').name, 'raw.json.gz')
+        self.assertEqual(default_gzip.save_json(self.data, 'plain.json', compression='none').name, 'plain.json')
+
+    @unittest.skipIf(json_backends.orjson is None, "orjson is not installed")
+    def test_compressed_files_use_incremental_encoder(self):
+        """Test that compressed files are written by the stdlib encoder whatever the backend."""
+        handler = self._handler('orjson')
+        path = handler.save_json(self.data, 'doc.json', compression='gzip')
+        
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), json.dumps(self.data, indent=2, ensure_ascii=False))
+        self.assertEqual(handler.load_json('doc.json'), self.data)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is not installed")
+    def test_zstd_round_trip(self):
+        """Test zstd-compressed files."""
+        handler = self._handler('stdlib')
+        self.assertEqual(handler.save_json(self.data, 'doc.json', compression='zstd').name, 'doc.json.zst')
+        self.assertEqual(handler.load_json('doc.json'), self.data)
+
+    def test_failed_save_keeps_previous_file(self):
+        """Test that a save failing halfway leaves the old file and no temporary file."""
+        handler = self._handler('stdlib')
+        path = handler.save_json(self.data, 'doc.json')
+
+        with self.assertRaises(TypeError):
+            handler.save_json({'name': 'x', 'bad': object()}, 'doc.json')
+
+        self.assertEqual(handler.load_json('doc.json'), self.data)
+        self.assertEqual([p.name for p in Path(self.tmp_dir.name).iterdir()], [path.name])
+
+    def test_background_saves_flush_and_raise_errors(self):
+        """Test that background saves land by flush() and report failures to the caller."""
+        handler = FileHandler(output_dir=self.tmp_dir.name, input_dir=self.tmp_dir.name,
+                              json_backend='stdlib', background=True, max_pending=2)
+        self.addCleanup(handler.close)
+        paths = [handler.save_json(dict(self.data, index=i), f'doc{i}.json') for i in range(5)]
+        future = handler.save_json_async(self.data, 'doc5.json', compression='gzip')
+        handler.flush()
+
+        self.assertEqual(future.result().name, 'doc5.json.gz')
+        for i, path in enumerate(paths):
+            self.assertEqual(json.loads(path.read_text(encoding='utf-8'))['index'], i)
+
+        failed = handler.save_json_async({'bad': object()}, 'bad.json')
+        with self.assertRaises(TypeError):
+            handler.flush()
+        self.assertIsInstance(failed.exception(), TypeError)
+        self.assertFalse((Path(self.tmp_dir.name) / 'bad.json').exists())
+
+        # Each error is raised once; the writer keeps working afterwards
+        handler.save_json(self.data, 'after.json')
+        handler.close()
+        self.assertEqual(handler.load_json('after.json'), self.data)
+        with self.assertRaises(RuntimeError):
+            handler.save_json(self.data, 'closed.json')
+
+    def test_background_error_finishing_during_check_is_kept(self):
+        """Test that a save failing while finished saves are collected is raised later."""
+        class FinishingFuture(Future):
+            # Still running when first asked, failed from then on
+            checks = 0
+
+            def done(self):
+                self.checks += 1
+                return self.checks > 1
+
+        writer = BackgroundWriter()
+        future = FinishingFuture()
+        future.set_exception(OSError('disk full'))
+        writer._futures.append(future)
+
+        writer._raise_errors(wait=False)
+        with self.assertRaises(OSError):
+            writer._raise_errors(wait=False)
+
+    @unittest.skipUnless(SAMPLE_NODES_FILE.exists(), "sample Figma export not available")
+    def test_snapshot_round_trips_and_reads_lazily(self):
+        """Test that snapshots rebuild the saved data exactly and expose nodes without decoding it."""
+        with open(SAMPLE_NODES_FILE, 'r', encoding='utf-8') as f:
+            response = json.load(f)
+        handler = self._handler('stdlib')
+        handler.save_snapshot(response, 'nodes.snapshot')
+        handler.save_snapshot(self.data, 'bare.snapshot')
+
+        with handler.open_snapshot('nodes.snapshot') as snapshot:
+            rebuilt = snapshot.to_dict()
+            self.assertEqual(json.dumps(rebuilt), json.dumps(response))
+            self.assertEqual(snapshot.root_paths, [('nodes', '1:5055', 'document')])
+
+            document = response['nodes']['1:5055']['document']
+            root = snapshot.root
+            self.assertEqual((root.id, root.name, root.type), (document['id'], document['name'], document['type']))
+            self.assertEqual(list(root), list(document))
+            self.assertEqual([child.id for child in root['children']], [c['id'] for c in document['children']])
+
+            leaf_id = document['children'][0]['children'][0]['id']
+            leaf = snapshot.find(leaf_id)
+            self.assertEqual(leaf.parent.id, document['children'][0]['id'])
+            self.assertEqual(leaf.to_dict(), document['children'][0]['children'][0])
+            self.assertIsNone(snapshot.find('missing'))
+
+        with handler.open_snapshot('bare.snapshot') as snapshot:
+            self.assertIsNone(snapshot.envelope)
+            self.assertEqual(json.dumps(snapshot.to_dict()), json.dumps(self.data))
+
+        with self.assertRaises(ValueError):
+            handler.open_snapshot(handler.save_json(self.data, 'doc.json').name)
+
+    def test_unknown_backend_is_rejected(self):
+        """Test that a misspelled backend name fails early."""
+        with self.assertRaises(ValueError):
+            self._handler('simplejson')
+
+
+class TestReporting(unittest.TestCase):
+    """Test cases for progress reporters."""
+
+    def setUp(self):
+        """Set up a parent with two boxed children."""
+        self.data = {'nodes': {'1:0': {'document': {
+            'id': '1:0', 'name': 'Card', 'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': 100, 'height': 100},
+            'children': [
+                {'id': '1:1', 'name': 'Title', 'absoluteBoundingBox': {'x': 0, 'y': 0, 'width': 40, 'height': 10}},
+                {'id': '1:2', 'name': 'Icon', 'absoluteBoundingBox': {'x': 50.5, 'y': 20, 'width': 10, 'height': 10}}
+            ]
+        }}}}
+
+    def test_library_use_is_silent(self):
+        """Test that processors write nothing unless given a reporter."""
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            DistanceCalculator().calculate(self.data, '1:0')
+        self.assertEqual(stdout.getvalue(), '')
+
+    def test_reporters_must_implement_emit(self):
+        """Test that the reporter base class cannot be used without an emit()."""
+        with self.assertRaises(TypeError):
+            Reporter()
+
+    def test_console_reporter_prints_distance_lines(self):
+        """Test the human-readable distance output."""
+        stream = io.StringIO()
+        DistanceCalculator(reporter=ConsoleReporter(stream)).calculate(self.data, '1:0')
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[2:6], [
+            "Parent Node: Card (ID: 1:0)",
+            "  Khoảng cách giữa 'Title' (ID: 1:1) và 'Icon' (ID: 1:2):",
+            "    Ngang: 10.50",
+            "    Dọc: 10.00"
+        ])
+
+    def test_json_lines_reporter_writes_one_event_per_line(self):
+        """Test machine-readable events for distances."""
+        stream = io.StringIO()
+        DistanceCalculator(reporter=JsonLinesReporter(stream)).calculate(self.data, '1:0')
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([event['event'] for event in events],
+                         ['distances.start', 'distances.parent', 'distances.pair', 'distances.parent_done'])
+        self.assertEqual(events[2]['horizontal_distance'], 10.5)
+        self.assertEqual(events[2]['node2_id'], '1:2')
+
+
+if __name__ == '__main__':
+    unittest.main()